@@ -32,6 +32,8 @@ import sys
 sys.path.append('C:\\Users\\kjerram\\Documents\\GitHub')
 
 # from common_data_readers.python.kongsberg.kmall import kmall
+import multibeam_tools.libs.em_io
+import multibeam_tools.libs.parse_cache
 from multibeam_tools.libs.gui_widgets import *
 from multibeam_tools.libs.file_fun import *
 from multibeam_tools.libs.swath_fun import *
@@ -419,21 +421,31 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 	def get_all_time(self, filename):  # extract first and last datagram times from ALL file
-		em = readALLswath(self, filename, print_updates=False, parse_outermost_only=True, parse_params_only=True)
-		dt = [datetime.datetime.strptime(str(em['XYZ'][p]['DATE']), '%Y%m%d') + \
-			  datetime.timedelta(milliseconds=em['XYZ'][p]['TIME']) for p in range(len(em['XYZ']))]
+		time_range = multibeam_tools.libs.em_io.all_time_range(filename)  # read headers at start and end of file only
+
+		if time_range is None:  # fall back to parsing the file if datagrams were not found at the start and end
+			em = readALLswath(self, filename, print_updates=False, parse_outermost_only=True, parse_params_only=True)
+			dt = em['XYZ'].ping['DATETIME']
+			time_range = (dt.min().item(), dt.max().item())
+
 		self.info['em']['fname'].append(os.path.basename(filename))
-		self.info['em']['start'].append(min(dt))
-		self.info['em']['stop'].append(max(dt))
+		self.info['em']['start'].append(time_range[0])
+		self.info['em']['stop'].append(time_range[1])
 
 
 	def get_kmall_time(self, filename):  # extract first and last datagram times from KMALL file
 		# self.verbose = True
-		km = kmall_data(filename)  # kmall_data class inheriting kmall class and adding extract_dg method
-		km.index_file()  # get message times
+		time_range = multibeam_tools.libs.em_io.kmall_time_range(filename)  # read headers at start and end of file only
+
+		if time_range is None:  # fall back to indexing the file if headers at start and end are not consistent
+			toc = multibeam_tools.libs.parse_cache.kmall_index(filename)  # get message times (shared, cached index)
+			msgtime = toc.TIME_SEC + toc.TIME_NANOSEC/1.0E9
+			time_range = (datetime.datetime.utcfromtimestamp(msgtime.min()),
+						  datetime.datetime.utcfromtimestamp(msgtime.max()))
+
 		self.info['em']['fname'].append(os.path.basename(filename))
-		self.info['em']['start'].append(datetime.datetime.utcfromtimestamp(min(km.msgtime)))
-		self.info['em']['stop'].append(datetime.datetime.utcfromtimestamp(max(km.msgtime)))
+		self.info['em']['start'].append(time_range[0])
+		self.info['em']['stop'].append(time_range[1])
 
 
 	def get_ins_time(self, filename):  # get start and stop times for INS file
@@ -28,6 +28,7 @@ import struct
 import sys
 import multibeam_tools.libs.readEM
 import multibeam_tools.libs.parseEM
+import multibeam_tools.libs.em_io
 import numpy as np
 
 __version__ = "0.0.1"
@@ -352,11 +353,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return ()
 
         # otherwise, read input file and write output file
-        fid_in = open(fpath_in, 'rb')
         fid_out = open(fpath_out, "wb")
-        raw = fid_in.read()
-        len_raw = len(raw)
-        dg_start = 0  # datagram length field precedes datagram (dg is between STX and ETX, inclusive)
 
         dg_count = 0 # datagram counter
         rra_count = 0 # raw range angle 78 counter
@@ -364,84 +361,57 @@ class MainWindow(QtWidgets.QMainWindow):
         sbi_count = 0 # seabed image counter
         blowout_count = 0
 
-        while True:  # parse datagrams and copy those on the list
-            if dg_start + 4 >= len_raw:  # break if EOF
-                break
-
-            dg_len = struct.unpack('I', raw[dg_start:dg_start + 4])[0]  # get dg length (before start of dg at STX)
-
-            # continue to next iteration if dg length is insuffient to check for STX, ID, and ETX
-            if dg_len < 3:
-                dg_start = dg_start + 4
-                continue
-
-            dg_end = dg_start + 4 + dg_len  # if length is OK, get expected end location, including length field
-
-            # continue to next iteration if dg_end is beyond EOF
-            if dg_end > len_raw:
-                dg_start = dg_start + 4
-                continue
-
-            # try to read dg starting with STX if len seems reasonable and not EOF
-            dg = raw[dg_start + 4:dg_end]  # get STX, ID, and ETX
-            dg_STX = dg[0]
-            dg_ID = dg[1]
-            dg_ETX = dg[-3]
-
-            # continue unpacking only if STX and ETX are valid
-            if dg_STX == 2 and dg_ETX == 3:
-                    # SBI = multibeam_tools.libs.readEM()
-
-                if dg_ID == 78: # get fid_out pointer location at start of rra78 write
-                    last_rra_write_start = fid_out.tell()
-
-                if dg_ID == 88: # wait for next seabed image 89 datagram
-                    last_xyz_write_start = fid_out.tell()
-
-                fid_out.write(raw[dg_start:dg_end])
-                dg_start = dg_start + dg_len + 4  # reset pointer to end of datagram if this had valid STX and ETX
-                dg_count = dg_count + 1
-
-                # print('found datagram ID', dg_ID, 'at datagram number', dg_count)
-
-                if dg_ID == 78:
-                    rra_count = rra_count + 1
-                    # print('FOUND RRA78 number', rra_count, 'at datagram number', dg_count)
-
-                if dg_ID == 88:
-                    xyz_count = xyz_count + 1
-                    # print('FOUND XYZ88 number', xyz_count, 'at datagram number', dg_count)
-                    # print('wrote to output starting at ', last_xyz_write_start)
-                    # print('dg_len in loop was', dg_len) # f.write length is dg_len + 4
-
-                if dg_ID == 89:
-                    sbi_count = sbi_count + 1
-                    # print('FOUND SEABED IMAGE 89 number', sbi_count, 'at datagram number', dg_count)
-
-                    SBI = multibeam_tools.libs.parseEM.SBI_89_dg(dg)  # parse the SBI datagram
-
-                    # print(np.mean(SBI['AMPLITUDE']))
-                    mean_amplitude = np.mean(SBI['AMPLITUDE'])
-                    print('ping number', sbi_count, 'has amp', mean_amplitude)
-                    # at this point, the thresholds are set by trial and error for the system
-                    # amp below -450 (raw units in dg, not interpreted into dB) look abnormal in FMGT
-                    if mean_amplitude > 0 or mean_amplitude < -400: # warn user of blowout
-                        self.update_log('Blowout detected with mean amplitude ' + str(np.round(mean_amplitude)) +
-                                        ' at ping ' + str(sbi_count))
-                        fid_out.seek(last_rra_write_start) # seek start of most recent RRA datagram in output
-                        fid_out.truncate() # truncate file, then carry on
-                        blowout_count = blowout_count + 1
-
-                continue
-
-            # if not valid, move ahead by 1 and continue search
-            dg_start = dg_start + 1
+        # copy all dgs from slices of the mapped file (length field precedes dg at STX), skipping corrupt datagrams
+        skipped = []  # byte ranges of corrupt or truncated data in the source file
+        for dg_start, dg_ID, dg in multibeam_tools.libs.em_io.iter_datagrams(fpath_in, verify_checksum=True,
+                                                                             skipped=skipped):
+            if dg_ID == 78: # get fid_out pointer location at start of rra78 write
+                last_rra_write_start = fid_out.tell()
+
+            if dg_ID == 88: # wait for next seabed image 89 datagram
+                last_xyz_write_start = fid_out.tell()
+
+            fid_out.write(len(dg).to_bytes(4, 'little'))
+            fid_out.write(dg)
+            dg_count = dg_count + 1
+
+            # print('found datagram ID', dg_ID, 'at datagram number', dg_count)
+
+            if dg_ID == 78:
+                rra_count = rra_count + 1
+                # print('FOUND RRA78 number', rra_count, 'at datagram number', dg_count)
+
+            if dg_ID == 88:
+                xyz_count = xyz_count + 1
+                # print('FOUND XYZ88 number', xyz_count, 'at datagram number', dg_count)
+                # print('wrote to output starting at ', last_xyz_write_start)
+                # print('dg_len in loop was', dg_len) # f.write length is dg_len + 4
+
+            if dg_ID == 89:
+                sbi_count = sbi_count + 1
+                # print('FOUND SEABED IMAGE 89 number', sbi_count, 'at datagram number', dg_count)
+
+                SBI = multibeam_tools.libs.parseEM.SBI_89_dg(dg)  # parse the SBI datagram
+
+                mean_amplitude = SBI['AMPLITUDE_MEAN']
+                print('ping number', sbi_count, 'has amp', mean_amplitude)
+                # at this point, the thresholds are set by trial and error for the system
+                # amp below -450 (raw units in dg, not interpreted into dB) look abnormal in FMGT
+                if mean_amplitude > 0 or mean_amplitude < -400: # warn user of blowout
+                    self.update_log('Blowout detected with mean amplitude ' + str(np.round(mean_amplitude)) +
+                                    ' at ping ' + str(sbi_count))
+                    fid_out.seek(last_rra_write_start) # seek start of most recent RRA datagram in output
+                    fid_out.truncate() # truncate file, then carry on
+                    blowout_count = blowout_count + 1
+
+        for skip_start, skip_stop in skipped:
+            self.update_log('Skipped corrupt data in ' + fpath_in.rsplit('/')[-1] + ' (bytes ' +
+                            str(skip_start) + '-' + str(skip_stop) + ')')
 
         self.update_log('Total pings : ' + str(sbi_count))
         self.update_log('Total blowouts: ' + str(blowout_count))
         self.update_log('Total pings after removal of blowouts: ' + str(sbi_count - blowout_count))
-        # close input, output files and return
-        fid_in.close()
+        # close output file and return
         fid_out.close()
         return ()
 
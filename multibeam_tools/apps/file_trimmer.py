@@ -24,6 +24,7 @@ except ImportError as e:
     from PyQt5.QtGui import QDoubleValidator
     from PyQt5.QtCore import Qt, QSize
 import datetime
+import numpy as np
 import os
 import struct
 import sys
@@ -31,8 +32,8 @@ import sys
 # add path to external module common_data_readers for pyinstaller
 sys.path.append('C:\\Users\\kjerram\\Documents\\GitHub')
 
-from common_data_readers.python.kongsberg.kmall import kmall
 from multibeam_tools.libs.gui_widgets import *
+from multibeam_tools.libs import em_io, parse_cache
 
 
 __version__ = "0.1.5"  # next release with concatenation option
@@ -641,82 +642,39 @@ class MainWindow(QtWidgets.QMainWindow):
             print('dg_keep_list=', dg_keep_list)
             print('working on .all file ', fpath_in)
             fid_out = open(fpath_out, "wb")  # create output file
-            fid_in = open(fpath_in, "rb")  # open source file
-            raw = fid_in.read()  # read source
-            len_raw = len(raw)
-            dg_start = 0  # datagram length field precedes datagram (dg is between STX and ETX, inclusive)
-
-            while True:  # parse datagrams and copy those on the list
-                if dg_start + 4 >= len_raw:  # break if EOF
-                    break
-
-                dg_len = struct.unpack('I', raw[dg_start:dg_start + 4])[0]  # get dg length (before start of dg at STX)
-
-                # continue to next iteration if dg length is insufficient to check for STX, ID, and ETX
-                if dg_len < 3:
-                    dg_start = dg_start + 4
-                    continue
-
-                dg_end = dg_start + 4 + dg_len  # if length is OK, get expected end location, including length field
-
-                # continue to next iteration if dg_end is beyond EOF
-                if dg_end > len_raw:
-                    dg_start = dg_start + 4
-                    continue
-
-                # try to read dg starting with STX if len seems reasonable and not EOF
-                dg = raw[dg_start + 4:dg_end]  # get STX, ID, and ETX
-                dg_STX = dg[0]
-                dg_ID = dg[1]
-                dg_ETX = dg[-3]
-
-                # continue unpacking only if STX and ETX are valid
-                if dg_STX == 2 and dg_ETX == 3:
-                    if dg_ID in dg_keep_list:  # write datagram to output file if on the list
-                        fid_out.write(raw[dg_start:dg_end])
-
-                    dg_start = dg_start + dg_len + 4  # reset pointer to end of datagram if this had valid STX and ETX
-                    continue
-
-                # if not valid, move ahead by 1 and continue search
-                dg_start = dg_start + 1
-
-            # close input, output files and return
-            fid_in.close()
+            # copy datagrams on the list from slices of the mapped source file (length field precedes dg at STX);
+            # datagrams with invalid checksums are skipped as corrupt
+            skipped = []  # byte ranges of corrupt or truncated data in the source file
+            for dg_start, dg_ID, dg in em_io.iter_datagrams(fpath_in, ids=list(dg_keep_list), verify_checksum=True,
+                                                            skipped=skipped):
+                fid_out.write(len(dg).to_bytes(4, 'little'))
+                fid_out.write(dg)
+
+            for skip_start, skip_stop in skipped:
+                self.update_log('Skipped corrupt data in ' + fpath_in.rsplit('/')[-1] + ' (bytes ' +
+                                str(skip_start) + '-' + str(skip_stop) + ')')
+
+            # close output file and return
             fid_out.close()
 
-        elif file_ext == 'kmall':  # use kmall module to parse, ********* FIGURE OUT HOW TO WRITE FROM KMALL *****
+        elif file_ext == 'kmall':  # copy datagrams on the list from the mapped source file
             dg_keep_list = self.dg_ID['kmall'][self.proc_list[self.proc_path]].values()  # use values
             print('dg_keep_list=', dg_keep_list)
 
             fid_out = open(fpath_out, "wb")
             print('working on .kmall file ', fpath_in)
-            ####### DO KMALL STUFF #########
-            km = kmall.kmall(fpath_in)
-            km.verbose = 0
-            km.index_file()
-            km.report_packet_types()
-            # print('km.Index has type', type(km.Index), 'and looks like:')
-            # print(km.Index)
-            km.closeFile()
-
-            # reduce the dataframe to include only MessageTypes in the required datagram list dg_list
-            df = km.Index
-            df = df[df['MessageType'].str.contains('|'.join(dg_keep_list))]
-            print('df after filter = ', df)
-
-            # read in source file
-            fid_in = open(fpath_in, "rb")
-            raw = fid_in.read()
-
-            # loop through the filtered/reduced dataframe of datagrams to keep and write chunks to the new file
-            for i in range(df.shape[0]):
-                dg_info = df.iloc[i]
-                dg_start = dg_info['ByteOffset']
-                dg_end = dg_start + dg_info['MessageSize']
-                # print('*** FILTERED datagram number', i, 'is type=', dg_info['MessageType'],
-                #       'offset=', dg_start, 'len=', dg_info['MessageSize'], 'and dg_end=', dg_end)
-                fid_out.write(raw[dg_start:dg_end])
+
+            # select the datagrams to keep from the datagram index (shared with other tools through the parse cache)
+            toc = parse_cache.kmall_index(fpath_in)
+            toc = toc[np.isin(toc.TYPE, em_io.kmall_type_names(dg_keep_list))]
+            print('datagrams kept = ', len(toc))
+
+            # map source file
+            raw = em_io.map_file(fpath_in)
+
+            # loop through the datagrams to keep and write them to the new file
+            for dg_start, dg_len in zip(toc.OFFSET.tolist(), toc.LENGTH.tolist()):
+                fid_out.write(raw[dg_start:dg_start + dg_len])
 
             # close output file
             fid_out.close()
@@ -19,6 +19,7 @@ except ImportError as e:
     from PyQt5.QtCore import Qt, QSize
 
 import sys
+import multiprocessing
 sys.path.append('C:\\Users\\kjerram\\Documents\\GitHub')  # add path to outer di rectory for pyinstaller
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -895,6 +896,7 @@ class NewPopup(QtWidgets.QWidget): # new class for additional plots
         
         
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # support worker processes for parsing files in frozen (pyinstaller) builds
     app = QtWidgets.QApplication(sys.argv)
 
     main = MainWindow()
@@ -0,0 +1,477 @@
+"""Datagram indexing and file access functions for Kongsberg .all and .kmall files in NOAA / MAC echosounder assessment tools"""
+
+import datetime
+import mmap
+import os
+import struct
+import numpy as np
+
+# table of contents for .all datagrams; OFFSET is the byte offset of the 4-byte length field preceding STX, so each
+# record spans raw[OFFSET:OFFSET+4+LENGTH] in the file and the datagram (STX to CHECKSUM) is raw[OFFSET+4:OFFSET+4+LENGTH]
+ALL_TOC_DTYPE = np.dtype([('OFFSET', '<i8'),  # byte offset of length field
+						  ('LENGTH', '<u4'),  # datagram length from STX to CHECKSUM, inclusive
+						  ('ID', 'u1'),  # datagram ID
+						  ('DATE', '<u4'),  # DATE in YYYYMMDD
+						  ('TIME', '<u4'),  # TIME in ms since midnight
+						  ('PING_COUNTER', '<u2'),  # ping counter (or other counter, depending on datagram type)
+						  ('SYS_SN', '<u2'),  # system serial number
+						  ('VALID', '?')])  # datagram passed framing checks (and checksum, if verified)
+
+ALL_MIN_DG_LEN = 19  # STX, ID, MODEL, DATE, TIME, COUNTER, SYS SN, ETX, CHECKSUM
+SCAN_CHUNK_SIZE = 2**26  # bytes searched for STX at a time; limits the size of temporary arrays for large files
+CHECKSUM_CHUNK_SIZE = 2**22  # bytes summed at a time for checksum verification (cumulative sums are 8 bytes per byte)
+TIME_READ_SIZE = 2**16  # bytes read at the start and end of a file to find the first and last datagram times
+LINE_MAX_GAP_SEC = 2.0  # max time (s) from the last datagram of a file to the first of the next file of a line
+KMALL_HEADER_STRUCT = struct.Struct('<I4sBBHII')  # .kmall header: numBytesDgm, dgmType, dgmVersion, systemID,
+# echoSounderID, time_sec, time_nanosec
+
+# table of contents for .kmall datagrams; each datagram spans raw[OFFSET:OFFSET+LENGTH], with LENGTH (numBytesDgm)
+# repeated in the last 4 bytes of the datagram
+KMALL_TOC_DTYPE = np.dtype([('OFFSET', '<i8'),  # byte offset of header
+							('LENGTH', '<u4'),  # numBytesDgm
+							('TYPE', 'S4'),  # dgmType (e.g., b'#MRZ')
+							('VERSION', 'u1'),  # dgmVersion
+							('SYSTEM_ID', 'u1'),  # systemID
+							('ECHOSOUNDER_ID', '<u2'),  # echoSounderID
+							('TIME_SEC', '<u4'),  # time_sec (UTC)
+							('TIME_NANOSEC', '<u4'),  # time_nanosec
+							('PING_COUNTER', '<u2'),  # pingCnt of multibeam (#M) datagrams, 0 otherwise
+							('RX_FAN_INDEX', 'u1'),  # rxFanIndex of multibeam (#M) datagrams, 0 otherwise
+							('VALID', '?')])  # repeated numBytesDgm matches
+
+KMALL_M_PING_COUNTER_POS = 26  # pingCnt in #M datagrams, after header, partition (4 bytes), and numBytesCmnPart
+KMALL_M_RX_FAN_INDEX_POS = 29  # rxFanIndex in #M datagrams, after pingCnt and rxFansPerPing
+
+# fields identifying the same datagram in files of one line; datagrams repeated at file boundaries (e.g., logged to
+# the end of one file and again at the start of the next) have the same values for all fields
+ALL_DUPLICATE_KEYS = ['ID', 'DATE', 'TIME', 'PING_COUNTER', 'SYS_SN']
+KMALL_DUPLICATE_KEYS = ['TYPE', 'SYSTEM_ID', 'ECHOSOUNDER_ID', 'TIME_SEC', 'TIME_NANOSEC', 'PING_COUNTER',
+						'RX_FAN_INDEX']
+
+
+def map_file(filename):
+	# map a file read-only and return a memoryview of its contents; pages are read lazily by the OS (and shared between
+	# tools working on the same file) and slices of the view are handed to parsers without copying; the mapping is
+	# closed when the view and any slices or arrays referencing it are released
+	with open(filename, 'rb') as fid:
+		if os.fstat(fid.fileno()).st_size == 0:  # empty files cannot be mapped
+			return memoryview(b'')
+
+		return memoryview(mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def read_uint(buf, pos, nbytes):
+	# read little-endian unsigned integers of nbytes at each position in pos from a uint8 array
+	val = np.zeros(len(pos), dtype=np.int64)
+	for b in range(nbytes):
+		val |= buf[pos + b].astype(np.int64) << (8*b)
+
+	return val
+
+
+def read_records(buf, pos, dtype):
+	# read one record of a numpy structured dtype at each position in pos from a uint8 array (e.g., the same block of
+	# fields in many datagrams); records are copied into one array, so fields of all records are decoded at once; the
+	# records are taken from a strided view of buf with one row of itemsize bytes starting at each byte, so only the
+	# records themselves are copied (no index array of every byte)
+	pos = np.asarray(pos, dtype=np.int64)
+	rows = np.lib.stride_tricks.as_strided(buf, shape=(max(buf.size - dtype.itemsize + 1, 0), dtype.itemsize),
+										   strides=(buf.strides[0], buf.strides[0]), writeable=False)
+
+	return rows[pos].view(dtype).ravel()
+
+
+def all_datetime(date, time):
+	# convert arrays of .all DATE (YYYYMMDD) and TIME (ms since midnight) fields to datetime64 (us, for conversion to
+	# datetime objects with tolist(), as in datetime.strptime(str(DATE), '%Y%m%d') + timedelta(milliseconds=TIME))
+	date = np.asarray(date, dtype=np.int64)
+	month = (date // 10000 - 1970).astype('datetime64[Y]').astype('datetime64[M]') + \
+			(date // 100 % 100 - 1).astype('timedelta64[M]')
+	day = month.astype('datetime64[D]') + (date % 100 - 1).astype('timedelta64[D]')
+
+	return day.astype('datetime64[us]') + np.asarray(time, dtype=np.int64).astype('timedelta64[ms]')
+
+
+def find_all_candidates(buf, start=0, stop=None):
+	# find STX positions with a length field pointing to an ETX within the file; returns the start of each length field
+	# and the datagram length; candidates are not necessarily datagram boundaries (STX may occur in any binary field)
+	len_buf = buf.size
+	stop = len_buf if stop is None else min(stop, len_buf)
+	offsets, lengths = [], []
+
+	for chunk_start in range(max(start, 4), stop, SCAN_CHUNK_SIZE):
+		chunk_stop = min(chunk_start + SCAN_CHUNK_SIZE, stop)
+		stx = np.flatnonzero(buf[chunk_start:chunk_stop] == 2) + chunk_start
+		dg_len = read_uint(buf, stx - 4, 4)
+		dg_end = stx + dg_len
+		ok = np.logical_and(dg_len >= ALL_MIN_DG_LEN, dg_end <= len_buf)
+		stx, dg_len, dg_end = stx[ok], dg_len[ok], dg_end[ok]
+		ok = buf[dg_end - 3] == 3  # ETX is the third-last byte of the datagram
+		offsets.append(stx[ok] - 4)
+		lengths.append(dg_len[ok])
+
+	if not offsets:
+		return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+	return np.concatenate(offsets), np.concatenate(lengths)
+
+
+def plausible_candidates(buf, offsets, lengths):
+	# mask of candidates (from find_all_candidates) that are plausible datagrams: the candidate ends at the start of
+	# another candidate or at EOF (as for consecutive datagrams), or its header has a plausible DATE and TIME (e.g., the
+	# last datagram before corrupt data); false STX found in binary fields or corrupt data rarely pass either test, so
+	# the datagram chain resynchronizes after corrupt data at the next real datagram
+	dg_end = offsets + 4 + lengths
+	stx = offsets + 4
+
+	return np.isin(dg_end, offsets) | (dg_end == buf.size) | \
+		   valid_all_time(read_uint(buf, stx + 4, 4), read_uint(buf, stx + 8, 4))
+
+
+def chain_candidates(offsets, lengths, first=0):
+	# follow the datagram chain from candidate index first: each datagram is followed by the first candidate starting at
+	# or after its end (the next datagram, or the next valid framing after any corrupt bytes); the chain is found by
+	# pointer doubling, so the number of array operations grows with log2 of the number of datagrams
+	num_cand = len(offsets)
+	if first >= num_cand:
+		return np.zeros(0, dtype=np.int64)
+
+	jump = np.append(np.searchsorted(offsets, offsets + 4 + lengths, side='left'), num_cand)  # last entry is EOF
+	chain = np.array([first], dtype=np.int64)
+
+	while True:  # chain holds the first 2^k datagrams in order; jump maps each candidate 2^k datagrams ahead
+		chain_next = jump[chain]
+		chain_next = chain_next[chain_next < num_cand]
+
+		if chain_next.size == 0:
+			break
+
+		chain = np.concatenate((chain, chain_next))
+		jump = jump[jump]
+
+	return chain
+
+
+def verify_checksums(buf, offsets, lengths):
+	# return a mask of datagrams (offsets and lengths as in ALL_TOC_DTYPE) in a uint8 array with a valid checksum, i.e.,
+	# the 16-bit sum of bytes between STX and ETX (exclusive) equals the checksum stored after ETX; the sums of all
+	# datagrams are taken as differences of a cumulative sum over the file, computed over one chunk of datagrams at a time
+	offsets, lengths = np.asarray(offsets, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+	sum_start = offsets + 5  # byte after STX
+	sum_end = offsets + 4 + lengths - 3  # ETX
+	checksum = read_uint(buf, sum_end + 1, 2)
+	ok = np.zeros(len(offsets), dtype=bool)
+	i = 0
+
+	while i < len(offsets):
+		j = max(i + 1, np.searchsorted(sum_start, sum_start[i] + CHECKSUM_CHUNK_SIZE, side='left'))
+		chunk_start = sum_start[i]
+		cumsum = np.concatenate(([0], np.cumsum(buf[chunk_start:sum_end[j - 1]], dtype=np.int64)))
+		dg_sum = cumsum[sum_end[i:j] - chunk_start] - cumsum[sum_start[i:j] - chunk_start]
+		ok[i:j] = (dg_sum & 0xFFFF) == checksum[i:j]
+		i = j
+
+	return ok
+
+
+def index_all(raw, verify_checksum=False):
+	# scan raw bytes of a .all file (bytes, memoryview, or mmap) once and return a record array (ALL_TOC_DTYPE) of all
+	# datagrams found by following the length fields from the start of the file, as in the original parsing loops;
+	# if verify_checksum, VALID is False for datagrams with a checksum that does not match the bytes between STX and ETX;
+	# corrupt or truncated data between datagrams are skipped (see plausible_candidates and skipped_ranges)
+	buf = np.frombuffer(raw, dtype=np.uint8)
+	offsets, lengths = find_all_candidates(buf)
+	ok = plausible_candidates(buf, offsets, lengths)
+	offsets, lengths = offsets[ok], lengths[ok]
+	idx = chain_candidates(offsets, lengths)
+	offsets, lengths = offsets[idx], lengths[idx]
+	stx = offsets + 4
+
+	toc = np.zeros(len(idx), dtype=ALL_TOC_DTYPE)
+	toc['OFFSET'] = offsets
+	toc['LENGTH'] = lengths
+	toc['ID'] = buf[stx + 1]
+	toc['DATE'] = read_uint(buf, stx + 4, 4)
+	toc['TIME'] = read_uint(buf, stx + 8, 4)
+	toc['PING_COUNTER'] = read_uint(buf, stx + 12, 2)
+	toc['SYS_SN'] = read_uint(buf, stx + 14, 2)
+	toc['VALID'] = verify_checksums(buf, offsets, lengths) if verify_checksum else True
+
+	return toc.view(np.recarray)
+
+
+def skipped_ranges(toc, file_size):
+	# return an array of [start, stop) byte ranges of a file that are not part of any valid datagram in toc (e.g., corrupt
+	# data skipped by index_all, datagrams with invalid checksums, or a truncated datagram at the end of the file)
+	toc = toc[toc.VALID]
+	gap_start = np.concatenate(([0], toc.OFFSET + 4 + toc.LENGTH)).astype(np.int64)
+	gap_stop = np.concatenate((toc.OFFSET, [file_size])).astype(np.int64)
+	gap = gap_stop > gap_start
+
+	return np.column_stack((gap_start[gap], gap_stop[gap]))
+
+
+def iter_datagrams(path, ids=None, start=None, stop=None, verify_checksum=False, skipped=None):
+	# yield (offset, dg_id, dg) for datagrams in a .all file, in file order, where offset is the byte offset of the
+	# length field and dg is a memoryview of the datagram (STX to CHECKSUM) in the mapped file (not a copy); the file is
+	# indexed once with index_all and pages are read by the OS only as datagrams are accessed, so memory use does not
+	# grow with file size; datagrams not in ids (list of datagram IDs, default all) or with offsets outside [start, stop)
+	# are skipped using the table of contents alone, without reading or decoding them; if verify_checksum, datagrams
+	# with invalid checksums are skipped; if skipped is a list, the byte ranges not part of any valid datagram (see
+	# skipped_ranges) are added to it as (start, stop) tuples before the first datagram is yielded
+	raw = map_file(path)
+	toc = index_all(raw, verify_checksum=verify_checksum)
+	keep = toc.VALID.copy()
+
+	if skipped is not None:
+		skipped.extend(map(tuple, skipped_ranges(toc, len(raw)).tolist()))
+
+	if ids is not None:
+		keep &= np.isin(toc.ID, ids)
+
+	if start is not None:
+		keep &= toc.OFFSET >= start
+
+	if stop is not None:
+		keep &= toc.OFFSET < stop
+
+	toc = toc[keep]
+
+	for offset, dg_len, dg_id in zip(toc.OFFSET.tolist(), toc.LENGTH.tolist(), toc.ID.tolist()):
+		yield offset, dg_id, raw[offset + 4:offset + 4 + dg_len]
+
+
+def iter_param_datagrams(path, param_ids=(73, 82, 105), ping_id=88, verify_checksum=False, skipped=None):
+	# yield (offset, dg_id, dg) as in iter_datagrams for the runtime and installation parameter datagrams in a .all file
+	# and the first ping datagram (e.g., XYZ 88) after each, for ping info at each parameter update; all other datagrams
+	# are skipped using the table of contents alone, so only the pages holding these datagrams are read from the file;
+	# if verify_checksum, datagrams with invalid checksums are skipped; skipped is as in iter_datagrams
+	raw = map_file(path)
+	toc = index_all(raw, verify_checksum=verify_checksum)
+
+	if skipped is not None:
+		skipped.extend(map(tuple, skipped_ranges(toc, len(raw)).tolist()))
+
+	toc = toc[toc.VALID]
+	keep = np.isin(toc.ID, param_ids)
+	idx_ping = np.flatnonzero(toc.ID == ping_id)
+	idx_next_ping = np.searchsorted(idx_ping, np.flatnonzero(keep))  # first ping dg after each param dg
+	keep[idx_ping[idx_next_ping[idx_next_ping < idx_ping.size]]] = True
+	toc = toc[keep]
+
+	for offset, dg_len, dg_id in zip(toc.OFFSET.tolist(), toc.LENGTH.tolist(), toc.ID.tolist()):
+		yield offset, dg_id, raw[offset + 4:offset + 4 + dg_len]
+
+
+def kmall_type_names(names):
+	# return the dgmType values (as stored in TYPE of the table of contents, e.g., b'#MRZ') of .kmall datagram type
+	# names given as 'MRZ', '#MRZ', or b'#MRZ'
+	names = [n if isinstance(n, bytes) else n.encode('ascii') for n in names]
+
+	return [n if n.startswith(b'#') else b'#' + n for n in names]
+
+
+def index_kmall(raw):
+	# return a record array (KMALL_TOC_DTYPE) of all datagrams in raw bytes of a .kmall file (bytes, memoryview, or
+	# mmap) found by following numBytesDgm from the start of the file; only the 20-byte headers (and ping counters of
+	# multibeam datagrams) are read; the index stops at the first header that is not consistent (e.g., truncated file)
+	# datagram types are stored as the raw dgmType (see kmall_type_names) for selection with np.isin or comparison
+	len_raw = len(raw)
+	offsets = []
+	pos = 0
+
+	while pos + KMALL_HEADER_STRUCT.size + 4 <= len_raw:
+		num_bytes = int.from_bytes(raw[pos:pos + 4], 'little')
+		if num_bytes < KMALL_HEADER_STRUCT.size + 4 or pos + num_bytes > len_raw or raw[pos + 4] != ord('#'):
+			break
+
+		offsets.append(pos)
+		pos += num_bytes
+
+	buf = np.frombuffer(raw, dtype=np.uint8)
+	offsets = np.asarray(offsets, dtype=np.int64)
+	lengths = read_uint(buf, offsets, 4)
+
+	toc = np.zeros(len(offsets), dtype=KMALL_TOC_DTYPE)
+	toc['OFFSET'] = offsets
+	toc['LENGTH'] = lengths
+	toc['TYPE'] = buf[offsets[:, None] + np.arange(4, 8)].view('S4').ravel()
+	toc['VERSION'] = buf[offsets + 8]
+	toc['SYSTEM_ID'] = buf[offsets + 9]
+	toc['ECHOSOUNDER_ID'] = read_uint(buf, offsets + 10, 2)
+	toc['TIME_SEC'] = read_uint(buf, offsets + 12, 4)
+	toc['TIME_NANOSEC'] = read_uint(buf, offsets + 16, 4)
+	toc['VALID'] = read_uint(buf, offsets + lengths - 4, 4) == lengths
+
+	is_m = np.isin(toc['TYPE'], kmall_type_names(['MRZ', 'MWC'])) & (lengths >= KMALL_M_RX_FAN_INDEX_POS + 5)
+	toc['PING_COUNTER'][is_m] = read_uint(buf, offsets[is_m] + KMALL_M_PING_COUNTER_POS, 2)
+	toc['RX_FAN_INDEX'][is_m] = buf[offsets[is_m] + KMALL_M_RX_FAN_INDEX_POS]
+
+	return toc.view(np.recarray)
+
+
+class VirtualLine:
+	# ordered list of .all or .kmall files of one line presented as one continuous datagram stream, without writing
+	# the concatenated data to disk (as in file_trimmer cat_files); each file is indexed and mapped separately and
+	# datagrams are sliced from the mapped files as accessed; datagrams repeated at the boundaries between files (same
+	# values of all fields in ALL_DUPLICATE_KEYS or KMALL_DUPLICATE_KEYS as a datagram in an earlier file) are skipped;
+	# offsets are 'virtual' offsets in the stream as if the files had been concatenated, so byte counts between
+	# datagrams (e.g., data rate between pings) are continuous across file boundaries
+	def __init__(self, filenames, verify_checksum=False):
+		self.filenames = list(filenames)
+		ext = {os.path.splitext(f)[1].lower() for f in self.filenames}
+
+		if len(ext) != 1 or not ext <= {'.all', '.kmall'}:
+			raise ValueError('VirtualLine requires .all or .kmall files with the same extension; got ' + str(ext))
+
+		self.ftype = ext.pop()
+		self.raw = [map_file(f) for f in self.filenames]
+		self.file_start = np.cumsum([0] + [len(raw) for raw in self.raw])  # virtual offset of each file (and end)
+
+		if self.ftype == '.all':
+			tocs = [index_all(raw, verify_checksum=verify_checksum) for raw in self.raw]
+			keys = ALL_DUPLICATE_KEYS
+			self.hdr_len = 4  # length field before STX
+
+		else:
+			tocs = [index_kmall(raw) for raw in self.raw]
+			keys = KMALL_DUPLICATE_KEYS
+			self.hdr_len = 0  # numBytesDgm is part of the datagram
+
+		toc = np.concatenate([t.view(np.ndarray) for t in tocs])
+		file_idx = np.repeat(np.arange(len(tocs)), [len(t) for t in tocs])
+		toc, file_idx = toc[toc['VALID']], file_idx[toc['VALID']]
+
+		# keep only datagrams with keys first found in the same file, so repeats within a file (e.g., datagrams from
+		# different heads or RX fans with the same header fields) are kept, while repeats of earlier files are dropped
+		_, key_idx = np.unique(toc[keys], return_inverse=True)
+		key_idx = key_idx.ravel()
+		first_file = np.full(key_idx.max() + 1 if key_idx.size else 0, len(tocs))
+		np.minimum.at(first_file, key_idx, file_idx)
+		keep = file_idx == first_file[key_idx]
+
+		self.num_duplicates = int(np.count_nonzero(~keep))
+		self.file_idx = file_idx[keep]
+		self.toc = toc[keep].view(np.recarray)
+		self.offsets = self.file_start[self.file_idx] + self.toc.OFFSET  # virtual offsets
+
+	def __len__(self):
+		return len(self.toc)
+
+	@property
+	def ids(self):
+		# datagram ID (.all) or dgmType (.kmall, see kmall_type_names) of each datagram in the stream
+		return self.toc.ID if self.ftype == '.all' else self.toc.TYPE
+
+	def datagram(self, i):
+		# memoryview of datagram i in the stream (STX to CHECKSUM for .all, header to repeated length for .kmall)
+		offset, dg_len = int(self.toc.OFFSET[i]) + self.hdr_len, int(self.toc.LENGTH[i])
+
+		return self.raw[self.file_idx[i]][offset:offset + dg_len]
+
+	def file_offset(self, offsets):
+		# return (file index, offset in that file) for virtual offsets in the stream
+		file_idx = np.searchsorted(self.file_start, offsets, side='right') - 1
+
+		return file_idx, np.asarray(offsets) - self.file_start[file_idx]
+
+	def iter_datagrams(self, ids=None):
+		# yield (offset, dg_id, dg) as in iter_datagrams, in stream order, where offset is the virtual offset of the
+		# datagram; datagrams not in ids (.all datagram IDs or .kmall type codes, default all) are skipped using the
+		# table of contents alone
+		idx = np.arange(len(self.toc)) if ids is None else np.flatnonzero(np.isin(self.ids, ids))
+
+		for i, offset, dg_id in zip(idx.tolist(), self.offsets[idx].tolist(), self.ids[idx].tolist()):
+			yield offset, dg_id, self.datagram(i)
+
+
+def valid_all_time(date, time):
+	# mask of plausible .all DATE (YYYYMMDD) and TIME (ms since midnight) fields, for rejecting false STX candidates
+	date = np.asarray(date, dtype=np.int64)
+	return (date // 10000 >= 1970) & (date // 10000 <= 2200) & (date // 100 % 100 >= 1) & (date // 100 % 100 <= 12) & \
+		   (date % 100 >= 1) & (date % 100 <= 31) & (np.asarray(time) < 86400000)
+
+
+def all_time_range(filename, read_size=TIME_READ_SIZE):
+	# return the times (datetime) of the first and last datagrams in a .all file from the header of the first datagram
+	# and of the last complete datagram found by searching back from the end of the file, reading only read_size bytes
+	# at each end (doubled until a datagram is found); returns None if no datagram is found (e.g., not a .all file)
+	fsize = os.path.getsize(filename)
+	times = []
+
+	with open(filename, 'rb') as fid:
+		for from_end in [False, True]:
+			size = read_size
+			while True:
+				start = max(0, fsize - size) if from_end else 0
+				fid.seek(start)
+				buf = np.frombuffer(fid.read(min(size, fsize)), dtype=np.uint8)
+				offsets, lengths = find_all_candidates(buf)
+				stx = offsets + 4
+				date, time = read_uint(buf, stx + 4, 4), read_uint(buf, stx + 8, 4)
+				ok = valid_all_time(date, time)
+				offsets, lengths, date, time = offsets[ok], lengths[ok], date[ok], time[ok]
+
+				if offsets.size > 0:
+					if from_end:  # last datagram is the first candidate ending at EOF (or at the last candidate end)
+						dg_end = offsets + 4 + lengths
+						idx = np.flatnonzero(dg_end == dg_end.max())[0]
+
+					else:  # first datagram starts at byte 0 unless the file begins with corrupt data
+						idx = 0
+
+					times.append(all_datetime(date[idx:idx + 1], time[idx:idx + 1])[0].item())
+					break
+
+				if size >= fsize:  # entire file searched without finding a datagram
+					return None
+
+				size *= 2
+
+	return times[0], times[1]
+
+
+def kmall_time_range(filename):
+	# return the times (datetime, UTC) of the first and last datagrams in a .kmall file from their 20-byte headers; the
+	# last datagram is found from its length, which is repeated in the last 4 bytes of each datagram; returns None if
+	# the headers are not consistent (e.g., file is truncated)
+	fsize = os.path.getsize(filename)
+	headers = []
+
+	with open(filename, 'rb') as fid:
+		if fsize < KMALL_HEADER_STRUCT.size + 4:
+			return None
+
+		headers.append(KMALL_HEADER_STRUCT.unpack(fid.read(KMALL_HEADER_STRUCT.size)))
+		fid.seek(fsize - 4)
+		num_bytes_last = struct.unpack('<I', fid.read(4))[0]
+
+		if num_bytes_last < KMALL_HEADER_STRUCT.size + 4 or num_bytes_last > fsize:
+			return None
+
+		fid.seek(fsize - num_bytes_last)
+		headers.append(KMALL_HEADER_STRUCT.unpack(fid.read(KMALL_HEADER_STRUCT.size)))
+
+	if any(hdr[0] < KMALL_HEADER_STRUCT.size + 4 or hdr[1][:1] != b'#' for hdr in headers) or \
+			headers[1][0] != num_bytes_last:
+		return None
+
+	return tuple(datetime.datetime.utcfromtimestamp(hdr[5] + hdr[6]/1.0E9) for hdr in headers)
+
+
+def line_neighbors(fnames, max_gap=LINE_MAX_GAP_SEC):
+	# return a dict of the files of the same line adjacent to each .all file in fnames (previous file, the file, and next
+	# file, in time order) for reading across file boundaries with VirtualLine; a file continues the previous file if
+	# its first datagram is within max_gap seconds of the last datagram of the previous file (e.g., a line split by the
+	# logging software), so files separated by gaps (e.g., crosslines with turn files omitted) are returned alone
+	ranges = {f: all_time_range(f) for f in fnames if os.path.splitext(f)[1].lower() == '.all'}
+	fnames_sorted = sorted([f for f, r in ranges.items() if r is not None], key=lambda f: ranges[f][0])
+	neighbors = {f: [f] for f in ranges}
+
+	for f_prev, f_next in zip(fnames_sorted[:-1], fnames_sorted[1:]):
+		gap = (ranges[f_next][0] - ranges[f_prev][1]).total_seconds()
+		if gap <= max_gap:  # continuous (or overlapping) files
+			neighbors[f_prev] = neighbors[f_prev] + [f_next]
+			neighbors[f_next] = [f_prev] + neighbors[f_next]
+
+	return neighbors
\ No newline at end of file
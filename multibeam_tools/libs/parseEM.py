@@ -1,12 +1,297 @@
 # Define parsers for Kongsberg .all datagrams
 
 # These functions parse datagrams but do not correct for formatting of fields,
-# such as dividing by 100 for heading which is recorded in 0.01 deg as an integer 
+# such as dividing by 100 for heading which is recorded in 0.01 deg as an integer
 # Refer to Kongsberg documentation for descriptions
 
-# These work for now but should be updated with more intelligent parsing methods!
+# Datagram layouts are declared in DG_SCHEMA below; header and trailer formats are compiled to struct.Struct objects
+# and repeating blocks (cycles) to numpy dtypes at import, so most parsers are one generic decode_dg call; a new
+# datagram type needs only a schema entry (and a wrapper function for consistency with existing calls)
 
+import functools
 import struct
+import numpy as np
+from multibeam_tools.libs import em_io
+
+#%% DATAGRAM SCHEMA ##################################################################################
+DTYPE_CODES = {'B': 'u1', 'b': 'i1', 'H': '<u2', 'h': '<i2', 'I': '<u4', 'i': '<i4', 'f': '<f4'}  # struct to numpy
+DG_BASE_STRUCT = struct.Struct('<BBHIIHH')  # STX, ID, MODEL, DATE, TIME, COUNTER, SYS SN common to all datagrams
+DG_END_STRUCT = struct.Struct('<BH')  # ETX, CHECKSUM at the end of all datagrams
+
+
+def dg_header(counter_key):
+	# common header fields (STX through SYS SN) for all datagrams; the counter name depends on the datagram type
+	return [('STX', 'B'),  # STX 1U
+			('ID', 'B'),  # ID 1U
+			('MODEL', 'H'),  # EM MODEL 2U
+			('DATE', 'I'),  # DATE in YYYYMMDD 4U
+			('TIME', 'I'),  # TIME in ms since midnight 4U
+			(counter_key, 'H'),  # COUNTER 2U
+			('SYS_SN', 'H')]  # SYS SN 2U
+
+
+# each entry has header fields (key, struct format; key None for skipped bytes) starting at STX, repeating blocks
+# ('cycles') of (count key, entry fields) following the header, where the number of entries is the sum of the count
+# field parsed earlier, and trailer fields following the last cycle; ETX and CHECKSUM are read from the end of each dg
+DG_SCHEMA = {
+	49: {'name': 'PU',  # PU status
+		 'header': dg_header('STATUS_COUNTER') +
+				   [('PING_RATE', 'H'),  # PING RATE 2U (centiHz)
+					('PING_COUNTER', 'H'),  # PING COUNTER 2U
+					('PU_LOAD', 'I'),  # PU LOAD in % 4U
+					('UDP_PORT_2', 'I'),  # UDP PORT 2 4U
+					('SERIAL_PORT_1', 'I'),  # SERIAL PORT 1 4U
+					('SERIAL_PORT_2', 'I'),  # SERIAL PORT 2 4U
+					('SERIAL_PORT_3', 'I'),  # SERIAL PORT 3 4U
+					('SERIAL_PORT_4', 'I'),  # SERIAL PORT 4 4U
+					('PPS', 'b'),  # PPS (positive num is OK, neg not OK) 1S
+					('POS_STAT', 'b'),  # POS STAT (positive num is OK, neg not OK) 1S
+					('ATT_STAT', 'b'),  # ATT STAT (positive num is OK, neg not OK) 1S
+					('CLOCK_STAT', 'b'),  # CLOCK STAT (positive num is OK, neg not OK) 1S
+					('HEAD_STAT', 'b'),  # HEAD STAT (positive num is OK, neg not OK) 1S
+					('PU_STAT', 'B'),  # PU STAT see KM doc note 11 1U
+					('HEADING', 'H'),  # last received HEADING in 0.01 deg 2U
+					('ROLL', 'h'),  # last received ROLL in 0.01 deg 2S
+					('PITCH', 'h'),  # last received PITCH in 0.01 deg 2S
+					('HEAVE', 'h'),  # last receieved HEAVE at sonar head in cm 2S
+					('SS_TRANS', 'H'),  # SS TRANS in 0.1 m/s 2U
+					('DEPTH', 'I'),  # last received depth of motion sensor in cm 4U
+					('ALONG_VEL', 'h'),  # ALONG VEL in 0.01 m/s 2S
+					('ATT_VEL_STAT', 'B'),  # ATT VEL STAT see KM note 11 1U
+					('MAMMAL_RAMP', 'B'),  # MAMMAL RAMP high voltage ramp up time in s 1U
+					('BS_OBLIQUE', 'b'),  # BS OBLIQUE see KM note 7 1S
+					('BS_NORMAL', 'b'),  # BS NORMAL see KM note 7 1S
+					('FIXED_GAIN', 'b'),  # FIXED GAIN see KM note 7 1S
+					('DEPTH_NORMAL', 'B'),  # DEPTH NORMAL in m (spare for EM3000, EM2000) 1U
+					('RANGE_NORMAL', 'H'),  # RANGE NORMAL in m (not incl before Jan 2004) 2U
+					('PORT_COVERAGE', 'B'),  # PORT COVERAGE in deg 1U
+					('STBD_COVERAGE', 'B'),  # STBD COVERAGE in deg 1U
+					('SS_TRANS_PROF', 'H'),  # SS at transducer depth in profile, 0.1 m/s 2U
+					('YAW_STAB', 'h'),  # YAW STAB in 0.1 deg 2S
+					('VEL_ACROSS', 'h'),  # ACROSS VEL in 0.01 m/s (EM3002 PORT COV. ) 2S
+					('VEL_DOWN', 'h'),  # DOWNWARD VEL in 0.01 m/s (EM3002 STBR COV.) 2S
+					('SPARE', 'B')],  # SPARE 1U
+		 'cycles': [],
+		 'trailer': []},
+
+	65: {'name': 'ATT',  # attitude
+		 'header': dg_header('ATT_COUNTER') +
+				   [('NUM_ENTRIES', 'H')],  # NUM ENTRIES 2U
+		 'cycles': [('NUM_ENTRIES', [('TIME', 'H'),  # 2U ms since record start (replaces header TIME, as before)
+									 ('STATUS', 'H'),  # 2U status see KM doc note
+									 ('ROLL', 'h'),  # 2S roll in 0.01 deg
+									 ('PITCH', 'h'),  # 2S pitch in 0.01 deg
+									 ('HEAVE', 'h'),  # 2S heave in cm
+									 ('HDG', 'H')])],  # 2U heading in 0.01 deg
+		 'trailer': [('SENSOR_DESC', 'B')]},  # 1U sensor system descriptor
+
+	67: {'name': 'CLOCK',  # clock
+		 'header': dg_header('CLOCK_COUNTER') +
+				   [('DATE_EXTERNAL', 'I'),  # DATE EXTERNAL in YYYYMMDD 4U
+					('TIME_EXTERNAL', 'I'),  # TIME EXTERNAL in ms since midnight 4U
+					('PPS', 'B')],  # PPS activated (1 = active) 1U
+		 'cycles': [],
+		 'trailer': []},
+
+	73: {'name': 'IP_start',  # installation parameters (start); ASCII parameters are parsed in IP_dg
+		 'header': dg_header('LINE_NUM') +
+				   [('HEAD_2_SN', 'H')],  # HEAD 2 SN 2U
+		 'cycles': [],
+		 'trailer': []},
+
+	78: {'name': 'RRA_78',  # raw range and angle 78
+		 'header': dg_header('PING_COUNTER') +
+				   [('SS_SURFACE', 'H'),  # SURFACE SOUND SPEED in 0.1 m/s
+					('NUM_TX_SECTORS', 'H'),  # NUM TX SECTORS 2U - (Ntx)
+					('NUM_RX_BEAMS', 'H'),  # NUM RX BEAMS 2U - (N)
+					('NUM_VALID_DET', 'H'),  # NUM VALID DETECTIONS 2U
+					('SAMPLING_FREQ', 'f'),  # SAMPLING FREQ IN Hz 4F
+					('DSCALE', 'I')],  # DSCALE Doppler correction see note 5, 4U
+		 'cycles': [('NUM_TX_SECTORS', [('TX_TILT', 'h'),  # 2S tilt re TX array in 0.01 deg
+										('TX_FOCUS_RANGE', 'H'),  # 2U focus range in 0.1 m
+										('TX_SIG_LEN', 'f'),  # 4F signal length in s
+										('TX_SEC_DELAY', 'f'),  # 4F sector delay in s
+										('TX_CENTER_FREQ', 'f'),  # 4F center frequency in Hz
+										('TX_ABS_COEFF', 'H'),  # 2U mean abs coeff in 0.01 dB/km
+										('TX_WAVEFORM_ID', 'B'),  # 1U signal waveform ID
+										('TX_SEC_NUM', 'B'),  # 1U sector number
+										('TX_BANDWIDTH', 'f')]),  # 4F sector bandwidth in Hz
+					('NUM_RX_BEAMS', [('RX_ANGLE', 'h'),  # 2S RX beam pointing angle re RX array in 0.01 deg
+									  ('RX_TX_SEC_NUM', 'B'),  # 1U TX sector number associated with RX beam
+									  ('RX_DET_INFO', 'B'),  # 1U RX detection info see KM doc note 3
+									  ('RX_DET_WINDOW', 'H'),  # 2U RX detection window length in samples
+									  ('RX_QUAL_FAC', 'B'),  # 1U RX quality factor see KM doc note 2
+									  ('RX_D_CORR', 'b'),  # 1S RX Doppler correction see KM doc note 5
+									  ('RX_TWTT', 'f'),  # 4F RX two-way travel time in s see KM doc note 5
+									  ('RX_BS', 'h'),  # 2S RX reflectivity in 0.1 dB
+									  ('RX_CLEAN_INFO', 'b'),  # 1S RX realtime cleaning info see KM doc note 4
+									  ('RX_SPARE', 'B')])],  # 1U spare
+		 'trailer': [('SPARE', 'B')]},  # SPARE 1U
+
+	80: {'name': 'POS',  # position; input string is parsed in POS_dg
+		 'header': dg_header('COUNT') +
+				   [('LAT', 'i'),  # LAT 4S
+					('LON', 'i'),  # LON 4S
+					('FIX_QUAL', 'H'),  # FIX QUALITY 2U
+					('SOG', 'H'),  # SOG 2U
+					('COG', 'H'),  # COG 2U
+					(None, '2x'),  # skipped
+					('HEADING', 'H'),  # HEADING 2U
+					('SYS_DESC', 'B'),  # POS SYS DESC 1U
+					('INPUT_LEN', 'B')],  # BYTES INPUT 1U
+		 'cycles': [],
+		 'trailer': []},
+
+	82: {'name': 'RTP',  # runtime parameters
+		 'header': dg_header('PING_COUNTER') +
+				   [('OPR_STN_STATUS', 'B'),  # OPR_STN_STATUS 1U
+					('CPU_STATUS', 'B'),  # CPU STATUS 1U
+					('BSP_STATUS', 'B'),  # BSP STATUS 1U
+					('SON_HD_STATUS', 'B'),  # SON HD STATUS 1U
+					('MODE', 'B'),  # MODE 1U
+					('FILTER_ID', 'B'),  # FILTER ID 1U
+					('MIN_DEPTH', 'H'),  # MIN DEPTH 2U
+					('MAX_DEPTH', 'H'),  # MAX DEPTH 2U
+					('ABS_COEFF', 'H'),  # ABS COEFF 2U
+					('TX_PULSE_LEN', 'H'),  # TX PULSE LEN 2U
+					('TX_BEAMWIDTH', 'H'),  # TX BEAMWIDTH 2U
+					('TX_POWER', 'b'),  # TX POWER 1S
+					('RX_BEAMWIDTH', 'B'),  # RX BEAMWIDTH 1U
+					('RX_BANDWIDTH', 'B'),  # RX BANDWIDTH 1U
+					('RX_FIXED_GAIN', 'B'),  # RX FIXED GAIN 1U
+					('TVG_LAW_ANGLE', 'B'),  # TVG LAW ANGLE 1U
+					('SS_SOURCE', 'B'),  # SS SOURCE 1U
+					('MAX_PORT_SWATH', 'H'),  # MAX PORT SWATH 2U
+					('BEAM_SPACING', 'B'),  # BEAM SPACING 1U
+					('MAX_PORT_COV', 'B'),  # MAX PORT COV 1U
+					('Y_P_STAB_MODE', 'B'),  # Y P STAB MODE 1U
+					('MAX_STBD_COV', 'B'),  # MAX STBR COV 1U
+					('MAX_STBD_SWATH', 'H'),  # MAX STBR SWATH 2U
+					('TX_ALONG_TILT', 'h'),  # TX ALONG TILT 2S
+					('FILTER_ID_2', 'B')],  # FILTER ID 2
+		 'cycles': [],
+		 'trailer': []},
+
+	85: {'name': 'SSP',  # sound speed profile
+		 'header': dg_header('PROF_COUNTER') +
+				   [('PROFILE_DATE', 'I'),  # PROFILE DATE 4U
+					('PROFILE_TIME', 'I'),  # PROFILE TIME 4U
+					('NUM_ENTRIES', 'H'),  # NUM ENTRIES 2U
+					('DEPTH_RES', 'H')],  # DEPTH RES 2U
+		 'cycles': [('NUM_ENTRIES', [('DEPTH', 'I'),  # 4U
+									 ('SOUND_SPEED', 'I')])],  # 4U
+		 'trailer': []},
+
+	88: {'name': 'XYZ',  # XYZ 88; used for EM2040, EM710, EM122, EM302, ME70
+		 'header': dg_header('PING_COUNTER') +
+				   [('HEADING', 'H'),  # HEADING AT TX TIME 2U
+					('SS_SURFACE', 'H'),  # 2U SURFACE SOUND SPEED IN 0.1 m/s
+					('TX_TRANS_Z', 'f'),  # 4F TRANSMITTER DEPTH AT TX IN m
+					('NUM_RX_BEAMS', 'H'),  # 2U NUMBER OF RX BEAMS IN DATAGRAM
+					('NUM_DETECT', 'H'),  # 2U NUMBER OF VALID DETECTIONS
+					('F_SAMPLE', 'f'),  # 4F SAMPLING FREQUENCY IN Hz
+					('EM2040_SCAN', 'B'),  # 1U SCANNING INFO (EM2040 ONLY)
+					('SPARE2', 'B'),  # 3U SPARE AFTER EM2040 SCANNING BYTE (first byte stored)
+					(None, '2x')],
+		 'cycles': [('NUM_RX_BEAMS', [('RX_DEPTH', 'f'),  # 4F DEPTH IN m
+									  ('RX_ACROSS', 'f'),  # 4F ACROSSTRACK DISTANCE IN m
+									  ('RX_ALONG', 'f'),  # 4F ALONGTRACK DISTANCE IN m
+									  ('RX_DET_WIN', 'H'),  # 2U DETECTION WINDOW IN SAMPLES
+									  ('RX_QUAL_FAC', 'B'),  # 1U QUALITY FACTOR SEE KM NOTE 3
+									  ('RX_IBA', 'b'),  # 1S INCID. ANGLE ADJ. IN 0.1 DEG
+									  ('RX_DET_INFO', 'B'),  # 1U SEE KM DOC NOTE 4
+									  ('RX_CLEAN', 'b'),  # 1S REALTIME CLEANING INFO
+									  ('RX_BS', 'h')])],  # 2S REFLECTIVITY IN 0.1 dB
+		 'trailer': [('SPARE', 'B')]},  # 1U
+
+	89: {'name': 'SBI',  # seabed image 89
+		 'header': dg_header('PING_COUNTER') +
+				   [('SAMPLING_FREQ', 'f'),  # SAMPLING FREQ IN Hz 4F
+					('RANGE_TO_NORMAL', 'H'),  # RANGE TO NORMAL INCIDENCE IN NUM SAMPLES 2U
+					('BSN', 'h'),  # 2S BS at normal incidence in 0.1 dB
+					('BSO', 'h'),  # 2S BS at oblique incidence in 0.1 dB
+					('TX_BEAMWIDTH', 'H'),  # 2U TX BEAMWIDTH ALONG IN 0.1 DEG
+					('TVG_CROSSOVER', 'H'),  # 2U TVG LAW CROSSOVER ANGLE IN 0.1 DEG
+					('NUM_VALID_BEAMS', 'H')],  # 2U NUM VALID BEAMS
+		 'cycles': [('NUM_VALID_BEAMS', [('SORT_DIR', 'b'),  # 1S sorting direction
+										 ('DET_INFO', 'B'),  # 1U detection info
+										 ('NUM_SAMPLES', 'H'),  # 2U number of samples / beam
+										 ('CENTER_SAMPLE_NUM', 'H')]),  # 2U center sample num
+					('NUM_SAMPLES', [('AMPLITUDE', 'h')])],  # 2S sample amplitude (total samples for all beams)
+		 'trailer': [('SPARE', 'B')]},  # SPARE 1U
+}
+
+DG_SCHEMA[105] = dict(DG_SCHEMA[73], name='IP_stop')  # installation parameters (stop) share the IP_start layout
+
+
+def fields_struct(fields):
+	# compile a list of (key, struct format) fields to a struct.Struct (little endian, no alignment) and list of keys
+	return struct.Struct('<' + ''.join(fmt for key, fmt in fields)), [key for key, fmt in fields if key is not None]
+
+
+def fields_dtype(fields):
+	# compile a list of (key, struct format) fields to an equivalent numpy dtype; skipped bytes are left as padding
+	names, formats, offsets, itemsize = [], [], [], 0
+	for key, fmt in fields:
+		if key is not None:
+			names.append(key)
+			formats.append(DTYPE_CODES[fmt])
+			offsets.append(itemsize)
+
+		itemsize = itemsize + struct.calcsize('<' + fmt)
+
+	return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': itemsize})
+
+
+for dg_ID, schema in DG_SCHEMA.items():  # precompile decoders for each datagram type
+	schema['header_struct'], schema['header_keys'] = fields_struct(schema['header'])
+	schema['header_dtype'] = fields_dtype(schema['header'])
+	schema['cycle_dtypes'] = [(count_key, fields_dtype(fields)) for count_key, fields in schema['cycles']]
+	schema['trailer_struct'], schema['trailer_keys'] = fields_struct(schema['trailer'])
+
+
+#%% GENERIC DECODING ################################################################################
+def unpack_columns(rec):
+	# return a dict of arrays for each field of a structured array of repeated datagram entries; float fields are widened
+	# to float64 (same values as struct.unpack) and int fields keep their width; arrays are copies, so they do not hold
+	# references to the datagram buffer (e.g., a memory-mapped file)
+	return {k: rec[k].astype(np.float64 if rec.dtype[k].kind == 'f' else rec.dtype[k].newbyteorder('='))
+			for k in rec.dtype.names}
+
+
+def decode_header(dg, schema):
+	# decode header fields of one datagram (bytes or memoryview starting at STX)
+	return dict(zip(schema['header_keys'], schema['header_struct'].unpack_from(dg, 0)))
+
+
+def decode_end(dg, DG, schema, entry_start):
+	# decode trailer fields starting at entry_start (end of last cycle) and ETX and CHECKSUM at the end of the datagram
+	DG.update(zip(schema['trailer_keys'], schema['trailer_struct'].unpack_from(dg, entry_start)))
+	DG['ETX'], DG['CHECKSUM'] = DG_END_STRUCT.unpack_from(dg, len(dg) - 3)
+
+	return DG
+
+
+def decode_dg(dg, dg_ID):
+	# decode one datagram (bytes or memoryview starting at STX) using the schema for dg_ID; header and trailer fields are
+	# stored as values and each field of the repeating blocks is stored as an array
+	schema = DG_SCHEMA[dg_ID]
+	DG = decode_header(dg, schema)
+	entry_start = schema['header_struct'].size
+
+	for count_key, dtype in schema['cycle_dtypes']:
+		entries = np.frombuffer(dg, dtype=dtype, count=int(np.sum(DG[count_key])), offset=entry_start)
+		DG.update(unpack_columns(entries))
+		entry_start = entry_start + entries.nbytes
+
+	return decode_end(dg, DG, schema, entry_start)
+
+
+def decode_dg_headers(raw, dg_offsets, dg_ID):
+	# decode headers of many datagrams of the same type in one step; dg_offsets are the STX positions in raw (e.g.,
+	# toc.OFFSET + 4 from em_io.index_all) and the result is a structured array with one record per datagram
+	return em_io.read_records(np.frombuffer(raw, dtype=np.uint8), dg_offsets, DG_SCHEMA[dg_ID]['header_dtype'])
+
 
 #%% VALIDATE DATAGRAM (UPDATED FOR PYTHON 3) ########################################################
 def validate_dg(data, dg_start, len_data):
@@ -47,323 +332,102 @@ def validate_dg(data, dg_start, len_data):
 			return [0, [0]]
 	else:
 		return [0, [0]]
-		
+
+
 #%% PU status datagram (UPDATED FOR PYTHON 3) #######################################################
 def PU_dg(dg):
 
-	PU = {}
-
-	PU['STX'] = 			struct.unpack('B', dg[0:1])[0]		# STX 1U
-	PU['ID'] = 				struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	PU['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	PU['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE 4U	
-	PU['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME in ms since midnight 4U
-	PU['STATUS_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# STATUS COUNTER 2U
-	PU['SYS_SN'] = 			struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	PU['PING_RATE'] =		struct.unpack('H', dg[16:18])[0]	# PING RATE 2U (centiHz)
-	PU['PING_COUNTER'] =	struct.unpack('H', dg[18:20])[0]	# PING COUNTER 2U
-	PU['PU_LOAD'] =			struct.unpack('I', dg[20:24])[0]	# PU LOAD in % 4U
-	PU['UDP_PORT_2'] =		struct.unpack('I', dg[24:28])[0]	# UDP PORT 2 4U
-	PU['SERIAL_PORT_1'] =	struct.unpack('I', dg[28:32])[0]	# SERIAL PORT 1 4U
-	PU['SERIAL_PORT_2'] =	struct.unpack('I', dg[32:36])[0]	# SERIAL PORT 2 4U
-	PU['SERIAL_PORT_3'] =	struct.unpack('I', dg[36:40])[0]	# SERIAL PORT 3 4U
-	PU['SERIAL_PORT_4'] =	struct.unpack('I', dg[40:44])[0]	# SERIAL PORT 4 4U
-	PU['PPS'] =				struct.unpack('b', dg[44:45])[0]	# PPS (positive num is OK, neg not OK) 1S
-	PU['POS_STAT'] =		struct.unpack('b', dg[45:46])[0]	# POS STAT (positive num is OK, neg not OK) 1S
-	PU['ATT_STAT'] =		struct.unpack('b', dg[46:47])[0]	# ATT STAT (positive num is OK, neg not OK) 1S
-	PU['CLOCK_STAT'] =		struct.unpack('b', dg[47:48])[0]	# CLOCK STAT (positive num is OK, neg not OK) 1S
-	PU['HEAD_STAT'] =		struct.unpack('b', dg[48:49])[0]	# HEAD STAT (positive num is OK, neg not OK) 1S
-	PU['PU_STAT'] =			struct.unpack('B', dg[49:50])[0]	# PU STAT see KM doc note 11 1U
-	PU['HEADING'] =			struct.unpack('H', dg[50:52])[0]	# last received HEADING in 0.01 deg 2U
-	PU['ROLL'] = 			struct.unpack('h', dg[52:54])[0]	# last received ROLL in 0.01 deg 2S
-	PU['PITCH'] = 			struct.unpack('h', dg[54:56])[0]	# last received PITCH in 0.01 deg 2S
-	PU['HEAVE'] =			struct.unpack('h', dg[56:58])[0]	# last receieved HEAVE at sonar head in cm 2S
-	PU['SS_TRANS'] = 		struct.unpack('H', dg[58:60])[0]	# SS TRANS in 0.1 m/s 2U
-	PU['DEPTH'] = 			struct.unpack('I', dg[60:64])[0]	# last received depth of motion sensor in cm 4U
-	PU['ALONG_VEL'] =		struct.unpack('h', dg[64:66])[0]	# ALONG VEL in 0.01 m/s 2S
-	PU['ATT_VEL_STAT'] =	struct.unpack('B', dg[66:67])[0]	# ATT VEL STAT see KM note 11 1U
-	PU['MAMMAL_RAMP'] =		struct.unpack('B', dg[67:68])[0]	# MAMMAL RAMP high voltage ramp up time in s 1U
-	PU['BS_OBLIQUE'] = 		struct.unpack('b', dg[68:69])[0]	# BS OBLIQUE see KM note 7 1S
-	PU['BS_NORMAL'] =		struct.unpack('b', dg[69:70])[0]	# BS NORMAL see KM note 7 1S
-	PU['FIXED_GAIN'] =		struct.unpack('b', dg[70:71])[0]	# FIXED GAIN see KM note 7 1S
-	PU['DEPTH_NORMAL'] =	struct.unpack('B', dg[71:72])[0]	# DEPTH NORMAL in m (spare for EM3000, EM2000) 1U
-	PU['RANGE_NORMAL'] =	struct.unpack('H', dg[72:74])[0]	# RANGE NORMAL in m (not incl before Jan 2004) 2U
-	PU['PORT_COVERAGE'] =	struct.unpack('B', dg[74:75])[0]	# PORT COVERAGE in deg 1U
-	PU['STBD_COVERAGE'] =	struct.unpack('B', dg[75:76])[0]	# STBD COVERAGE in deg 1U
-	PU['SS_TRANS_PROF'] =	struct.unpack('H', dg[76:78])[0]	# SS at transducer depth in profile, 0.1 m/s 2U
-	PU['YAW_STAB'] =		struct.unpack('h', dg[78:80])[0]	# YAW STAB in 0.1 deg 2S
-	PU['VEL_ACROSS'] =		struct.unpack('h', dg[80:82])[0]	# ACROSS VEL in 0.01 m/s (EM3002 PORT COV. ) 2S
-	PU['VEL_DOWN'] =		struct.unpack('h', dg[82:84])[0]	# DOWNWARD VEL in 0.01 m/s (EM3002 STBR COV.) 2S
-	PU['SPARE'] = 			struct.unpack('B', dg[84:85])[0]	# SPARE 1U
-	PU['ETX'] = 			struct.unpack('B', dg[85:86])[0]	# ETX 1U
-	PU['CHECKSUM'] = 		struct.unpack('H', dg[86:88])[0]	# CHECKSUM 2U
-
-	# for field, value in PU.items():
-	# 	print(field, value)
-
-	return(PU)
+	return decode_dg(dg, 49)
 
 
 #%% ATTITUDE datagram (UPDATED FOR PYTHON 3) ########################################################
 def ATT_dg(dg):
 
-	ATT = {}
-
-	ATT['STX'] = struct.unpack('B', dg[0:1])[0]				# STX 1U
-	ATT['ID'] = struct.unpack('B', dg[1:2])[0]				# ID 1U	
-	ATT['MODEL'] = struct.unpack('H', dg[2:4])[0]			# EM MODEL 2U
-	ATT['DATE'] = struct.unpack('I', dg[4:8])[0]			# DATE 4U
-	ATT['TIME'] = struct.unpack('I', dg[8:12])[0]			# TIME 4U
-	ATT['ATT_COUNTER'] = struct.unpack('H', dg[12:14])[0]	# ATTITUDE COUNTER 2U
-	ATT['SYS_SN'] = struct.unpack('H', dg[14:16])[0]		# SYS SN 2U
-	ATT['NUM_ENTRIES'] = struct.unpack('H', dg[16:18])[0]	# NUM ENTRIES 2U
-	
-	ATT_FIELDS = ['TIME', 'STATUS', 'ROLL', 'PITCH', 'HEAVE', 'HDG'] # attitude entry fields
-
-	for i in range(len(ATT_FIELDS)):
-		ATT[ATT_FIELDS[i]] = []
-
-	entry_start = 18
-	entry_length = 12
-	
-	for i in range(ATT['NUM_ENTRIES']):
-		ATT['TIME'].append(struct.unpack('H', dg[entry_start:entry_start+2])[0])		# 2U ms since record start
-		ATT['STATUS'].append(struct.unpack('H', dg[entry_start+2:entry_start+4])[0])	# 2U status see KM doc note
-		ATT['ROLL'].append(struct.unpack('h', dg[entry_start+4:entry_start+6])[0])		# 2S roll in 0.01 deg
-		ATT['PITCH'].append(struct.unpack('h', dg[entry_start+6:entry_start+8])[0])		# 2S pitch in 0.01 deg
-		ATT['HEAVE'].append(struct.unpack('h', dg[entry_start+8:entry_start+10])[0])	# 2S heave in cm 
-		ATT['HDG'].append(struct.unpack('H', dg[entry_start+10:entry_start+12])[0])		# 2U heading in 0.01 deg		
-		entry_start = entry_start + entry_length
-		
-	ATT['SENSOR_DESC'] = struct.unpack('B', dg[entry_start:entry_start+1])[0]	# 1U sensor system descriptor
-	ATT['ETX'] =			struct.unpack('B', dg[-3:-2])[0]					# ETX 1U
-	ATT['CHECKSUM'] = 		struct.unpack('H', dg[-2:])[0]						# CHECKSUM 2U
-
-	# for field, value in ATT.items():
-	# 	print(field, value)
-
-	return(ATT)
+	return decode_dg(dg, 65)
 
 
 #%% CLOCK datagram (UPDATED FOR PYTHON 3) ###########################################################
 def CLOCK_dg(dg):
 
-	T = {}
-
-	T['STX'] =				struct.unpack('B', dg[0:1])[0]		# STX 1U
-	T['ID'] = 				struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	T['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	T['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE in YYYYMMDD 4U
-	T['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME in ms since midnight 4U
-	T['CLOCK_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# CLOCK COUNTER 2U
-	T['SYS_SN'] = 			struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	T['DATE_EXTERNAL'] = 	struct.unpack('I', dg[16:20])[0]	# DATE EXTERNAL in YYYYMMDD 4U
-	T['TIME_EXTERNAL'] = 	struct.unpack('I', dg[20:24])[0]	# TIME EXTERNAL in ms since midnight 4U
-	T['PPS'] = 				struct.unpack('B', dg[24:25])[0]	# PPS activated (1 = active) 1U
-	T['ETX'] = 				struct.unpack('B', dg[25:26])[0]	# ETX 1U
-	T['CHECKSUM'] = 		struct.unpack('H', dg[26:28])[0]	# CHECKSUM 2U
-	
+	T = decode_dg(dg, 67)
+
 	# Print warnings for invalid data
 	if T['TIME'] < 0 or T['TIME'] > 86399999:
-		print('TIME outside of valid range')		
+		print('TIME outside of valid range')
 	if T['CLOCK_COUNTER'] < 0 or T['CLOCK_COUNTER'] > 65535:
-		print('CLOCK_COUNTER outside of valid range')		
+		print('CLOCK_COUNTER outside of valid range')
 	if T['TIME_EXTERNAL'] < 0 or T['TIME_EXTERNAL'] > 86399999:
 		print('TIME_EXTERNAL outside of valid range')
 
-	# for field, value in T.items():
-	# 	print(field, value)
-
 	return(T)
 
 
 #%% INSTALLATION PARAMETER (UPDATED FOR PYTHON 3) ###################################################
+# parameter IDs in order of EM datagram format document
+IP_ID = ['WLZ', 'SMH', 'HUN', 'HUT',\
+	'S1Z', 'S1X', 'S1Y', 'S1H', 'S1R', 'S1P', 'S1N',\
+	'S2Z', 'S2X', 'S2Y', 'S2H', 'S2R', 'S2P', 'S2N',\
+	'S1S', 'S2S', 'GO1', 'GO2', 'OBO', 'FGD',\
+	'TSV', 'RSV', 'BSV', 'PSV', 'DDS', 'OSV',\
+	'DSV', 'DSX', 'DSY', 'DSZ', 'DSD', 'DSO', 'DSF', 'DSH',\
+	'APS',\
+	'P1M', 'P1T', 'P1Z', 'P1X', 'P1Y', 'P1D', 'P1G',\
+	'P2M', 'P2T', 'P2Z', 'P2X', 'P2Y', 'P2D', 'P2G',\
+	'P3M', 'P3T', 'P3Z', 'P3X', 'P3Y', 'P3D', 'P3G', 'P3S',\
+	'MSZ', 'MSX', 'MSY', 'MRP', 'MSD', 'MSR', 'MSP', 'MSG',\
+	'NSZ', 'NSX', 'NSY', 'NRP', 'NSD', 'NSR', 'NSP', 'NSG',\
+	'GCG', 'MAS', 'SHC', 'AHS', 'ARO', 'API', 'AHE',\
+	'CLS', 'CLO', 'VSN', 'VSU', 'VSE', 'VSI', 'VSM',\
+	'MCAn', 'MCUn', 'MCIn', 'MCPn', 'CPR', 'ROP', 'SID',\
+	'RFN', 'PLL', 'COM']
+
+
+@functools.lru_cache(maxsize=256)
+def parse_IP_text(text):
+	# parse 'ID=value,' fields from the ASCII block of an IP datagram in a single pass; values are float if possible,
+	# str otherwise, and 'N/A' for IDs not found; results are cached by the ASCII block, which usually repeats for every
+	# start and stop IP datagram in a survey (do not modify the returned dict; copy it to the datagram dict instead)
+	params = dict.fromkeys(IP_ID, 'N/A')
+	found = set()
+
+	for field in text.decode('utf-8', 'ignore').split(',')[:-1]:  # each value is terminated by a comma
+		IP_ID_field, sep, value = field.lstrip().partition('=')
+
+		if sep and IP_ID_field in params and IP_ID_field not in found:  # store the first value found for each ID
+			found.add(IP_ID_field)
+			try:
+				params[IP_ID_field] = float(value)  # convert to float if possible
+
+			except ValueError:
+				params[IP_ID_field] = value
+
+	return params
+
+
 def IP_dg(dg):
 
-	IP = {} # dict of installation params (IP_ID fields in order of EM datagram format document)
-
-	IP['STX'] = 		struct.unpack('B', dg[0:1])[0]		# STX 1U
-	IP['ID'] = 			struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	IP['MODEL'] =		struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	IP['DATE'] =		struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	IP['TIME'] =		struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	IP['LINE_NUM'] =	struct.unpack('H', dg[12:14])[0]	# SURV LINE NUM 2U
-	IP['SYS_SN'] = 		struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	IP['HEAD_2_SN'] =	struct.unpack('H', dg[16:18])[0]	# HEAD 2 SN 2U
-
-	IP_ID = ['WLZ', 'SMH', 'HUN', 'HUT',\
-		'S1Z', 'S1X', 'S1Y', 'S1H', 'S1R', 'S1P', 'S1N',\
-		'S2Z', 'S2X', 'S2Y', 'S2H', 'S2R', 'S2P', 'S2N',\
-		'S1S', 'S2S', 'GO1', 'GO2', 'OBO', 'FGD',\
-		'TSV', 'RSV', 'BSV', 'PSV', 'DDS', 'OSV',\
-		'DSV', 'DSX', 'DSY', 'DSZ', 'DSD', 'DSO', 'DSF', 'DSH',\
-		'APS',\
-		'P1M', 'P1T', 'P1Z', 'P1X', 'P1Y', 'P1D', 'P1G',\
-		'P2M', 'P2T', 'P2Z', 'P2X', 'P2Y', 'P2D', 'P2G',\
-		'P3M', 'P3T', 'P3Z', 'P3X', 'P3Y', 'P3D', 'P3G', 'P3S',\
-		'MSZ', 'MSX', 'MSY', 'MRP', 'MSD', 'MSR', 'MSP', 'MSG',\
-		'NSZ', 'NSX', 'NSY', 'NRP', 'NSD', 'NSR', 'NSP', 'NSG',\
-		'GCG', 'MAS', 'SHC', 'AHS', 'ARO', 'API', 'AHE',\
-		'CLS', 'CLO', 'VSN', 'VSU', 'VSE', 'VSI', 'VSM',\
-		'MCAn', 'MCUn', 'MCIn', 'MCPn', 'CPR', 'ROP', 'SID',\
-		'RFN', 'PLL', 'COM']
-
-	for i in range(len(IP_ID)):		# Search for parameter IDs in ASCII datagram and store value
-
-		IP[IP_ID[i]] = 'N/A'
-		IP_ID_len = len(IP_ID[i])	# declare length of parameter ID and logical for searching
-		IP_ID_search = 1			# param_ID_fmt = param_ID_len*'s'
-		str_start = 18
-		
-		#### NEED TO REWRITE / SIMPLIFY SEARCH FOR IP PARAMS IN ASCII
-		while IP_ID_search and str_start + IP_ID_len < len(dg)-4:  # loop through ASCII data
-
-			temp_str = dg[str_start:str_start+IP_ID_len].decode("utf-8")  # search for IP ID in temp string
-
-			if IP_ID[i] == temp_str: 	# find IP ID match in IP string
-				IP_ID_search = 0		# stop searching for this IP ID
-				comma_search = 1		# find comma at end of field
-				comma_idx = str_start + IP_ID_len
-				
-				while comma_search:
-					temp_str = dg[comma_idx:comma_idx+1].decode("utf-8")  # python 3
-
-					if temp_str == ',':
-						comma_search = 0
-					else:
-						comma_idx = comma_idx + 1
-			
-				temp_str = dg[str_start + IP_ID_len + 1:comma_idx].decode("utf-8")  # isolate parameter value
-
-				try:								
-					temp_float = float(temp_str)			# convert to float if possible
-					IP[IP_ID[i]] = temp_float 	# dict
-					
-				except:
-					IP[IP_ID[i]] = temp_str 		# dict
-					
-			else:
-				str_start = str_start + 1
-
-	# Continue with remainder of datagram	
-	IP['ETX'] =			struct.unpack('B', dg[-3:-2])[0]	# ETX 1U
-	IP['CHECKSUM'] = 	struct.unpack('H', dg[-2:])[0]		# CHECKSUM 2U
-		
-	# for field, value in IP.items():
-		# print(field, value)
+	IP = decode_header(dg, DG_SCHEMA[73])  # dict of installation params (IP_ID fields in order of EM datagram format document)
+
+	IP.update(parse_IP_text(bytes(dg[18:len(dg)-3])))  # ASCII parameters follow the header
 
-	return(IP)
+	# Continue with remainder of datagram
+	return decode_end(dg, IP, DG_SCHEMA[73], 18)
 
 
 #%% RAW RANGE ANGLE 78 (supercedes RRA (f) from 2004) (UPDATED FOR PYTHON 3) ########################
 # Used for EM2040, EM710, EM302, EM122, ME70
 def RRA_78_dg(dg):
 
-	RRA = {}
-
-	RRA['STX'] = 			struct.unpack('B', dg[0:1])[0]		# STX 1U
-	RRA['ID'] = 			struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	RRA['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	RRA['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	RRA['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	RRA['PING_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# PING COUNTER 2U
-	RRA['SYS_SN'] = 		struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	RRA['SS_SURFACE'] =		struct.unpack('H', dg[16:18])[0]	# SURFACE SOUND SPEED in 0.1 m/s
-	RRA['NUM_TX_SECTORS'] = struct.unpack('H', dg[18:20])[0]	# NUM TX SECTORS 2U - (Ntx)
-	RRA['NUM_RX_BEAMS'] =	struct.unpack('H', dg[20:22])[0]	# NUM RX BEAMS 2U - (N)
-	RRA['NUM_VALID_DET'] =	struct.unpack('H', dg[22:24])[0]	# NUM VALID DETECTIONS 2U
-	RRA['SAMPLING_FREQ'] =	struct.unpack('f', dg[24:28])[0]	# SAMPLING FREQ IN Hz 4F
-	RRA['DSCALE'] =			struct.unpack('I', dg[28:32])[0]	# DSCALE Doppler correction see note 5, 4U
-
-	# declare TX fields
-	TX_FIELDS = ['TX_TILT', 'TX_FOCUS_RANGE', 'TX_SIG_LEN', 'TX_SEC_DELAY', 'TX_CENTER_FREQ',\
-					'TX_ABS_COEFF', 'TX_WAVEFORM_ID', 'TX_SEC_NUM', 'TX_BANDWIDTH']
-
-	for i in range(len(TX_FIELDS)):
-		RRA[TX_FIELDS[i]] = []
-
-	# Store raw range and angle TRANSMIT data from all valid TX sectors in datagram
-	entry_start = 32
-	entry_length = 24
-#	dg_continue = entry_start + (entry_length*RRA['NUM_TX_SECTORS'])
-	
-	for i in range(RRA['NUM_TX_SECTORS']):
-		RRA['TX_TILT'].append(struct.unpack('h', dg[entry_start:entry_start+2])[0])				# 2S tilt re TX array in 0.01 deg
-		RRA['TX_FOCUS_RANGE'].append(struct.unpack('H', dg[entry_start+2:entry_start+4])[0])	# 2U focus range in 0.1 m
-		RRA['TX_SIG_LEN'].append(struct.unpack('f', dg[entry_start+4:entry_start+8])[0])		# 4F signal length in s
-		RRA['TX_SEC_DELAY'].append(struct.unpack('f', dg[entry_start+8:entry_start+12])[0])		# 4F sector delay in s
-		RRA['TX_CENTER_FREQ'].append(struct.unpack('f', dg[entry_start+12:entry_start+16])[0])	# 4F center frequency in Hz
-		RRA['TX_ABS_COEFF'].append(struct.unpack('H', dg[entry_start+16:entry_start+18])[0])	# 2U mean abs coeff in 0.01 dB/km
-		RRA['TX_WAVEFORM_ID'].append(struct.unpack('B', dg[entry_start+18:entry_start+19])[0])	# 1U signal waveform ID
-		RRA['TX_SEC_NUM'].append(struct.unpack('B', dg[entry_start+19:entry_start+20])[0])		# 1U sector number
-		RRA['TX_BANDWIDTH'].append(struct.unpack('f', dg[entry_start+20:entry_start+24])[0])	# 4F sector bandwidth in Hz
-		entry_start = entry_start + entry_length
-
-	# declare RX fields
-	RX_FIELDS = ['RX_ANGLE', 'RX_TX_SEC_NUM', 'RX_DET_INFO', 'RX_DET_WINDOW', 'RX_QUAL_FAC',\
-					'RX_D_CORR', 'RX_TWTT', 'RX_BS', 'RX_CLEAN_INFO', 'RX_SPARE']
-
-	for i in range(len(RX_FIELDS)):
-		RRA[RX_FIELDS[i]] = []
-	
-	# # Store raw range and angle RECEIVE data from all valid RX beams in datagram	
-	entry_length = 16
-	
-	# dg_continue = entry_start + (entry_length*RRA['NUM_RX_BEAMS'])
-	
-	for i in range(RRA['NUM_RX_BEAMS']):
-		RRA['RX_ANGLE'].append(struct.unpack('h', dg[entry_start:entry_start+2])[0])			# 2S RX beam pointing angle re RX array in 0.01 deg
-		RRA['RX_TX_SEC_NUM'].append(struct.unpack('B', dg[entry_start+2:entry_start+3])[0])		# 1U TX sector number associated with RX beam
-		RRA['RX_DET_INFO'].append(struct.unpack('B', dg[entry_start+3:entry_start+4])[0])		# 1U RX detection info see KM doc note 3 
-		RRA['RX_DET_WINDOW'].append(struct.unpack('H', dg[entry_start+4:entry_start+6])[0])		# 2U RX detection window length in samples
-		RRA['RX_QUAL_FAC'].append(struct.unpack('B', dg[entry_start+6:entry_start+7])[0])		# 1U RX quality factor see KM doc note 2
-		RRA['RX_D_CORR'].append(struct.unpack('b', dg[entry_start+7:entry_start+8])[0])			# 1S RX Doppler correction see KM doc note 5
-		RRA['RX_TWTT'].append(struct.unpack('f', dg[entry_start+8:entry_start+12])[0])			# 4F RX two-way travel time in s see KM doc note 5
-		RRA['RX_BS'].append(struct.unpack('h', dg[entry_start+12:entry_start+14])[0])			# 2S RX reflectivity in 0.1 dB
-		RRA['RX_CLEAN_INFO'].append(struct.unpack('b', dg[entry_start+14:entry_start+15])[0]) 	# 1S RX realtime cleaning info see KM doc note 4
-		RRA['RX_SPARE'].append(struct.unpack('B', dg[entry_start+15:entry_start+16])[0])		
-		entry_start = entry_start + entry_length
-
-	RRA['SPARE'] =		struct.unpack('B', dg[entry_start:entry_start+1])[0]	# SPARE 1U
-	RRA['ETX'] = 		struct.unpack('B', dg[-3:-2])[0]						# ETX 1U
-	RRA['CHECKSUM'] = 	struct.unpack('H', dg[-2:])[0]							# CHECKSUM 2U
-
-	# print('************************************ RRA **************************************')
-	# for field, value in RRA.items():
-	# 	print(field, value)
-	
-	return(RRA)
+	return decode_dg(dg, 78)
 
 
 #%% POSITION (UPDATED FOR PYTHON 3) #################################################################
 def POS_dg(dg):
 
-	POS = {}
-
-	POS['STX'] = 		struct.unpack('B', dg[0:1])[0]		# STX 1U
-	POS['ID'] = 		struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	POS['MODEL'] =		struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	POS['DATE'] =		struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	POS['TIME'] =		struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	POS['COUNT'] = 		struct.unpack('H', dg[12:14])[0]	# POSITION COUNTER 2U
-	POS['SYS_SN'] = 	struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	POS['LAT'] =		struct.unpack('i', dg[16:20])[0]	# LAT 4S
-	POS['LON'] =		struct.unpack('i', dg[20:24])[0]	# LON 4S
-	POS['FIX_QUAL'] =	struct.unpack('H', dg[24:26])[0]	# FIX QUALITY 2U
-	POS['SOG'] =		struct.unpack('H', dg[26:28])[0]	# SOG 2U
-	POS['COG'] =		struct.unpack('H', dg[28:30])[0]	# COG 2U
-	POS['HEADING'] =	struct.unpack('H', dg[32:34])[0]	# HEADING 2U
-	POS['SYS_DESC'] =	struct.unpack('B', dg[34:35])[0]	# POS SYS DESC 1U
-	POS['INPUT_LEN'] =	struct.unpack('B', dg[35:36])[0]	# BYTES INPUT 1U
+	POS = decode_dg(dg, 80)
 
 	# Unpack pos input string and convert to string
-	POS['INPUT_STR'] = dg[36:len(dg)-3].decode("utf-8")
-	
-	POS['ETX'] = 			struct.unpack('B', dg[-3:-2])[0]	# ETX 1U
-	POS['CHECKSUM'] = 		struct.unpack('H', dg[-2:])[0]		# CHECKSUM 2U
-	
-	# for field, value in POS.items():
-	# 	print(field, value)
+	POS['INPUT_STR'] = bytes(dg[36:len(dg)-3]).decode("utf-8")  # bytes or memoryview
 
 	return(POS)
 
@@ -371,185 +435,49 @@ def POS_dg(dg):
 #%% RUNTIME PARAM (UPDATED FOR PYTHON 3) ############################################################
 def RTP_dg(dg):
 
-	RTP = {}
-
-	RTP['STX'] = 			struct.unpack('B', dg[0:1])[0]		# STX 1U
-	RTP['ID'] = 			struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	RTP['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	RTP['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	RTP['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	RTP['PING_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# PING COUNTER 2U
-	RTP['SYS_SN'] = 		struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	RTP['OPR_STN_STATUS'] =	struct.unpack('B', dg[16:17])[0]	# OPR_STN_STATUS 1U
-	RTP['CPU_STATUS'] =		struct.unpack('B', dg[17:18])[0]	# CPU STATUS 1U
-	RTP['BSP_STATUS'] =		struct.unpack('B', dg[18:19])[0]	# BSP STATUS 1U
-	RTP['SON_HD_STATUS'] =	struct.unpack('B', dg[19:20])[0]	# SON HD STATUS 1U
-	RTP['MODE'] =			struct.unpack('B', dg[20:21])[0]	# MODE 1U
-	RTP['FILTER_ID'] =		struct.unpack('B', dg[21:22])[0]	# FILTER ID 1U
-	RTP['MIN_DEPTH'] =		struct.unpack('H', dg[22:24])[0]	# MIN DEPTH 2U
-	RTP['MAX_DEPTH'] =		struct.unpack('H', dg[24:26])[0]	# MAX DEPTH 2U
-	RTP['ABS_COEFF'] =		struct.unpack('H', dg[26:28])[0]	# ABS COEFF 2U
-	RTP['TX_PULSE_LEN'] =	struct.unpack('H', dg[28:30])[0]	# TX PULSE LEN 2U
-	RTP['TX_BEAMWIDTH'] =	struct.unpack('H', dg[30:32])[0]	# TX BEAMWIDTH 2U
-	RTP['TX_POWER'] =		struct.unpack('b', dg[32:33])[0]	# TX POWER 1S
-	RTP['RX_BEAMWIDTH'] =	struct.unpack('B', dg[33:34])[0]	# RX BEAMWIDTH 1U
-	RTP['RX_BANDWIDTH'] =	struct.unpack('B', dg[34:35])[0]	# RX BANDWIDTH 1U
-	RTP['RX_FIXED_GAIN'] =	struct.unpack('B', dg[35:36])[0]	# RX FIXED GAIN 1U
-	RTP['TVG_LAW_ANGLE'] =	struct.unpack('B', dg[36:37])[0]	# TVG LAW ANGLE 1U
-	RTP['SS_SOURCE'] =		struct.unpack('B', dg[37:38])[0]	# SS SOURCE 1U
-	RTP['MAX_PORT_SWATH'] = struct.unpack('H', dg[38:40])[0]	# MAX PORT SWATH 2U
-	RTP['BEAM_SPACING'] =	struct.unpack('B', dg[40:41])[0]	# BEAM SPACING 1U
-	RTP['MAX_PORT_COV'] =	struct.unpack('B', dg[41:42])[0]	# MAX PORT COV 1U
-	RTP['Y_P_STAB_MODE'] =	struct.unpack('B', dg[42:43])[0]	# Y P STAB MODE 1U
-	RTP['MAX_STBD_COV'] =	struct.unpack('B', dg[43:44])[0]	# MAX STBR COV 1U
-	RTP['MAX_STBD_SWATH'] =	struct.unpack('H', dg[44:46])[0]	# MAX STBR SWATH 2U
-	RTP['TX_ALONG_TILT'] = 	struct.unpack('h', dg[46:48])[0]	# TX ALONG TILT 2S
-	RTP['FILTER_ID_2'] =	struct.unpack('B', dg[48:49])[0]	# FILTER ID 2
-	RTP['ETX'] =			struct.unpack('B', dg[49:50])[0]	# ETX 1U
-	RTP['CHECKSUM'] =		struct.unpack('H', dg[50:52])[0]	# CHECKSUM 2U
-	
-	# print('************************************ RTP **************************************')
-	# for field, value in RTP.items():
-	# 	print(field, value)
+	return decode_dg(dg, 82)
 
-	return(RTP)
 
-		
 #%% SOUND SPEED PROFILE (UPDATED FOR PYTHON 3) ######################################################
 def SSP_dg(dg):
 
-	SSP = {}
-
-	SSP['STX'] = 			struct.unpack('B', dg[0:1])[0]		# STX 1U
-	SSP['ID'] = 			struct.unpack('B', dg[1:2])[0]		# ID 1U	
-	SSP['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	SSP['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	SSP['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	SSP['PROF_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# PROF COUNTER 2U
-	SSP['SYS_SN'] = 		struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-	SSP['PROFILE_DATE'] = 	struct.unpack('I', dg[16:20])[0]	# PROFILE DATE 4U
-	SSP['PROFILE_TIME'] =	struct.unpack('I', dg[20:24])[0]	# PROFILE TIME 4U
-	SSP['NUM_ENTRIES'] =	struct.unpack('H', dg[24:26])[0]	# NUM ENTRIES 2U
-	SSP['DEPTH_RES'] =		struct.unpack('H', dg[26:28])[0]	# DEPTH RES 2U
-	
-	entry_start = 28
-	entry_length = 8
-
-	SSP['DEPTH'] = []
-	SSP['SOUND_SPEED'] = []
-
-	for i in range(SSP['NUM_ENTRIES']):
-		SSP['DEPTH'].append(struct.unpack('I', dg[entry_start:entry_start+4])[0])			# 4U
-		SSP['SOUND_SPEED'].append(struct.unpack('I', dg[entry_start+4:entry_start+8])[0])	# 4U
-
-		entry_start = entry_start + entry_length	
-
-	SSP['ETX'] = struct.unpack('B', dg[-3:-2])[0]				# ETX 1U
-	SSP['CHECKSUM'] = struct.unpack('H', dg[-2:])[0]			# CHECKSUM 2U
-
-	# for i in range(len(SSP['DEPTH'])):
-	# 	print(SSP['DEPTH'][i], SSP['SOUND_SPEED'][i])
-
-	# print(SSP)
+	return decode_dg(dg, 85)
 
-	return(SSP)
 
-    
 #%% XYZ88 (UPDATED FOR PYTHON 3) ####################################################################
 # Used for EM2040, EM710, EM122, EM302, ME70
 def XYZ_dg(dg, parse_outermost_only=False, parse_ping_info_only=False):
 
-	XYZ = {}
-	XYZ['STX'] = 			struct.unpack('B', dg[0:1])[0]		# STX 1U
-	XYZ['ID'] = 			struct.unpack('B', dg[1:2])[0]		# ID 1U
-	XYZ['MODEL'] = 			struct.unpack('H', dg[2:4])[0]		# EM MODEL 2U
-	XYZ['DATE'] = 			struct.unpack('I', dg[4:8])[0]		# DATE 4U
-	XYZ['TIME'] = 			struct.unpack('I', dg[8:12])[0]		# TIME 4U
-	XYZ['PING_COUNTER'] = 	struct.unpack('H', dg[12:14])[0]	# PING COUNTER 2U
-	XYZ['SYS_SN'] = 		struct.unpack('H', dg[14:16])[0]	# SYS SN 2U
-
-	if parse_ping_info_only:
-		return XYZ
-
-	XYZ['HEADING'] = 		struct.unpack('H', dg[16:18])[0]	# HEADING AT TX TIME 2U
-	XYZ['SS_SURFACE'] =   	struct.unpack('H', dg[18:20])[0]  	# 2U SURFACE SOUND SPEED IN 0.1 m/s
-	XYZ['TX_TRANS_Z'] =   	struct.unpack('f', dg[20:24])[0]  	# 4F TRANSMITTER DEPTH AT TX IN m
-	XYZ['NUM_RX_BEAMS'] = 	struct.unpack('H', dg[24:26])[0]	# 2U NUMBER OF RX BEAMS IN DATAGRAM
-	XYZ['NUM_DETECT'] =		struct.unpack('H', dg[26:28])[0]	# 2U NUMBER OF VALID DETECTIONS
-	XYZ['F_SAMPLE'] =		struct.unpack('f', dg[28:32])[0]	# 4F SAMPLING FREQUENCY IN Hz
-	XYZ['EM2040_SCAN'] =	struct.unpack('B', dg[32:33])[0]	# 1U SCANNING INFO (EM2040 ONLY)
-	XYZ['SPARE2'] =			struct.unpack('BBB', dg[33:36])[0] 	# 3U SPARE AFTER EM2040 SCANNING BYTE
-
-	RX_FIELDS = ['RX_DEPTH', 'RX_ACROSS', 'RX_ALONG', 'RX_DET_WIN', 'RX_QUAL_FAC',
-				 'RX_IBA', 'RX_DET_INFO', 'RX_CLEAN', 'RX_BS']
-
-	for i in range(len(RX_FIELDS)):
-		XYZ[RX_FIELDS[i]] = []
-
-	entry_start = 36  # start of XYZ entries for beam 0
-	entry_length = 20  # length of XYZ entry for each beam
-	N_beams_parse = XYZ['NUM_RX_BEAMS']  # number of RX beams to parse
-	# print('NUM_RX_BEAMS: ', N_beams_parse)
-
-	if parse_outermost_only is True:  # determine indices of outermost valid soundings and parse only those
-		det_int = []  # detection info integers for all beams across swath
-
-		for i in range(XYZ['NUM_RX_BEAMS']):  # read RX_DET_INFO for all beams in datagram
-			det_int.append(struct.unpack('B', dg[entry_start+16:entry_start+17])[0])  # 1U SEE KM DOC NOTE
-			entry_start = entry_start + entry_length
+	schema = DG_SCHEMA[88]
 
-		# print('in parseEM, det_int=', det_int)
+	if parse_ping_info_only:  # parse only the common header (through SYS_SN)
+		return dict(zip(schema['header_keys'], DG_BASE_STRUCT.unpack_from(dg, 0)))
 
-        # find indices of port and stbd outermost valid detections
-        # leading bit of det info field is 0 for valid detections (integer < 128)
-		idx_port = 0				# start at port outer sounding
-		idx_stbd = len(det_int)-1	# start at stbd outer sounding
+	XYZ = decode_header(dg, schema)
 
-		while det_int[idx_port] >= 128 and idx_port < len(det_int)-1:
-			idx_port = idx_port + 1  # move port idx to stbd if not valid
+	# decode all RX beam entries (20 bytes each, starting at byte 36) in one step
+	count_key, dtype = schema['cycle_dtypes'][0]
+	rx = np.frombuffer(dg, dtype=dtype, count=XYZ[count_key], offset=schema['header_struct'].size)
+	entry_start = schema['header_struct'].size + rx.nbytes  # end of RX beams to finish parsing rest of dg
 
-		while det_int[idx_stbd] >= 128 and idx_stbd > 0:
-			idx_stbd = idx_stbd - 1  # move stdb idx to port if not valid
+	if parse_outermost_only is True:  # determine indices of outermost valid soundings and parse only those
+		# find indices of port and stbd outermost valid detections
+		# leading bit of det info field is 0 for valid detections (integer < 128)
+		idx_valid = np.flatnonzero(rx['RX_DET_INFO'] < 128)
 
-		if idx_port >= idx_stbd:
+		if idx_valid.size < 2:
 			print('XYZ datagram has no valid soundings')
 			return []
 
-		else:  # store indices of outermost valid soundings for later reference to beam angles from RRA 78 datagram
-			XYZ['RX_BEAM_IDX_PORT'] = idx_port
-			XYZ['RX_BEAM_IDX_STBD'] = idx_stbd
-
-			# print('this ping had ', N_beams_parse, 'beams, port/stbd idx=', idx_port, idx_stbd)
-
-        # print('finished finding idx_stbd=', idx_stbd)
-        # reset file pointers to parse only the outermost valid detections identified above
-		entry_start = 36 + (idx_port)*20  # start of entries for farthest port valid sounding
-		entry_length = 20*(idx_stbd - idx_port)  # length from port valid sounding to start of farthest stbd valid sounding
-		N_beams_parse = 2  # parse only the two RX beams associated with these port and stbd indices
-
-	for i in range(N_beams_parse):
-		XYZ['RX_DEPTH'].append(struct.unpack('f', dg[entry_start:entry_start+4])[0]) 		# 4F DEPTH IN m
-		XYZ['RX_ACROSS'].append(struct.unpack('f', dg[entry_start+4:entry_start+8])[0])		# 4F ACROSSTRACK DISTANCE IN m
-		XYZ['RX_ALONG'].append(struct.unpack('f', dg[entry_start+8:entry_start+12])[0])		# 4F ALONGTRACK DISTANC IN m
-		XYZ['RX_DET_WIN'].append(struct.unpack('H', dg[entry_start+12:entry_start+14])[0])	# 2U DETECTION WINDOW IN SAMPLES
-		XYZ['RX_QUAL_FAC'].append(struct.unpack('B', dg[entry_start+14:entry_start+15])[0])	# 1U QUALITY FACTOR SEE KM NOTE 3
-		XYZ['RX_IBA'].append(struct.unpack('b', dg[entry_start+15:entry_start+16])[0])		# 1S INCID. ANGLE ADJ. IN 0.1 DEG
-		XYZ['RX_DET_INFO'].append(struct.unpack('B', dg[entry_start+16:entry_start+17])[0])	# 1U SEE KM DOC NOTE 4
-        # XYZ['RX_DET_INFO_BIN'].append("{0:b}".format([XYZ]['RX_DET_INFO'][i]).zfill(8))		# store the binary format
-		XYZ['RX_CLEAN'].append(struct.unpack('b', dg[entry_start+17:entry_start+18])[0])	# 1S REALTIME CLEANING INFO
-		XYZ['RX_BS'].append(struct.unpack('h', dg[entry_start+18:entry_start+20])[0])		# 2S REFLECTIVITY IN 0.1 dB
-
-		entry_start = entry_start + entry_length
-    
-    # reset pointer to end of RX beams to finish parsing rest of dg
-	entry_start = 36 + XYZ['NUM_RX_BEAMS']*20
+		# store indices of outermost valid soundings for later reference to beam angles from RRA 78 datagram
+		XYZ['RX_BEAM_IDX_PORT'] = int(idx_valid[0])
+		XYZ['RX_BEAM_IDX_STBD'] = int(idx_valid[-1])
+		rx = rx[[idx_valid[0], idx_valid[-1]]]  # parse only the two RX beams associated with these indices
 
-	XYZ['SPARE'] =		struct.unpack('B', dg[entry_start:entry_start+1])[0] 	# 1U
-	XYZ['ETX'] = 		struct.unpack('B', dg[-3:-2])[0]	# ETX 1U
-	XYZ['CHECKSUM'] = 	struct.unpack('H', dg[-2:])[0]		# CHECKSUM 2U
+	XYZ.update(unpack_columns(rx))  # store each field as an array across the beams parsed
+
+	return decode_end(dg, XYZ, schema, entry_start)
 
-	return XYZ
-    
 #    #%% XYZ88 (UPDATED FOR PYTHON 3) ####################################################################
 ## Used for EM2040, EM710, EM122, EM302, ME70
 #def XYZ_OUTERMOST_dg(dg):
@@ -634,46 +562,13 @@ def XYZ_dg(dg, parse_outermost_only=False, parse_ping_info_only=False):
 
 # %% SEABED IMAGE 89 datagram (UPDATED FOR PYTHON 3) ########################################################
 def SBI_89_dg(dg):
-	SBI = {}
-
-	SBI['STX'] = struct.unpack('B', dg[0:1])[0]  # STX 1U
-	SBI['ID'] = struct.unpack('B', dg[1:2])[0]  # ID 1U
-	SBI['MODEL'] = struct.unpack('H', dg[2:4])[0]  # EM MODEL 2U
-	SBI['DATE'] = struct.unpack('I', dg[4:8])[0]  # DATE 4U
-	SBI['TIME'] = struct.unpack('I', dg[8:12])[0]  # TIME 4U
-	SBI['PING_COUNTER'] = struct.unpack('H', dg[12:14])[0]  # PING COUNTER 2U
-	SBI['SYS_SN'] = struct.unpack('H', dg[14:16])[0]  # SYS SN 2U
-	SBI['SAMPLING_FREQ'] =	struct.unpack('f', dg[16:20])[0]	# SAMPLING FREQ IN Hz 4F
-	SBI['RANGE_TO_NORMAL'] = struct.unpack('H', dg[20:22])[0]	# RANGE TO NORMAL INCIDENCE IN NUM SAMPLES 2U
-	SBI['BSN'] = struct.unpack('h', dg[22:24])[0]			# 2S BS at normal incidence in 0.1 dB
-	SBI['BSO'] = struct.unpack('h', dg[24:26])[0]			# 2S BS at oblique incidence in 0.1 dB
-	SBI['TX_BEAMWIDTH'] = struct.unpack('H', dg[26:28])[0]	# 2U TX BEAMWIDTH ALONG IN 0.1 DEG
-	SBI['TVG_CROSSOVER'] = struct.unpack('H', dg[28:30])[0]	# 2U TVG LAW CROSSOVER ANGLE IN 0.1 DEG
-	SBI['NUM_VALID_BEAMS'] = struct.unpack('H', dg[30:32])[0]	# 2U NUM VALID BEAMS
-
-	SBI_FIELDS = ['SORT_DIR', 'DET_INFO', 'NUM_SAMPLES', 'CENTER_SAMPLE_NUM'] # seabed image entry fields
-
-	for i in range(len(SBI_FIELDS)):
-		SBI[SBI_FIELDS[i]] = []
-
-	entry_start = 32
-	entry_length = 6
-
-	for i in range(SBI['NUM_VALID_BEAMS']):
-		SBI['SORT_DIR'].append(struct.unpack('b', dg[entry_start:entry_start+1])[0])  	# 1S sorting direction
-		SBI['DET_INFO'].append(struct.unpack('B', dg[entry_start+1:entry_start+2])[0])  # 1U detection info
-		SBI['NUM_SAMPLES'].append(struct.unpack('H', dg[entry_start+2:entry_start+4])[0])  # 2U number of samples / beam
-		SBI['CENTER_SAMPLE_NUM'].append(struct.unpack('H', dg[entry_start+4:entry_start+6])[0])  # 2U center sample num
-		entry_start = entry_start + entry_length
-
-	SBI['AMPLITUDE'] = []
-
-	for i in range(sum(SBI['NUM_SAMPLES'])):
-		SBI['AMPLITUDE'].append(struct.unpack('h', dg[entry_start:entry_start+2])[0]) # 2S sample amplitude
-		entry_start = entry_start + 2
-
-	SBI['SPARE'] = struct.unpack('B', dg[entry_start:entry_start+1])[0]	# SPARE 1U
-	SBI['ETX'] = struct.unpack('B', dg[-3:-2])[0]  # ETX 1U
-	SBI['CHECKSUM'] = struct.unpack('H', dg[-2:])[0]  # CHECKSUM 2U
-
-	return (SBI)
\ No newline at end of file
+
+	SBI = decode_dg(dg, 89)
+
+	# reductions of sample amplitudes for quick checks of the whole ping (e.g., blowouts)
+	num_samples = SBI['AMPLITUDE'].size
+	SBI['AMPLITUDE_MEAN'] = SBI['AMPLITUDE'].mean() if num_samples > 0 else np.nan
+	SBI['AMPLITUDE_MIN'] = SBI['AMPLITUDE'].min() if num_samples > 0 else np.nan
+	SBI['AMPLITUDE_MAX'] = SBI['AMPLITUDE'].max() if num_samples > 0 else np.nan
+
+	return (SBI)
@@ -0,0 +1,287 @@
+"""Persistent cache of parsed swath data for NOAA / MAC echosounder assessment tools"""
+
+import datetime
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import multibeam_tools.libs.em_io
+
+# cached results are only reused for the same parser version; increment this when readALLswath, readKMALLswath, the
+# datagram parsers or indexers, or SwathData change what is returned for the same file
+PARSER_VERSION = 10
+
+CACHE_MAX_BYTES = 2**32  # total size of cache files kept; least recently used files are removed above this size
+CACHE_EXT = '.npz'
+
+
+def cache_dir():
+	# user cache directory (LOCALAPPDATA on Windows, XDG_CACHE_HOME or ~/.cache elsewhere)
+	base = os.getenv('LOCALAPPDATA') or os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+	return os.path.join(base, 'multibeam_tools', 'parse_cache')
+
+
+def cache_path(filename, mode):
+	# cache file for this source file identity (absolute path, size, mtime), parse mode, and parser version; the name
+	# starts with a hash of the path alone so all entries for one source file can be found for invalidation
+	path = os.path.abspath(filename)
+	stat = os.stat(path)
+	path_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:16]
+	key_hash = hashlib.sha1(repr((path, stat.st_size, stat.st_mtime_ns, mode, PARSER_VERSION)).encode('utf-8'))
+
+	return os.path.join(cache_dir(), path_hash + '_' + key_hash.hexdigest()[:16] + CACHE_EXT)
+
+
+def encode(obj, blobs):
+	# convert obj to a JSON-compatible tree for pack_data; numpy arrays (and scalars) are appended to blobs and replaced by
+	# a reference, and dicts (which may have int keys), tuples, datetimes, bytes, and object arrays are tagged so decode
+	# restores the same types; other types raise TypeError, so the data are not cached
+	if obj is None or isinstance(obj, (bool, str)):
+		return obj
+
+	if isinstance(obj, (np.ndarray, np.generic)) and not np.asarray(obj).dtype.hasobject:
+		blobs.append(np.asarray(obj))
+		return {'__array__': len(blobs) - 1, 'scalar': isinstance(obj, np.generic)}
+
+	if isinstance(obj, np.ndarray):  # object arrays (e.g., mixed numbers and text) are stored element by element
+		return {'__object_array__': [encode(v, blobs) for v in obj.ravel().tolist()], 'shape': list(obj.shape)}
+
+	if isinstance(obj, (int, float)):
+		return obj
+
+	if isinstance(obj, dict):
+		return {'__dict__': [[encode(k, blobs), encode(v, blobs)] for k, v in obj.items()]}
+
+	if isinstance(obj, list):
+		return [encode(v, blobs) for v in obj]
+
+	if isinstance(obj, tuple):
+		return {'__tuple__': [encode(v, blobs) for v in obj]}
+
+	if isinstance(obj, datetime.datetime):
+		return {'__datetime__': obj.isoformat()}
+
+	if isinstance(obj, bytes):
+		return {'__bytes__': obj.decode('latin-1')}
+
+	raise TypeError('cannot cache value of type ' + type(obj).__name__)
+
+
+def decode(tree, arrays):
+	# restore a tree made by encode; arrays are the arrays referenced by the tree, in the order of encode's blobs
+	if isinstance(tree, list):
+		return [decode(v, arrays) for v in tree]
+
+	if not isinstance(tree, dict):
+		return tree
+
+	if '__array__' in tree:
+		arr = arrays[tree['__array__']]
+		return arr[()] if tree['scalar'] else arr
+
+	if '__object_array__' in tree:
+		arr = np.empty(len(tree['__object_array__']), dtype=object)
+		arr[:] = [decode(v, arrays) for v in tree['__object_array__']]
+		return arr.reshape(tree['shape'])
+
+	if '__dict__' in tree:
+		return {decode(k, arrays): decode(v, arrays) for k, v in tree['__dict__']}
+
+	if '__tuple__' in tree:
+		return tuple(decode(v, arrays) for v in tree['__tuple__'])
+
+	if '__datetime__' in tree:
+		return datetime.datetime.fromisoformat(tree['__datetime__'])
+
+	return tree['__bytes__'].encode('latin-1')
+
+
+def pack_data(data):
+	# flatten a parsed data dict into arrays for np.savez that can be loaded without unpickling; SwathData fields are
+	# stored as separate arrays (keys such as 'XYZ/ping/TIME') and all other fields (datagram dicts, file name, etc.) are
+	# stored as a JSON tree (see encode), with the arrays in these fields concatenated in one array per dtype ('blob/i'),
+	# so the many small arrays of datagram dicts do not each need an entry in the file
+	import multibeam_tools.libs.swath_fun  # imported here so invalidation (e.g., from the command line) needs no parsers
+
+	arrays = {}
+	blobs = []
+	other = {}
+	swath_fields = {}  # SwathData object array fields, stored in the JSON tree
+
+	for k, v in data.items():
+		if isinstance(v, multibeam_tools.libs.swath_fun.SwathData):
+			fields = {k + '/ping_start': v.ping_start}
+			fields.update({k + '/ping/' + f: col for f, col in v.ping.items()})
+			fields.update({k + '/sounding/' + f: col for f, col in v.sounding.items()})
+			for name, table in v.param.items():
+				fields.update({k + '/param/' + name + '/' + f: col for f, col in table.items()})
+
+			for key, col in fields.items():
+				if col.dtype.hasobject:
+					swath_fields[key] = encode(col, blobs)
+
+				else:
+					arrays[key] = col
+
+		else:
+			other[k] = v
+
+	tree = {'other': encode(other, blobs), 'swath_fields': swath_fields}
+
+	# concatenate arrays of the same dtype and store the blob, start, and shape of each array in the tree
+	dtypes = list(dict.fromkeys(b.dtype for b in blobs))
+	tree['arrays'] = []
+
+	for i, dtype in enumerate(dtypes):
+		members = [b for b in blobs if b.dtype == dtype]
+		arrays['blob/' + str(i)] = np.concatenate([b.ravel() for b in members])
+
+	starts = dict.fromkeys(range(len(dtypes)), 0)
+	for b in blobs:
+		i = dtypes.index(b.dtype)
+		tree['arrays'].append([i, starts[i], list(b.shape)])
+		starts[i] += b.size
+
+	arrays['tree'] = np.frombuffer(json.dumps(tree).encode('utf-8'), dtype=np.uint8)
+
+	return arrays
+
+
+def unpack_data(arrays):
+	# rebuild the parsed data dict from the arrays stored by pack_data
+	import multibeam_tools.libs.swath_fun
+
+	tree = json.loads(bytes(arrays['tree']).decode('utf-8'))
+	blobs = {i: arrays['blob/' + str(i)] for i in set(i for i, _, _ in tree['arrays'])}
+	refs = [blobs[i][start:start + int(np.prod(shape))].reshape(shape) for i, start, shape in tree['arrays']]
+	data = decode(tree['other'], refs)
+	swath = {}
+
+	fields = {key: arrays[key] for key in arrays.files if key != 'tree' and not key.startswith('blob/')}
+	fields.update({key: decode(col, refs) for key, col in tree['swath_fields'].items()})
+
+	for key, col in fields.items():
+		k, field = key.split('/', 1)
+		s = swath.setdefault(k, multibeam_tools.libs.swath_fun.SwathData())
+
+		if field == 'ping_start':
+			s.ping_start = col
+
+		else:
+			group, f = field.split('/', 1)
+			if group == 'param':
+				name, f = f.split('/', 1)
+				s.param.setdefault(name, {})[f] = col
+
+			else:
+				getattr(s, group)[f] = col
+
+	data.update(swath)
+
+	return data
+
+
+def load(filename, mode, log=None):
+	# return the cached data for this file and parse mode, or None if not cached (or not readable); if log is given
+	# (the GUI or a ParseLog), loading from the cache and failures to load are noted with log.update_log
+	try:
+		fname_cache = cache_path(filename, mode)
+		if not os.path.isfile(fname_cache):
+			return None
+
+		with np.load(fname_cache, allow_pickle=False) as arrays:  # no pickled objects, so any file is safe to load
+			data = unpack_data(arrays)
+
+		os.utime(fname_cache)  # update access time for least recently used eviction
+		if log is not None:
+			log.update_log('Loaded cached parse of ' + filename)
+
+		return data
+
+	except Exception as e:
+		if log is not None:
+			log.update_log('Failed to load cached parse of ' + filename + ': ' + str(e))
+
+		return None
+
+
+def save(filename, mode, data, max_bytes=CACHE_MAX_BYTES, log=None):
+	# store the parsed data for this file and parse mode, then evict least recently used files above max_bytes; if log
+	# is given, failures to cache the data are noted with log.update_log
+	try:
+		fname_cache = cache_path(filename, mode)
+		os.makedirs(os.path.dirname(fname_cache), exist_ok=True)
+		fname_temp = fname_cache + '.tmp'
+		arrays = pack_data(data)
+
+		with open(fname_temp, 'wb') as fid:  # write to temp file so an interrupted save does not leave a partial entry
+			np.savez(fid, **arrays)
+
+		os.replace(fname_temp, fname_cache)
+		evict(max_bytes)
+
+	except Exception as e:
+		if log is not None:
+			log.update_log('Failed to cache parse of ' + filename + ': ' + str(e))
+
+
+def kmall_index(filename, use_cache=True):
+	# return the datagram index of a .kmall file (em_io.index_kmall), stored in (and reloaded from) the cache beside
+	# the parsed data for this file, so the index is shared by the tools reading the same file
+	if use_cache:
+		data = load(filename, '.kmall index')
+		if data is not None:
+			return data['toc'].view(np.recarray)
+
+	toc = multibeam_tools.libs.em_io.index_kmall(multibeam_tools.libs.em_io.map_file(filename))
+
+	if use_cache:
+		save(filename, '.kmall index', {'toc': toc.view(np.ndarray)})
+
+	return toc
+
+
+def cache_files():
+	# list of (path, size, last access time) for all cache files
+	path = cache_dir()
+	if not os.path.isdir(path):
+		return []
+
+	files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith(CACHE_EXT)]
+	stats = [os.stat(f) for f in files]
+
+	return [(f, s.st_size, s.st_mtime) for f, s in zip(files, stats)]
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+	# remove least recently used cache files until the total size is at most max_bytes
+	files = sorted(cache_files(), key=lambda f: f[2], reverse=True)  # most recently used first
+	total = 0
+
+	for f, size, _ in files:
+		total += size
+		if total > max_bytes:
+			os.remove(f)
+
+
+def invalidate(filenames=None):
+	# remove cached parses of the source files in filenames (all parse modes and versions), or all cache files if None;
+	# returns the number of cache files removed
+	files = [f for f, _, _ in cache_files()]
+
+	if filenames is not None:
+		path_hashes = [hashlib.sha1(os.path.abspath(fn).encode('utf-8')).hexdigest()[:16] + '_' for fn in filenames]
+		files = [f for f in files if os.path.basename(f).startswith(tuple(path_hashes))]
+
+	for f in files:
+		os.remove(f)
+
+	return len(files)
+
+
+if __name__ == '__main__':
+	# invalidate cached parses from the command line: python -m multibeam_tools.libs.parse_cache [file ...]
+	num_removed = invalidate(sys.argv[1:] or None)
+	print('Removed', num_removed, 'cached parse file(s) from', cache_dir())
@@ -13,109 +13,8 @@ except ImportError as e:
     from PyQt5.QtCore import Qt, QSize
 
 import matplotlib.pyplot as plt
-from kmall.KMALL import kmall
-
-
-class kmall_data(kmall):
-	# test class inheriting kmall class with method to extract any datagram (based on extract attitude method)
-	def __init__(self, filename, dg_name=None):
-		super(kmall_data, self).__init__(filename)  # pass the filename to kmall module (only argument required)
-
-	def extract_dg(self, dg_name):  # extract dicts of datagram types, store in kmall_data class
-		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
-		dg_types = {'IOP': self.read_EMdgmIOP,
-					'IIP': self.read_EMdgmIIP,
-					'MRZ': self.read_EMdgmMRZ,
-					'SKM': self.read_EMdgmSKM}
-
-		if self.Index is None:
-			print('*** indexing file! ***')
-			self.index_file()
-
-		if self.FID is None:
-			self.OpenFiletoRead()
-
-		# for each datagram type, get offsets, read datagrams, and store in key (e.g., MRZ stored in kjall.mrz)
-		if dg_name == 'MRZinfo':  # extract ping info ONLY, and keep same format for output (kmall.mrz)
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-			mrzinfo = list()
-			for offset in dg_offsets:  # read just header and ping info (adapted from read_EMdgmMRZ in kmall module)
-				self.FID.seek(offset, 0)
-				start = self.FID.tell()
-				dg = {}
-				dg['header'] = self.read_EMdgmHeader()
-				self.FID.seek(16, 1)  # skip readEMdgmMpartition (2H = 4) and readEMdgmMbody (2H8B = 12)
-				dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
-
-				# Seek to end of the packet
-				self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-				dg['start_byte'] = offset
-
-				# print('parsed = ', parsed)
-				mrzinfo.append(dg)
-
-			# convert list of dicts to dict of lists
-			mrzinfo_final = self.listofdicts2dictoflists(mrzinfo)
-			setattr(self, 'mrz', mrzinfo_final)  # kmall.mrz will include ping info only, not full soundings
-
-		elif dg_name in list(dg_types):  # extract whole datagrams
-			print('dg_name =', dg_name, ' is in dg_types')
-			print('searching for ', "b'#" + dg_name + "'")
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#" + dg_name + "'"]  # + "]
-			# print('got dg_offsets = ', dg_offsets)
-
-			dg = list()
-			for offset in dg_offsets:  # store all datagrams of this type
-				self.FID.seek(offset, 0)
-				parsed = dg_types[dg_name]()
-				parsed['start_byte'] = offset
-				# print('parsed = ', parsed)
-				dg.append(parsed)
-
-			# convert list of dicts to dict of lists
-			print('setting attribute with dg_name.lower()=', dg_name.lower())
-			dg_final = self.listofdicts2dictoflists(dg)
-			setattr(self, dg_name.lower(), dg_final)
-
-		self.FID.seek(0, 0)
-
-		return
-
-
-	def extract_pinginfo(self):  # extract dicts of datagram types, store in kmall_data class
-		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
-		if self.Index is None:
-			self.index_file()
-
-		if self.FID is None:
-			self.OpenFiletoRead()
-
-		# get offsets for MRZ datagrams (contain pingInfo to be used for sorting/searching runtime params)
-		dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-		print('got dg_offsets = ', dg_offsets)
-
-		pinginfo = list()
-		for offset in dg_offsets:  # read just header and ping info (copied from read_EMdgmMRZ method in kmall module
-			self.FID.seek(offset, 0)
-			start = self.FID.tell()
-			dg = {}
-			dg['header'] = self.read_EMdgmHeader()
-			dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
-
-			# Seek to end of the packet.
-			self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-			dg['start_byte'] = offset
-
-			# print('parsed = ', parsed)
-			pinginfo.append(dg)
-
-		# convert list of dicts to dict of lists
-		pinginfo_final = self.listofdicts2dictoflists(dg)
-		setattr(self, 'mrz', pinginfo_final)  # kmall.mrz will include ping info only, not full soundings
-
-		self.FID.seek(0, 0)
-
-		return
+from multibeam_tools.libs.swath_fun import kmall_data  # shared datagram index and extraction for .kmall files
+
 
 pathname = 'C:/Users/kjerram/Desktop/OKEANOS EXPLORER/EX2309/EM304 troubleshooting/'
 # filenames = ['0011_20230108_043302_ATLANTIS_TESTING.kmall']  # short file for quick testing
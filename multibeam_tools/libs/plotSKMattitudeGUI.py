@@ -29,7 +29,8 @@ from matplotlib.figure import Figure
 # from multibeam_tools.libs.swath_coverage_lib import *
 from multibeam_tools.libs.gui_widgets import *
 
-from kmall.KMALL import kmall
+from multibeam_tools.libs.swath_fun import kmall_skm_positions, SKM_KMBINARY_DTYPE
+from multibeam_tools.libs import em_io
 
 
 __version__ = "0.0.1"  # TESTING
@@ -313,74 +314,39 @@ class MainWindow(QtWidgets.QMainWindow):
 		self.calc_pb.setValue(0)  # reset progress bar to 0 and max to number of files
 		self.calc_pb.setMaximum(max([1, len(fnames_kmall)]))  # set max value to at least 1 to avoid hanging when 0/0
 
-		for f in range(len(fnames_kmall)):
-			fname = fnames_kmall[f]
-			# print('fname is ', fname.rsplit('/', 1)[-1])
+		# count the attitude samples in all files from the datagram index and the SKM info parts, then preallocate the
+		# attitude time series once and decode the KM binary samples of each file into its slice
+		skm_positions = []
+		for fname in fnames_kmall:
 			self.update_log('Scanning attitude for ' + fname.rsplit('/', 1)[-1])
-			km = kmall_data(fname)  # kmall_data class inheriting kmall class and adding extract_dg method
-			km.index_file()
-			km.report_packet_types()
-			km.extract_dg('SKM')
-			km.closeFile()
+			skm_positions.append(kmall_skm_positions(fname))
 
-			# concatenate datetime and roll rate
-			num_SKM = len(km.skm['sample'])
-			# SKM_header_datetime = [km.skm['header'][j]['dgdatetime'] for j in range(num_SKM)]
-			# SKM_sample_datetime = [km.skm['sample'][j]['KMdefault']['datetime'][0] for j in range(num_SKM)]
+		sample_start = np.cumsum([0] + [len(pos) for _, pos in skm_positions])
+		attitude_keys = ['roll_deg', 'rollRate', 'pitch_deg', 'pitchRate', 'heading_deg', 'yawRate']
+		attitude = {k: np.empty(sample_start[-1], dtype=np.float32) for k in attitude_keys}
+		attitude['datetime'] = np.empty(sample_start[-1], dtype='datetime64[ns]')
 
-			# if f == 0:
-				# SKM_sample_time = []
-				# SKM_sample_roll = []
-				# SKM_sample_roll_rate = []
+		for f, (buf, pos) in enumerate(skm_positions):
+			samples = em_io.read_records(buf, pos, SKM_KMBINARY_DTYPE)
+			file_samples = slice(sample_start[f], sample_start[f + 1])
+			attitude['datetime'][file_samples] = samples['time_sec'].astype(np.int64)*1000000000 + \
+												 samples['time_nanosec']
 
-				# attitude = np.array([])
-
-			for j in range(num_SKM):
-
-				# print('j =', j)
-				# SKM_sample_time.extend(np.array(km.skm['sample'][j]['KMdefault']['datetime']))
-				# SKM_sample_roll.extend(km.skm['sample'][j]['KMdefault']['roll_deg'])
-				# SKM_sample_roll_rate.extend(km.skm['sample'][j]['KMdefault']['rollRate'])
-
-				samples = np.vstack((np.asarray(km.skm['sample'][j]['KMdefault']['datetime']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['roll_deg']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['rollRate']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['pitch_deg']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['pitchRate']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['heading_deg']),
-									 np.asarray(km.skm['sample'][j]['KMdefault']['yawRate'])))
-
-				# print('size of samples after converting to array = ', np.shape(samples))
-
-				if j == 0:  # copy samples as first data in attitude array
-
-					attitude = samples.copy()
-
-					# print('size of attitude after initializing = ', np.shape(attitude))
-
-				else:
-					# print('size of attitude before concatenating = ', np.shape(attitude))
-
-					attitude = np.concatenate((attitude, samples), axis=1)
-
-					# print('size of attitude after concatenating = ', np.shape(attitude))
+			for k in attitude_keys:
+				attitude[k][file_samples] = samples[k]
 
 			self.update_prog(f + 1)
 
+		del skm_positions  # release mapped files
 		self.update_log('Plotting attitude time series...')
 
-			# print('survived with datetime / roll_rate lengths: ', len(SKM_sample_time), len(SKM_sample_roll_rate))
-
 		# make a plot of all the data
-		# self.roll_ax.plot(SKM_sample_time, SKM_sample_roll, 'r', label='Roll (deg)', linewidth=1)
-		# self.roll_ax.plot(SKM_sample_time, SKM_sample_roll_rate, 'b', label='Roll rate (deg/s)', linewidth=1)
-
-		self.roll_ax.plot(attitude[0], attitude[1], 'r', label='Roll (deg)', linewidth=1)
-		self.rollrate_ax.plot(attitude[0], attitude[2], 'b', label='Roll rate (deg/s)', linewidth=1)
-		self.pitch_ax.plot(attitude[0], attitude[3], 'r', label='Pitch (deg)', linewidth=1)
-		self.pitch_ax.plot(attitude[0], attitude[4], 'b', label='Pitch rate (deg/s)', linewidth=1)
-		self.hdg_ax.plot(attitude[0], attitude[5], 'r', label='Heading (deg)', linewidth=1)
-		self.yawrate_ax.plot(attitude[0], attitude[6], 'b', label='Yaw rate (deg/s)', linewidth=1)
+		self.roll_ax.plot(attitude['datetime'], attitude['roll_deg'], 'r', label='Roll (deg)', linewidth=1)
+		self.rollrate_ax.plot(attitude['datetime'], attitude['rollRate'], 'b', label='Roll rate (deg/s)', linewidth=1)
+		self.pitch_ax.plot(attitude['datetime'], attitude['pitch_deg'], 'r', label='Pitch (deg)', linewidth=1)
+		self.pitch_ax.plot(attitude['datetime'], attitude['pitchRate'], 'b', label='Pitch rate (deg/s)', linewidth=1)
+		self.hdg_ax.plot(attitude['datetime'], attitude['heading_deg'], 'r', label='Heading (deg)', linewidth=1)
+		self.yawrate_ax.plot(attitude['datetime'], attitude['yawRate'], 'b', label='Yaw rate (deg/s)', linewidth=1)
 
 		self.roll_ax.grid(axis='both', which='minor')
 		self.roll_ax.grid(axis='both', which='major')
@@ -397,106 +363,6 @@ class MainWindow(QtWidgets.QMainWindow):
 		# plt.show()
 
 
-class kmall_data(kmall):
-	# test class inheriting kmall class with method to extract any datagram (based on extract attitude method)
-	def __init__(self, filename, dg_name=None):
-		super(kmall_data, self).__init__(filename)  # pass the filename to kmall module (only argument required)
-
-	def extract_dg(self, dg_name):  # extract dicts of datagram types, store in kmall_data class
-		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
-		dg_types = {'IOP': self.read_EMdgmIOP,
-					'IIP': self.read_EMdgmIIP,
-					'MRZ': self.read_EMdgmMRZ,
-					'SKM': self.read_EMdgmSKM}
-
-		if self.Index is None:
-			print('*** indexing file! ***')
-			self.index_file()
-
-		if self.FID is None:
-			self.OpenFiletoRead()
-
-		# for each datagram type, get offsets, read datagrams, and store in key (e.g., MRZ stored in kjall.mrz)
-		if dg_name == 'MRZinfo':  # extract ping info ONLY, and keep same format for output (kmall.mrz)
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-			mrzinfo = list()
-			for offset in dg_offsets:  # read just header and ping info (adapted from read_EMdgmMRZ in kmall module)
-				self.FID.seek(offset, 0)
-				start = self.FID.tell()
-				dg = {}
-				dg['header'] = self.read_EMdgmHeader()
-				self.FID.seek(16, 1)  # skip readEMdgmMpartition (2H = 4) and readEMdgmMbody (2H8B = 12)
-				dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
-
-				# Seek to end of the packet
-				self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-				dg['start_byte'] = offset
-
-				# print('parsed = ', parsed)
-				mrzinfo.append(dg)
-
-			# convert list of dicts to dict of lists
-			mrzinfo_final = self.listofdicts2dictoflists(mrzinfo)
-			setattr(self, 'mrz', mrzinfo_final)  # kmall.mrz will include ping info only, not full soundings
-
-		elif dg_name in list(dg_types):  # extract whole datagrams
-			print('dg_name =', dg_name, ' is in dg_types')
-			print('searching for ', "b'#" + dg_name + "'")
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#" + dg_name + "'"]  # + "]
-			# print('got dg_offsets = ', dg_offsets)
-
-			dg = list()
-			for offset in dg_offsets:  # store all datagrams of this type
-				self.FID.seek(offset, 0)
-				parsed = dg_types[dg_name]()
-				parsed['start_byte'] = offset
-				# print('parsed = ', parsed)
-				dg.append(parsed)
-
-			# convert list of dicts to dict of lists
-			print('setting attribute with dg_name.lower()=', dg_name.lower())
-			dg_final = self.listofdicts2dictoflists(dg)
-			setattr(self, dg_name.lower(), dg_final)
-
-		self.FID.seek(0, 0)
-
-		return
-
-	def extract_pinginfo(self):  # extract dicts of datagram types, store in kmall_data class
-		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
-		if self.Index is None:
-			self.index_file()
-
-		if self.FID is None:
-			self.OpenFiletoRead()
-
-		# get offsets for MRZ datagrams (contain pingInfo to be used for sorting/searching runtime params)
-		dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-		print('got dg_offsets = ', dg_offsets)
-
-		pinginfo = list()
-		for offset in dg_offsets:  # read just header and ping info (copied from read_EMdgmMRZ method in kmall module
-			self.FID.seek(offset, 0)
-			start = self.FID.tell()
-			dg = {}
-			dg['header'] = self.read_EMdgmHeader()
-			dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
-
-			# Seek to end of the packet.
-			self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-			dg['start_byte'] = offset
-
-			# print('parsed = ', parsed)
-			pinginfo.append(dg)
-
-		# convert list of dicts to dict of lists
-		pinginfo_final = self.listofdicts2dictoflists(dg)
-		setattr(self, 'mrz', pinginfo_final)  # kmall.mrz will include ping info only, not full soundings
-
-		self.FID.seek(0, 0)
-
-		return
-
 class NewPopup(QtWidgets.QWidget): # new class for additional plots
     def __init__(self):
         QtWidgets.QWidget.__init__(self)
@@ -5,12 +5,11 @@
 
 # This script does NOT parse watercolumn or seabed image datagrams
 import copy
+import os
 import sys, utm, numpy as np
-from multibeam_tools.libs import parseEM
-import matplotlib.pyplot as plt
+from multibeam_tools.libs import parseEM, em_io, swath_fun
 from datetime import datetime
 from datetime import timedelta
-from scipy import interpolate
 
 def parseEMfile(filename, parse_list=0, print_updates=False, parse_outermost_only=False):
 
@@ -18,9 +17,7 @@ def parseEMfile(filename, parse_list=0, print_updates=False, parse_outermost_onl
     
     # Open and read the .all file
     # filename = '0248_20160911_191203_Oden.all'
-    f = open(filename, 'rb')
-    raw = f.read()
-    len_raw = len(raw)
+    len_raw = os.path.getsize(filename)
 
     # Declare lists for keeping track of datagram types available to parse
     dg_list = {'PU': 		49,\
@@ -53,120 +50,86 @@ def parseEMfile(filename, parse_list=0, print_updates=False, parse_outermost_onl
     for field in dg_list.keys():
         data[field] = {}
 
-    # Declare lists for datagram TOC and each type of parsed data
-    dg_TOC = []
-    dg_fail = []
-
-    # Declare counters for dg starting byte counter and dg processing counter
-    dg_start = 0
-    dg_count = 0
     parse_prog_old = -1
-    
-    # Assign and parse datagram
-    while dg_start <= len_raw: #  and dg_count < 10:
+
+    # Assign and parse datagram (datagrams not on the parsing list are skipped by the iterator)
+    skipped = []  # byte ranges of corrupt or truncated data skipped while indexing the file
+    for dg_start, dg_ID, dg in em_io.iter_datagrams(filename, ids=list(dg_list.values()), skipped=skipped):
 
         # print progress update
         parse_prog = round(10*dg_start/len_raw)
         if parse_prog > parse_prog_old:
-            print("%s%%" % (parse_prog * 10) + ('\n' if parse_prog == 10 else ''), end=" ", flush=True)
+            print("%s%%" % (parse_prog * 10), end=" ", flush=True)
             parse_prog_old = parse_prog
 
-        # Select datagram and validate	
-        [dg_validity, valid_dg_TOC] = parseEM.validate_dg(raw, dg_start, len_raw)
-		        
-        # Parse valid datagrams
-        if dg_validity == 1:
-            dg_TOC.append(valid_dg_TOC)
-            dg_count = dg_count + 1
-            dg_start = valid_dg_TOC[-2]
-            dg_len = valid_dg_TOC[-1]
-            dg_ID = valid_dg_TOC[0]
-            dg = raw[dg_start:dg_start+dg_len]
-    
-            # parse valid dg if dg_ID is on the list
-            if np.isin(dg_ID, list(dg_list.values())):
-    
-                # Parse PU STATUS datagram
-                if dg_ID == 49:
-                    data['PU'][len(data['PU'])] = parseEM.PU_dg(dg)
-                    
-    				# Parse ATTITUDE datagram
-                if dg_ID == 65:
-                    data['ATT'][len(data['ATT'])] = parseEM.ATT_dg(dg)
-    				
-                # Parse CLOCK datagram
-                if dg_ID == 67:
-                    data['T'][len(data['T'])] = parseEM.CLOCK_dg(dg)
-    				
-    				# Parse DEPTH datagram (EM3002 ONLY)
-    				# WARNING: for EM3002 only (write parser as needed for old data)
-    				# if dg_ID == 68:
-    				# 	depth.update(parse.depth_dg(dg))
-    				
-    				# Parse INSTALL PARAM START datagram PYTHON 3
-                if dg_ID == 73:
-                    # print(len(data['IP_start'].keys()))
-                    data['IP_start'][len(data['IP_start'])] = parseEM.IP_dg(dg)
-                    # print(len(data['IP_start'].keys()))
-    
-                # Parse RAW RANGE ANGLE 78 datagram
-                if dg_ID == 78:
-                    data['RRA_78'][len(data['RRA_78'])] = parseEM.RRA_78_dg(dg)
-                    # sys.exit() # exit after first datagram to test print
-    				
-                # Parse POSITION datagram PYTHON 3
-                if dg_ID == 80:
-                    data['POS'][len(data['POS'])] = parseEM.POS_dg(dg)
-                    # print(len(data['POS'].keys()))
-    				
-                # Parse RUNTIME PARAM datagram PYTHON 3
-                if dg_ID == 82:
-                    data['RTP'][len(data['RTP'])] = parseEM.RTP_dg(dg)
-    
-                # Parse SSP datagram PYTHON 3
-                if dg_ID == 85:
-                    data['SSP'][len(data['SSP'])] = parseEM.SSP_dg(dg)
-    
-                # Parse XYZ 88 datagram PYTHON 3
-                if dg_ID == 88:
+        # Parse PU STATUS datagram
+        if dg_ID == 49:
+            data['PU'][len(data['PU'])] = parseEM.PU_dg(dg)
+
+        # Parse ATTITUDE datagram
+        if dg_ID == 65:
+            data['ATT'][len(data['ATT'])] = parseEM.ATT_dg(dg)
+
+        # Parse CLOCK datagram
+        if dg_ID == 67:
+            data['T'][len(data['T'])] = parseEM.CLOCK_dg(dg)
+
+        # Parse DEPTH datagram (EM3002 ONLY)
+        # WARNING: for EM3002 only (write parser as needed for old data)
+        # if dg_ID == 68:
+        # 	depth.update(parse.depth_dg(dg))
+
+        # Parse INSTALL PARAM START datagram PYTHON 3
+        if dg_ID == 73:
+            # print(len(data['IP_start'].keys()))
+            data['IP_start'][len(data['IP_start'])] = parseEM.IP_dg(dg)
+            # print(len(data['IP_start'].keys()))
+
+        # Parse RAW RANGE ANGLE 78 datagram
+        if dg_ID == 78:
+            data['RRA_78'][len(data['RRA_78'])] = parseEM.RRA_78_dg(dg)
+            # sys.exit() # exit after first datagram to test print
+
+        # Parse POSITION datagram PYTHON 3
+        if dg_ID == 80:
+            data['POS'][len(data['POS'])] = parseEM.POS_dg(dg)
+            # print(len(data['POS'].keys()))
+
+        # Parse RUNTIME PARAM datagram PYTHON 3
+        if dg_ID == 82:
+            data['RTP'][len(data['RTP'])] = parseEM.RTP_dg(dg)
+
+        # Parse SSP datagram PYTHON 3
+        if dg_ID == 85:
+            data['SSP'][len(data['SSP'])] = parseEM.SSP_dg(dg)
+
+        # Parse XYZ 88 datagram PYTHON 3
+        if dg_ID == 88:
 #                    if parse_outermost_only is True:
-                    data['XYZ'][len(data['XYZ'])] = parseEM.XYZ_dg(dg, parse_outermost_only) # new parser for outermost valid soundings only
+            data['XYZ'][len(data['XYZ'])] = parseEM.XYZ_dg(dg, parse_outermost_only) # new parser for outermost valid soundings only
 #                    else:
 #                        data['XYZ'][len(data['XYZ'])] = parseEM.XYZ_dg(dg)
-                        
-                    # store last RTP MODE for each ping
-                    data['XYZ'][len(data['XYZ'])-1]['MODE'] = data['RTP'][len(data['RTP'])-1]['MODE']
-
-                # BEAM_ANGLE datagram (f) (EM120, EM300, EM1002, EM2000, EM3000, EM3002)
-                # WARNING: SUPERCEDED BY RRA 78 in 2004 (write parser as needed for old data)
-                # if dg_ID == 102:
-                # 	raw_range_angle_f.append(parseEM.raw_range_angle_f_dg(dg))
-
-                # Parse SEABED IMAGE 89 datagram PYTHON 3
-                if dg_ID == 89:
-                    data['SBI'][len(data['SBI'])] = parseEM.SBI_89_dg(dg)
-    							
-    				# Parse INSTALL PARAM STOP datagram PYTHON 3
-                if dg_ID == 105:
-                    data['IP_stop'][len(data['IP_stop'])] = parseEM.IP_dg(dg)
-    				
-    				# Increment counter for each ID
-    				# for index in range(len(dg_ID_NUMBERS)):
-    				# 	if dg_ID_NUMBERS[index] == valid_dg_TOC[0]:
-    				# 		dg_ID_COUNT[index] = dg_ID_COUNT[index] + 1
-    
-            # advance dg_start to end of valid datagram
-            if dg_start + dg_len <= len_raw:
-                dg_start = dg_start + dg_len
-            
-        # otherwise, continue search for next valid dg
-        else:
-            if dg_start + 1 <= len_raw + 1:
-                dg_start = dg_start + 1 # increment dg_start by 1 byte
-                
-            if dg_start + 1 > len_raw + 1:
-                break # break if end of file
-		
+
+            # store last RTP MODE for each ping
+            data['XYZ'][len(data['XYZ'])-1]['MODE'] = data['RTP'][len(data['RTP'])-1]['MODE']
+
+        # BEAM_ANGLE datagram (f) (EM120, EM300, EM1002, EM2000, EM3000, EM3002)
+        # WARNING: SUPERCEDED BY RRA 78 in 2004 (write parser as needed for old data)
+        # if dg_ID == 102:
+        # 	raw_range_angle_f.append(parseEM.raw_range_angle_f_dg(dg))
+
+        # Parse SEABED IMAGE 89 datagram PYTHON 3
+        if dg_ID == 89:
+            data['SBI'][len(data['SBI'])] = parseEM.SBI_89_dg(dg)
+
+        # Parse INSTALL PARAM STOP datagram PYTHON 3
+        if dg_ID == 105:
+            data['IP_stop'][len(data['IP_stop'])] = parseEM.IP_dg(dg)
+
+    print('' if parse_prog_old == 10 else '100%')  # finish progress updates at EOF
+
+    if skipped:
+        print('WARNING: skipped', len(skipped), 'corrupt or truncated byte range(s) (start, stop):', skipped[:10])
 
     if print_updates:
         print("\nFinished parsing file:", filename)
@@ -267,7 +230,32 @@ def verifyMode(data):
     return(consistent_RTP, (model, sn, ping_mode, pulse_mode, swath_mode))
 
 
-def convertXYZ(data, print_updates=False, plot_soundings=False, z_pos_up=False):
+def datetime64_to_seconds(dt):
+    # convert a datetime64 array to float seconds since 1970-01-01 (for interpolation in time)
+    return (dt - np.datetime64(0, 'us'))/np.timedelta64(1, 's')
+
+
+def interp_extrapolate(x, xp, fp):
+    # linear interpolation of fp (at sorted xp) at x, extrapolated linearly from the first and last two points outside
+    # the range of xp (as interpolate.interp1d with fill_value='extrapolate')
+    x = np.asarray(x, dtype=np.float64)
+    y = np.interp(x, xp, fp)
+    lo, hi = x < xp[0], x > xp[-1]
+    y[lo] = fp[0] + (x[lo] - xp[0])*(fp[1] - fp[0])/(xp[1] - xp[0])
+    y[hi] = fp[-2] + (x[hi] - xp[-2])*(fp[-1] - fp[-2])/(xp[-1] - xp[-2])
+
+    return y
+
+
+def read_line_positions(fnames):
+    # parse the POS 80 datagrams of adjacent .all files of one line as one datagram stream (em_io.VirtualLine), so
+    # positions repeated at the boundaries between files are used once; returns a dict of POS datagrams as in data['POS']
+    line = em_io.VirtualLine(fnames)
+
+    return {p: parseEM.POS_dg(dg) for p, (_, _, dg) in enumerate(line.iter_datagrams(ids=[80]))}
+
+
+def convertXYZ(data, print_updates=False, plot_soundings=False, z_pos_up=False, line_fnames=None):
     # convert XYZ88 datagram fields into lat, lon, depth
     # this assumes the positions provided are for the active positioning system; in cases where more than one system is
     # available, care must be taken to ensure the correct time series is parsed and passed to this conversion step
@@ -290,144 +278,114 @@ def convertXYZ(data, print_updates=False, plot_soundings=False, z_pos_up=False):
     # NOTE: Ping position is interpolated (and extrapolated when necessary) from ship position within each file
     # to avoid interpolating over gaps greater than 1 sec (e.g., for accuracy crosslines with turn files omitted)
     #
-    # Compared to a more sophisticated method of checking neighboring files' position records, this
-    # simpler approach may result in slight discrepancies for the earliest and latest ping times that
-    # happen to fall outside the position time series limits when the vessel is changing course rapidly
+    # If line_fnames is given (ordered .all files of the same line adjacent to the file in data, incl. that file; see
+    # em_io.line_neighbors), positions are read from all of these files, so the earliest and latest pings of the file
+    # are interpolated between positions of the neighboring files rather than extrapolated, which may otherwise result
+    # in slight discrepancies when the vessel is changing course rapidly
     
     # Set multiplier Z_flip = -1 to convert Z to positive UP (default: Z positive DOWN; Z_flip = 1 if Z_pos_up = False)
     # z_flip = 1-(2*int(z_pos_up))
     
     # plot ship track as a base for soundings plot
     if plot_soundings:
+        import matplotlib.pyplot as plt  # imported here so parsing (e.g., in worker processes) does not need matplotlib
         fig, ax = plt.subplots()  # create new figure
 
     # get active position sensor lat, lon, time, and system number
-    dt_pos, lat_pos, lon_pos, sys_num = sort_active_pos_system(data, print_updates=True)  # use active pos
-    dt_pos_unix = [datetime.timestamp(t) for t in dt_pos]  # convert dt_pos to list for interpolation
-    dt_idx_uniq = [dt_pos_unix.index(t) for t in set(dt_pos_unix)]
-
-    if len(dt_idx_uniq) < len(dt_pos_unix):  # remove duplicate times (I/B Nuyina EM712 example 2023)
-        print('in convertXYZ, found duplicate timestamps in dt_pos_unix; reducing ahead of interp onto ping time')
-        print('dt_pos_unix has len=', len(dt_pos_unix), ' and ', len(dt_idx_uniq), ' unique values')
-        dt_pos_unix = [t for t in set(dt_pos_unix)]
-        lat_pos = lat_pos[dt_idx_uniq]
-        lon_pos = lon_pos[dt_idx_uniq]
-        print('finished removing duplicates; lens for dt_pos_unix, lat_pos, and lon_pos are ',
-              [len(i) for i in [dt_pos_unix, lat_pos, lon_pos]])
+    if line_fnames is not None and len(line_fnames) > 1:  # positions of the line, with APS of the first file in data
+        pos_data = {0: {'POS': read_line_positions(line_fnames), 'IP': data[0]['IP']}}
+
+    else:
+        pos_data = data
+
+    dt_pos, lat_pos, lon_pos, sys_num = sort_active_pos_system(pos_data, print_updates=True)  # use active pos
+    t_pos = datetime64_to_seconds(np.asarray(dt_pos, dtype='datetime64[us]'))  # position time for interpolation
+    t_pos, idx_uniq = np.unique(t_pos, return_index=True)  # sorted unique times (first position at each time)
+
+    if len(idx_uniq) < len(dt_pos):  # remove duplicate times (I/B Nuyina EM712 example 2023)
+        print('in convertXYZ, found duplicate timestamps in dt_pos; reducing ahead of interp onto ping time')
+        print('dt_pos has len=', len(dt_pos), ' and ', len(idx_uniq), ' unique values')
 
     else:
-        print('in convertXYZ, all dt_pos_unix values are unique')
+        print('in convertXYZ, all dt_pos values are unique')
+
+    lat_pos = np.asarray(lat_pos)[idx_uniq]
+    lon_pos = np.asarray(lon_pos)[idx_uniq]
 
     if plot_soundings:  # plot ship track for base of soundings plot
         ax.plot(lon_pos, lat_pos,  'k', linewidth=1)
 
     for f in range(len(data)):  # loop through all files in data dict
-        
-        parse_prog_old = -1
-        
         if print_updates:
             print('\nConverting soundings in file:', data[f]['fname'])
 
-        # convert ship position record for this file only (avoid interpolation between files in case of gaps)
-        # datatemp = {}
-        # datatemp[0] = dict(data[f])  # format datatemp as dict with size 1 for input to convertEMpos
-        # dt_pos, lat_pos, lon_pos = convertEMpos(datatemp, print_updates=print_updates)
-        # dt_pos, lat_pos, lon_pos, sys_num = convertEMpos(datatemp, print_updates=True)  # new version for >1 pos systems
-        # dt_pos, lat_pos, lon_pos, sys_num = sort_active_pos_system(datatemp, print_updates=True)  # use only active pos
-
-        # if plot_soundings:  # plot ship track for base of soundings plot
-        #     ax.plot(lon_pos, lat_pos,  'k', linewidth=1)
-        
-        # dt_pos_unix = [datetime.timestamp(t) for t in dt_pos]  # convert dt_pos to list for interpolation
-
-        N_pings = len(data[f]['XYZ'])
-        
-        for p in range(N_pings):  # loop through each ping
-            print('***working on ping number: ', p)
-            parse_prog = round(10*p/N_pings)
-            if parse_prog > parse_prog_old:
-                print("%s%%" % (parse_prog*10) + ('\n' if parse_prog == 10 else ''), end=" ", flush=True)
-                parse_prog_old = parse_prog
-            
-            X = data[f]['XYZ'][p]['RX_ALONG']  # X is positive forward in Kongsberg reference frame
-            Y = data[f]['XYZ'][p]['RX_ACROSS']  # Y is positive to starboard in Kongsberg reference frame
-            # Z = data[f]['XYZ'][p]['RX_DEPTH']  # Z is positive down in Kongsberg reference frame
-            
-            # rotate X (fwd) and Y (stbd) in ship frame into dE and dN from ship reference location
-            hdg = data[f]['XYZ'][p]['HEADING']/100  # convert parsed heading in 0.01 deg into whole deg relative to N
+        swath = data[f]['XYZ']  # SwathData from readALLswath; soundings of all pings are stored in flat arrays
+        sounding_ping = swath.sounding_ping()  # ping index of each sounding
 
-            R = np.sqrt(np.square(X) + np.square(Y))  # calculate horizontal radius from position reference to sounding
-            az_ship = np.arctan2(X, Y)*180/np.pi  # azimuth (deg) from ship +Y axis (ship's Cartesian ref) to sounding
-            az_geo = az_ship - hdg  # azimuth (deg) from east (geographic Cartesian ref) by subtracting ship heading
-    
-            dE = R*np.cos(az_geo*np.pi/180)  # calculate easting (m) relative to ship reference (positive E)
-            dN = R*np.sin(az_geo*np.pi/180)  # calculate northing (m) relative to ship reference (positive N)
-                   
-            # convert ping time in ms since midnight to H, M, S, then python datetime
-            year =  int(str(data[f]['XYZ'][p]['DATE'])[0:4])
-            month = int(str(data[f]['XYZ'][p]['DATE'])[4:6])
-            day =   int(str(data[f]['XYZ'][p]['DATE'])[6:8])
-            minutes, seconds = np.divmod(np.divide(data[f]['XYZ'][p]['TIME'], 1000), 60)  # calc seconds
-            hours, minutes = np.divmod(minutes, 60)
-            seconds, micros = np.divmod(seconds, 1)
-            dt_ping = datetime(year, month, day, int(hours), int(minutes), int(seconds), int(round(micros*1000000)))
-            dt_ping_unix = datetime.timestamp(dt_ping)
-
-            # print('difference between ping timestamp and nearest position timestamp: ',
-            #       np.min(np.abs(np.asarray(dt_pos_unix) - np.asarray(dt_ping_unix))), ' seconds')
-
-            # calculate ping position by interpolating (extrapolating if necessary) ping time on position time series
-            # print('NANs in dt_pos_unix, lat_pos, or lon_pos being sent to interp1d: ',
-            #       any(np.isnan(np.asarray(dt_pos_unix))),
-            #       any(np.isnan(np.asarray(lat_pos))),
-            #       any(np.isnan(np.asarray(lon_pos))))
-
-            interp_lat = interpolate.interp1d(dt_pos_unix, lat_pos, fill_value='extrapolate')
-            interp_lon = interpolate.interp1d(dt_pos_unix, lon_pos, fill_value='extrapolate')
-
-            lat_ping = interp_lat(dt_ping_unix)
-            lon_ping = interp_lon(dt_ping_unix)
-
-            # store ship track
-            data[f]['XYZ'][p]['LON_PING'] = lon_ping
-            data[f]['XYZ'][p]['LAT_PING'] = lat_ping
-
-            # determine ship's position in E, N, UTM and add dE, dN
-            # NOTE: this handles UTM zone changes between pings, but could
-            # be sped up by checking for consistent UTM (typical case) in file, rather than each ping
-        
-            if plot_soundings:  # plot position of ship reference at ping time
-                ax.plot(lon_ping, lat_ping, marker='*', color='r')  # plot ping position
-
-            # convert ping position to UTM and add dN, dE for sounding positions in
-            Eping, Nping, zone_number, zone_letter = utm.from_latlon(lat_ping, lon_ping)
-            N = Nping + dN
-            E = Eping + dE
-
-            # store sounding positions in UTM, assuming whole swath is in same zone!
-            data[f]['XYZ'][p]['SOUNDING_N'] = N.tolist()
-            data[f]['XYZ'][p]['SOUNDING_E'] = E.tolist()
-            data[f]['XYZ'][p]['SOUNDING_UTM_ZONE'] = str(zone_number) + ' ' + zone_letter
-            
-            # convert lat, lon for all soundings
-            temp_lat, temp_lon = [], []
-            
-            for s in range(len(dN)): # loop through all soundings and append lat/lon list
-                lat_s, lon_s = utm.to_latlon(E[s], N[s], zone_number, zone_letter)
-                temp_lat.append(lat_s)
-                temp_lon.append(lon_s)
-                
-            # store lat, lon, and depth with transducer offset at ping time
-            data[f]['XYZ'][p]['SOUNDING_LAT'] = temp_lat            
-            data[f]['XYZ'][p]['SOUNDING_LON'] = temp_lon   
+        # rotate X (fwd) and Y (stbd) in ship frame into dE and dN from ship reference location for all soundings
+        X = swath.sounding['RX_ALONG']  # X is positive forward in Kongsberg reference frame
+        Y = swath.sounding['RX_ACROSS']  # Y is positive to starboard in Kongsberg reference frame
+        hdg = swath.ping['HEADING'][sounding_ping]/100  # convert parsed heading in 0.01 deg into whole deg re N
+
+        R = np.sqrt(np.square(X) + np.square(Y))  # calculate horizontal radius from position reference to sounding
+        az_ship = np.arctan2(X, Y)*180/np.pi  # azimuth (deg) from ship +Y axis (ship's Cartesian ref) to sounding
+        az_geo = az_ship - hdg  # azimuth (deg) from east (geographic Cartesian ref) by subtracting ship heading
+
+        dE = R*np.cos(az_geo*np.pi/180)  # calculate easting (m) relative to ship reference (positive E)
+        dN = R*np.sin(az_geo*np.pi/180)  # calculate northing (m) relative to ship reference (positive N)
+
+        # calculate ping position by interpolating (extrapolating if necessary) ping time on position time series
+        t_ping = datetime64_to_seconds(em_io.all_datetime(swath.ping['DATE'], swath.ping['TIME']))
+        lat_ping = interp_extrapolate(t_ping, t_pos, lat_pos)
+        lon_ping = interp_extrapolate(t_ping, t_pos, lon_pos)
+
+        # store ship track
+        swath.ping['LON_PING'] = lon_ping
+        swath.ping['LAT_PING'] = lat_ping
+
+        if plot_soundings:  # plot position of ship reference at ping time
+            ax.plot(lon_ping, lat_ping, linestyle='', marker='*', color='r')  # plot ping positions
+
+        # determine UTM zone of each ping position (as in utm.from_latlon), then convert ping positions to UTM and add
+        # dN, dE for sounding positions, and convert sounding positions back to lat, lon, for all pings in each zone
+        # at once; this handles UTM zone changes between pings, assuming whole swath is in same zone as the ping!
+        zone_number, zone_letter = swath_fun.utm_zones(lat_ping, lon_ping)
+        swath.ping['SOUNDING_UTM_ZONE'] = np.char.add(np.char.add(zone_number.astype(str), ' '),
+                                                      zone_letter).astype(object)
+
+        for k in ['SOUNDING_N', 'SOUNDING_E', 'SOUNDING_LAT', 'SOUNDING_LON']:
+            swath.sounding[k] = np.zeros(swath.ping_start[-1])
+
+        Eping, Nping = np.zeros(len(swath)), np.zeros(len(swath))
+
+        for zone in set(swath.ping['SOUNDING_UTM_ZONE']):
+            zone_number, zone_letter = zone.split(' ')
+            zone_pings = swath.ping['SOUNDING_UTM_ZONE'] == zone
+            zone_soundings = zone_pings[sounding_ping]
+
+            Eping[zone_pings], Nping[zone_pings], _, _ = utm.from_latlon(lat_ping[zone_pings], lon_ping[zone_pings],
+                                                                         force_zone_number=int(zone_number),
+                                                                         force_zone_letter=zone_letter)
+            N = Nping[sounding_ping[zone_soundings]] + dN[zone_soundings]
+            E = Eping[sounding_ping[zone_soundings]] + dE[zone_soundings]
+
+            # store sounding positions in UTM and lat, lon for all soundings
+            swath.sounding['SOUNDING_N'][zone_soundings] = N
+            swath.sounding['SOUNDING_E'][zone_soundings] = E
+
+            if N.size > 0:
+                swath.sounding['SOUNDING_LAT'][zone_soundings], swath.sounding['SOUNDING_LON'][zone_soundings] = \
+                    utm.to_latlon(E, N, int(zone_number), zone_letter)
 
 
     # plot every dssoundings on top of trackline figure
     dp = 100  # skip dp pings to avoid overwhelming plots
     if plot_soundings:
         for f in range(len(data)):
-            for p in np.arange(0,len(data[f]['XYZ']),dp):
-                ax.plot(data[f]['XYZ'][p]['SOUNDING_LON'], data[f]['XYZ'][p]['SOUNDING_LAT'], '.', color='b')
+            swath = data[f]['XYZ']
+            for p in np.arange(0,len(swath),dp):
+                s_ping = slice(swath.ping_start[p], swath.ping_start[p+1])
+                ax.plot(swath.sounding['SOUNDING_LON'][s_ping], swath.sounding['SOUNDING_LAT'][s_ping], '.', color='b')
     
     if print_updates:
         print('\nDone with XYZ conversion...')   
@@ -500,7 +458,8 @@ def sort_active_pos_system(data, pos_system='active', print_updates=False):
     # 11xx xxxx = the position system is active, input datagram time has been used
     # xxxx 1xxx = the position may have to be derived from the input datagram which is then in SIMRAD 90 format
 
-    lat, lon, sys, time, datestr = [], [], [], [], []
+    pos_fields = ['DATE', 'TIME', 'LAT', 'LON', 'SYS_DESC']
+    pos_active = {k: [] for k in pos_fields}  # arrays of position datagram fields from the active system in each file
 
     for f in range(len(data)):  # loop through all .all files in data
         print('in sort_active_pos_system, working on file number f=', f)
@@ -514,10 +473,14 @@ def sort_active_pos_system(data, pos_system='active', print_updates=False):
             print('*** Warning: in sort_active_pos_system for file', f, 'more than one unique APS found: ', aps_list)
             print('for now, only the first APS will be used')
 
+        # gather position datagram fields for this file into arrays in one pass
+        pos = {k: np.array([dg[k] for dg in data[f]['POS'].values()], dtype=np.int64) for k in pos_fields}
+        pos_sys_num = pos['SYS_DESC'] & 3  # system number is the last 2 bits of the system description
+
         # get set of system descriptions and numbers available in this file
-        sys_desc_set = [s for s in set([bin(dg['SYS_DESC']) for dg in data[f]['POS'].values()])]
-        sys_num_set = [s for s in set([bin(dg['SYS_DESC'])[-2:] for dg in data[f]['POS'].values()])]  # num=last 2 bits
-        sys_num_set_int = [int(s, 2) for s in sys_num_set]  # sys num integers available in position datagrams
+        sys_desc_set = [bin(s) for s in np.unique(pos['SYS_DESC']).tolist()]
+        sys_num_set_int = np.unique(pos_sys_num).tolist()  # sys num integers available in position datagrams
+        sys_num_set = [bin(s)[-2:] for s in sys_num_set_int]  # last 2 bits of system descriptions (num)
         # sys_num_out = int(min(sys_num_set), 2)  # default to lowest available system number
         # sys_num_out = min(sys_num_set_int)  # default to lowest available system number
         print('in convert EM pos, found set of system descriptions:', sys_desc_set)
@@ -567,49 +530,22 @@ def sort_active_pos_system(data, pos_system='active', print_updates=False):
 
         print('number of position datagrams parsed in file is:', len(data[f]['POS']))
 
-        for p in range(len(data[f]['POS'])):  # loop through all position datagrams in file
-            print('in ping', p, ' the sys_num_out, last two bits, and integer sys_desc are',
-                  sys_num_out,
-                  bin(data[f]['POS'][p]['SYS_DESC'])[-2:],
-                  int(bin(data[f]['POS'][p]['SYS_DESC'])[-2:], 2))
-
-            dg_sys_num = int(bin(data[f]['POS'][p]['SYS_DESC'])[-2:], 2)
-
-            # if int(bin(data[f]['POS'][p]['SYS_DESC'])[-2:], 2) == sys_num_out: # check last 2 bits of SYS_DESC vs first APS
-            if dg_sys_num == sys_num_out:  # check system number for this pos datagram vs first APS
-                print('** adding this ping because it passed the APS test')
-                datestr.append(str(data[f]['POS'][p]['DATE']))  # date in YYYYMMDD
-                print('just appended data[f][POS[p][DATE] =', str(data[f]['POS'][p]['DATE']))
-                time = np.append(time, data[f]['POS'][p]['TIME'])  # time in ms since midnight
-                lat = np.append(lat, data[f]['POS'][p]['LAT'])  # lat in lat*2*10^7
-                lon = np.append(lon, data[f]['POS'][p]['LON'])  # lon in lon*1*10^7
-                sys = np.append(sys, bin(data[f]['POS'][p]['SYS_DESC']))  # binary system description
-
-    # convert time in ms since midnight to H, M, S, convert all to python datetime
-    minutes, seconds = np.divmod(np.divide(time, 1000), 60)  # calc seconds
-    hours, minutes = np.divmod(minutes, 60)  # calc minutes and hours
-
-    # make datetime list out of all time fields
-    slist = np.round(seconds, decimals=3).astype('str').tolist()
-    mlist = minutes.astype('int').astype('str').tolist()
-    hlist = hours.astype('int').astype('str').tolist()
-    dt = []
-
-    for t in range(len(datestr)):
-        # EM time fields are not zero-padded, so separate by : for datetime interpretation
-        tempdatestr = datestr[t] + ' ' + hlist[t] + ':' + mlist[t] + ':' + slist[t]
-        dt.append(datetime.strptime(tempdatestr, '%Y%m%d %H:%M:%S.%f'))
-
-    print('in sortActivePosSystem, stored dt =', dt)
-
-    # reformat lat/lon, get sorting order by time, apply to output fields
-    lat = np.divide(lat, 20000000)  # divide by 2x10^7 per dg format, format as array
-    lon = np.divide(lon, 10000000)  # divide by 1x10^7 per dg format, format as array
-    dtsortidx = np.argsort(dt)  # get chronological sort order from position timestamps in case files not ordered
-    lat = lat[dtsortidx]
-    lon = lon[dtsortidx]
-    sys = sys[dtsortidx]
-    dt.sort()
+        # keep position datagrams with system number matching the desired system (last 2 bits of SYS_DESC vs first APS)
+        idx_active = pos_sys_num == sys_num_out
+        for k in pos_fields:
+            pos_active[k].append(pos[k][idx_active])
+
+    pos_active = {k: np.concatenate(v) if v else np.zeros(0, dtype=np.int64) for k, v in pos_active.items()}
+
+    # convert date (YYYYMMDD) and time (ms since midnight) to datetime, get sorting order by time, apply to all fields
+    dt = em_io.all_datetime(pos_active['DATE'], pos_active['TIME'])
+    dtsortidx = np.argsort(dt, kind='stable')  # chronological order in case files not ordered
+    dt = dt[dtsortidx].tolist()  # list of datetime objects
+
+    # reformat lat/lon per dg format and binary system descriptions
+    lat = np.divide(pos_active['LAT'][dtsortidx], 20000000)  # divide by 2x10^7 per dg format, format as array
+    lon = np.divide(pos_active['LON'][dtsortidx], 10000000)  # divide by 1x10^7 per dg format, format as array
+    sys = np.array([bin(s) for s in pos_active['SYS_DESC'][dtsortidx].tolist()])  # binary system description
 
     return (dt, lat, lon, sys)  # datetime object and lat, lon arrays
 
@@ -15,7 +15,9 @@ except ImportError as e:
 
 from multibeam_tools.libs.file_fun import *
 from multibeam_tools.libs.swath_fun import *
+from multibeam_tools.libs.swath_parse import parse_crossline_file, sortDetectionsAccuracy
 from multibeam_tools.libs.readEM import convertXYZ, sort_active_pos_system
+from multibeam_tools.libs import em_io
 
 import matplotlib.pyplot as plt
 # import matplotlib.gridspec as gridspec
@@ -1344,88 +1346,53 @@ def parse_crosslines(self):
 		# if len(fnames_new_all) > 0:  # proceed if there is at least one .all file that does not exist in det dict
 		update_log(self, 'Calculating accuracy from ' + str(num_new_files) + ' new file(s)')
 		QtWidgets.QApplication.processEvents()  # try processing and redrawing the GUI to make progress bar update
-		data_new = {}
 		track_new ={}
 
 		# update progress bar and log
 		self.calc_pb.setValue(0)  # reset progress bar to 0 and max to number of files
 		self.calc_pb.setMaximum(len(fnames_new))
 
-		for f in range(len(fnames_new)):
-			# for f in range(len(fnames_new_all)):         # read previously unparsed files
+		# parse, convert, and sort each file in a worker process; results are stored by file index so detections are
+		# merged in the order of fnames_new regardless of the order in which files are finished
+		results = [None]*num_new_files
+		zone = self.ref_proj_cbox.currentText()  # UTM zone for ASCII soundings
+		line_neighbors = em_io.line_neighbors(self.filenames)  # adjacent .all files of each line for positions
+		for num_done, (f, result) in enumerate(parse_files_parallel(fnames_new, parse_crossline_file, zone,
+																	 self.print_updates, line_neighbors), start=1):
+			results[f] = result
 			fname_str = fnames_new[f].rsplit('/')[-1]
 			self.current_file_lbl.setText(
-				'Parsing new file [' + str(f + 1) + '/' + str(num_new_files) + ']:' + fname_str)
-			QtWidgets.QApplication.processEvents()
-			ftype = fname_str.rsplit('.', 1)[-1]
-
-			if ftype == 'all':
-				# parse IPSTART73, RRA78, POS80, RTP82, XYZ88
-				# data_new[f] = multibeam_tools.libs.readEM.parseEMfile(fnames_new[f],
-				#                                                       parse_list=[73, 78, 80, 82, 88],
-				#                                                       print_updates=False)
-
-				# WORKING METHOD
-				# data_new[f] = readALLswath(self, fnames_new[f], print_updates=False, parse_outermost_only=False)
-
-				# TESTING METHOD
-				print('sending .all file to readALLswath')
-				data = readALLswath(self, fnames_new[f], print_updates=False, parse_outermost_only=False)
-				# print('got data back from readAllswath with type =', type(data))
-				# print('now sending dictionary = {0:data} to convertXYZ')
-				converted_data = convertXYZ({0: data}, print_updates=False)  # convertXYZ for dict of parsed .all data
-				# converted_data = convertXYZ({0: data}, print_updates=True)  # convertXYZ for dict of parsed .all data
-				# print('got back converted_data with type =', type(converted_data))
-				# print('now trying to store converted data in data_new[f]')
-				data_new[f] = converted_data[0]
-				# print('stored converted data, data_new is now', data_new)
-
-				# store xline track data separately from detection data for plotting
-				# WARNING: THIS IS OVERWRITING EXISTING TRACKS (e.g., f=0, 1, 2, etc.) WHEN NEW FILES ARE ADDED
-				# self.xline_track[f] = {k: data_new[f][k] for k in ['POS', 'IP']}  # store POS and IP for track
-				# self.xline_track[f]['fname'] = fname_str
-				track_new[f] = {k: data_new[f][k] for k in ['POS', 'IP']}  # store POS and IP for track
-				track_new[f]['fname'] = fname_str
-				# self.xline_track[fname_str] = {k: data_new[f][k] for k in ['POS', 'IP']}  # store POS and IP for track
-				# print('stored track=', self.xline_track[fname_str])
-
-			elif ftype == 'kmall':
-				data_new[f] = readKMALLswath(self, fnames_new[f])
-
-				# store RTP with pingInfo lat/lon
-				print('storing pingInfo lat/lon as ship track for this kmall file')
-				# self.xline_track[f] = {k: data_new[f][k] for k in ['RTP', 'IP']}
-				# self.xline_track[f]['fname'] = fname_str
-				track_new[f] = {k: data_new[f][k] for k in ['HDR', 'RTP', 'IP']}
-				track_new[f]['fname'] = fname_str
-				# print('data_new[IP]=', data_new[f]['IP'])
-				# print('IP text =', data_new[f]['IP']['install_txt'])
-
-			elif ftype == 'txt':
-				print('********** GOING TO TRY PARSING ASCII SOUNDINGS')
-				zone = self.ref_proj_cbox.currentText()
-				data_new[f] = readASCIIswath(self, fnames_new[f], utm_zone=zone)  # read soundings from ASCII
-				track_new[f] = track_new[f] = {k: data_new[f][k] for k in ['HDR', 'RTP', 'IP']}  # read track from ASCII (vessel X, vessel Y)
-				track_new[f]['fname'] = fname_str
-				track_new[f]['e'] = data_new[f]['ping_e']
-				track_new[f]['n'] = data_new[f]['ping_n']
-				track_new[f]['datetime'] = data_new[f]['datetime']
+				'Parsed new file [' + str(num_done) + '/' + str(num_new_files) + ']:' + fname_str)
+			update_prog(self, num_done)
 
-			else:
+		det_new = sortDetectionsAccuracy(self, {})  # empty detection dict to extend below
+
+		for f, result in enumerate(results):
+			fname_str = fnames_new[f].rsplit('/')[-1]
+
+			if result is None:
 				update_log(self, 'Warning: Skipping unrecognized file type for ' + fname_str)
 
-			update_log(self, 'Parsed file ' + fname_str)
-			update_prog(self, f + 1)
+			elif isinstance(result, Exception):  # failed outside of the parser (e.g., worker process ended)
+				update_log(self, 'No swath data parsed for ' + fname_str + ': ' + parse_exception_str(result))
+				continue
 
-		print('finished parsing, data_new has keys=', data_new.keys(), ' and data_new[0].keys = ', data_new[0].keys())
+			else:
+				for entry in result['log']:
+					update_log(self, entry)
+
+				if 'error' in result:  # failed to parse this file; log the traceback from the parser
+					update_log(self, 'No swath data parsed for ' + fname_str + ':\n' + result['error'])
+					continue
 
-		# convert XYZ to lat, lon using active pos sensor; maintain depth as reported in file; interpret/verify modes
-		# self.data_new = convertXYZ(data_new, print_updates=True)  # for .all files only?
-		self.data_new = interpretMode(self, data_new, print_updates=self.print_updates)  # True)
-		print('survived interpretMode, self.data_new has keys')
-		# print('testing calling sortDetectionsAccuracy before verifying modes')
-		det_new = sortDetectionsAccuracy(self, self.data_new, print_updates=True)  # sort new accuracy soundings
-		print('survived sortDetectionsAccuracy, det_new has keys', det_new.keys())
+				for key, value in result['det'].items():
+					det_new[key].extend(value)
+
+				track_new[f] = result['track']  # store xline track data separately from detection data for plotting
+
+			update_log(self, 'Parsed file ' + fname_str)
+
+		print('finished parsing, det_new has keys', det_new.keys())
 
 		# files_OK, EM_params = verifyMode(self.data_new)  # check install and runtime params
 		# if not files_OK:  # warn user if inconsistencies detected (perhaps add logic later for sorting into user-selectable lists for archiving and plotting)
@@ -1488,202 +1455,6 @@ def parse_crosslines(self):
 	return num_new_files
 
 
-def sortDetectionsAccuracy(self, data, print_updates=False):
-	# sort through .all and .kmall data dict and store valid soundings, BS, and modes
-	# note: .all data must be converted from along/across/depth data to lat/lon with convertXYZ before sorting
-	det_key_list = ['fname',  'model', 'datetime', 'date', 'time', 'sn',
-					'lat', 'lon', 'x', 'y', 'z', 'z_re_wl', 'n', 'e', 'utm_zone', 'bs', 'rx_angle',
-					'ping_mode', 'pulse_form', 'swath_mode', 'frequency',
-					'max_port_deg', 'max_stbd_deg', 'max_port_m', 'max_stbd_m',
-					'tx_x_m', 'tx_y_m', 'tx_z_m', 'aps_x_m', 'aps_y_m', 'aps_z_m', 'wl_z_m',
-					'ping_e', 'ping_n', 'ping_utm_zone']  # mode_bin
-
-	det = {k: [] for k in det_key_list}
-
-	# examine detection info across swath, find outermost valid soundings for each ping
-	for f in range(len(data)):  # loop through all data
-		if print_updates:
-			print('Sorting detections for accuracy, f =', f, ' and data[f] keys =', data[f].keys())
-		# set up keys for dict fields of interest from parsers for each file type (.all or .kmall)
-		ftype = data[f]['fname'].rsplit('.', 1)[1]
-		key_idx = int(ftype == 'kmall')  # keys in data dicts depend on parser used, get index to select keys below
-		det_int_threshold = [127, 0][key_idx]  # threshold for valid sounding (.all  <128 and .kmall == 0)
-		det_int_key = ['RX_DET_INFO', 'detectionType'][key_idx]  # key for detect info depends on ftype
-		depth_key = ['RX_DEPTH', 'z_reRefPoint_m'][key_idx]  # key for depth
-		across_key = ['RX_ACROSS', 'y_reRefPoint_m'][key_idx]  # key for acrosstrack distance
-		along_key = ['RX_ALONG', 'z_reRefPoint_m'][key_idx]  # key for alongtrack distance
-		bs_key = ['RX_BS', 'reflectivity1_dB'][key_idx]  # key for backscatter in dB
-		bs_scale = [0.1, 1][key_idx]  # backscatter scale in X dB; multiply parsed value by this factor for dB
-		angle_key = ['RX_ANGLE', 'beamAngleReRx_deg'][key_idx]  # key for RX angle re RX array
-		lat_key = ['SOUNDING_LAT', 'lat'][key_idx]
-		lon_key = ['SOUNDING_LON', 'lon'][key_idx]
-		e_key = ['SOUNDING_E', 'e'][key_idx]
-		n_key = ['SOUNDING_N', 'n'][key_idx]
-		utm_key = ['SOUNDING_UTM_ZONE', 'utm_zone'][key_idx]
-
-		for p in range(len(data[f]['XYZ'])):  # loop through each ping
-			# print('working on ping number ', p)
-			det_int = data[f]['XYZ'][p][det_int_key]  # get detection integers for this ping
-			det_idx = [i for i, v in enumerate(det_int) if v <= det_int_threshold]  # indices of all valid detections
-
-			# extend swath data from appropriate keys/values in data dicts
-			# future general sorter: accuracy, keep all valid det_int; coverage, reduce for outermost valid det_int
-			det['fname'].extend([data[f]['fname'].rsplit('/')[-1]] * len(det_idx))  # store fname for each det
-			det['x'].extend([data[f]['XYZ'][p][along_key][i] for i in det_idx])  # as parsed
-			det['y'].extend([data[f]['XYZ'][p][across_key][i] for i in det_idx])  # as parsed
-			det['z'].extend([data[f]['XYZ'][p][depth_key][i] for i in det_idx])  # as parsed
-
-			det['lat'].extend([data[f]['XYZ'][p][lat_key][i] for i in det_idx])
-			det['lon'].extend([data[f]['XYZ'][p][lon_key][i] for i in det_idx])
-
-			det['n'].extend([data[f]['XYZ'][p][n_key][i] for i in det_idx])
-			det['e'].extend([data[f]['XYZ'][p][e_key][i] for i in det_idx])
-			# det['bs'].extend([data[f]['XYZ'][p][bs_key][i] for i in det_idx])
-			det['bs'].extend([data[f]['XYZ'][p][bs_key][i] * bs_scale for i in det_idx])
-			det['ping_mode'].extend([data[f]['XYZ'][p]['PING_MODE']] * len(det_idx))
-			det['pulse_form'].extend([data[f]['XYZ'][p]['PULSE_FORM']] * len(det_idx))
-			# det['z_re_wl'].extend([data[f]['XYZ'][p]['SOUNDING_Z'][i] for i in det_idx])  # corrected to waterline
-			# det['ping_utm_zone'].extend([data[f]['XYZ'][p]['PING_UTM_ZONE']] * len(det_idx))
-			# det['ping_e'].extend([data[f]['XYZ'][p]['PING_E']] * len(det_idx))
-			# det['ping_n'].extend([data[f]['XYZ'][p]['PING_N']] * len(det_idx))
-
-			if ftype == 'all':  # .all store date and time from ms from midnight
-				det['model'].extend([data[f]['XYZ'][p]['MODEL']] * len(det_idx))
-				det['sn'].extend([data[f]['XYZ'][p]['SYS_SN']] * len(det_idx))
-				dt = datetime.datetime.strptime(str(data[f]['XYZ'][p]['DATE']), '%Y%m%d') + \
-					 datetime.timedelta(milliseconds=data[f]['XYZ'][p]['TIME'])
-				det['datetime'].extend([dt] * len(det_idx))
-				det['date'].extend([dt.strftime('%Y-%m-%d')] * len(det_idx))
-				det['time'].extend([dt.strftime('%H:%M:%S.%f')] * len(det_idx))
-				det['utm_zone'].extend([data[f]['XYZ'][p][utm_key]] * len(det_idx))  # convertXYZ --> one utmzone / ping
-				# det['rx_angle'].extend([data[f]['RRA_78'][p][angle_key][i] for i in det_idx])
-				det['swath_mode'].extend([data[f]['XYZ'][p]['SWATH_MODE']] * len(det_idx))
-				det['max_port_deg'].extend([data[f]['XYZ'][p]['MAX_PORT_DEG']] * len(det_idx))
-				det['max_stbd_deg'].extend([data[f]['XYZ'][p]['MAX_STBD_DEG']] * len(det_idx))
-				det['max_port_m'].extend([data[f]['XYZ'][p]['MAX_PORT_M']] * len(det_idx))
-				det['max_stbd_m'].extend([data[f]['XYZ'][p]['MAX_STBD_M']] * len(det_idx))
-				# print('in ping', p, 'with data[f][IP_START] =', data[f]['IP_start'])
-				det['tx_x_m'].extend([data[f]['XYZ'][p]['TX_X_M']] * len(det_idx))
-				det['tx_y_m'].extend([data[f]['XYZ'][p]['TX_Y_M']] * len(det_idx))
-				det['tx_z_m'].extend([data[f]['XYZ'][p]['TX_Z_M']] * len(det_idx))
-				det['aps_x_m'].extend([data[f]['XYZ'][p]['APS_X_M']] * len(det_idx))
-				det['aps_y_m'].extend([data[f]['XYZ'][p]['APS_Y_M']] * len(det_idx))
-				det['aps_z_m'].extend([data[f]['XYZ'][p]['APS_Z_M']] * len(det_idx))
-				det['wl_z_m'].extend([data[f]['XYZ'][0]['WL_Z_M']] * len(det_idx))
-
-			elif ftype == 'kmall':  # .kmall store date and time from datetime object
-				det['model'].extend([data[f]['HDR'][p]['echoSounderID']] * len(det_idx))
-				det['datetime'].extend([data[f]['HDR'][p]['dgdatetime']] * len(det_idx))
-				det['date'].extend([data[f]['HDR'][p]['dgdatetime'].strftime('%Y-%m-%d')] * len(det_idx))
-				det['time'].extend([data[f]['HDR'][p]['dgdatetime'].strftime('%H:%M:%S.%f')] * len(det_idx))
-				det['utm_zone'].extend([data[f]['XYZ'][p][utm_key][i] for i in det_idx])  # readKMALLswath 1 utm/sounding
-				det['aps_x_m'].extend([0] * len(det_idx))  # not needed for KMALL; append 0 as placeholder
-				det['aps_y_m'].extend([0] * len(det_idx))  # not needed for KMALL; append 0 as placeholder
-				det['aps_z_m'].extend([0] * len(det_idx))  # not needed for KMALL; append 0 as placeholder
-
-				# get first installation parameter datagram in file for s/n and offsets, assume no changes within file
-				ip_text = data[f]['IP']['install_txt'][0]
-				# get TX array offset text: EM304 = 'TRAI_TX1' and 'TRAI_RX1', EM2040P = 'TRAI_HD1', not '_TX1' / '_RX1'
-				ip_tx1 = ip_text.split('TRAI_')[1].split(',')[0].strip()  # all heads/arrays split by comma; use 1st hd
-				det['tx_x_m'].extend([float(ip_tx1.split('X=')[1].split(';')[0].strip())] * len(det_idx))  # TX array X
-				det['tx_y_m'].extend([float(ip_tx1.split('Y=')[1].split(';')[0].strip())] * len(det_idx))  # TX array Y
-				det['tx_z_m'].extend([float(ip_tx1.split('Z=')[1].split(';')[0].strip())] * len(det_idx))  # TX array Z
-				det['wl_z_m'].extend([float(ip_text.split('SWLZ=')[-1].split(',')[0].strip())] * len(det_idx))  # WL Z
-
-				# get serial number from installation parameter: 'SN=12345'
-				sn = ip_text.split('SN=')[1].split(',')[0].strip()
-				det['sn'].extend([sn] * len(det_idx))
-
-				# get index of latest runtime parameter timestamp prior to ping of interest; default to 0 for cases
-				# where earliest pings in file might be timestamped earlier than first runtime parameter datagram
-				IOP_headers = data[f]['IOP']['header']  # get list of IOP header dicts in new kmall module output
-				IOP_datetimes = [IOP_headers[d]['dgdatetime'] for d in range(len(IOP_headers))]
-				# print('got IOP datetimes =', IOP_datetimes)
-
-				MRZ_headers = data[f]['HDR']
-				MRZ_datetimes = [MRZ_headers[d]['dgdatetime'] for d in range(len(MRZ_headers))]
-
-				# find index of last IOP datagram before current ping, default to first if
-				IOP_idx = max([i for i, t in enumerate(IOP_datetimes) if t <= MRZ_datetimes[p]], default=0)
-
-				if IOP_datetimes[IOP_idx] > MRZ_datetimes[p]:
-					print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
-
-				# get runtime text from applicable IOP datagram, split and strip at keywords and append values
-				rt = data[f]['IOP']['runtime_txt'][IOP_idx]  # get runtime text for splitting NEW KMALL FORMAT
-				# print('IOP_idx = ', IOP_idx)
-				print('rt = ', rt)
-
-				# dict of keys for detection dict and substring to split runtime text at entry of interest
-				rt_dict = {'max_port_deg': 'Max angle Port:', 'max_stbd_deg': 'Max angle Starboard:',
-						   'max_port_m': 'Max coverage Port:', 'max_stbd_m': 'Max coverage Starboard:'}
-
-				# iterate through rt_dict and append coverage limits from split/stripped runtime text
-				for k, v in rt_dict.items():
-					try:
-						det[k].extend([float(rt.split(v)[-1].split('\n')[0].strip())] * len(det_idx))
-
-					except:
-						det[k].extend(['NA'] * len(det_idx))
-
-				# parse swath mode text
-				try:
-					dual_swath_mode = rt.split('Dual swath:')[-1].split('\n')[0].strip()
-
-					# print('kmall dual_swath_mode =', dual_swath_mode)
-
-					depth_mode = rt.split('Depth setting:')[-1].split('\n')[0].strip().lower()
-					print('found depth_mode =', depth_mode)
-					print('depth_mode in [very deep, extra deep, extreme deep] = ',
-						  depth_mode in ['very deep', 'extra deep', 'extreme deep'])
-
-					# if dual_swath_mode == 'Off':
-					if dual_swath_mode == 'Off' or depth_mode in ['very deep', 'extra deep', 'extreme deep']:
-						swath_mode = 'Single Swath'
-
-					else:
-						swath_mode = 'Dual Swath (' + dual_swath_mode + ')'
-
-				except:
-					swath_mode = 'NA'
-
-				det['swath_mode'].extend([swath_mode] * len(det_idx))
-
-				# parse frequency from runtime parameter text, if available
-				try:
-					# print('trying to split runtime text')
-					frequency_rt = rt.split('Frequency:')[-1].split('\n')[0].strip().replace('kHz', ' kHz')
-					# print('frequency string from runtime text =', frequency_rt)
-
-				except:  # use default frequency stored from interpretMode
-					pass
-
-				# store parsed freq if not empty, otherwise store default
-				frequency = frequency_rt if frequency_rt else data[f]['XYZ'][p]['FREQUENCY']
-				det['frequency'].extend([frequency] * len(det_idx))
-
-				if print_updates:
-					# print('found IOP_idx=', IOP_idx, 'with IOP_datetime=', data[f]['IOP']['dgdatetime'][IOP_idx])
-					print('found IOP_idx=', IOP_idx, 'with IOP_datetime=', IOP_datetimes[IOP_idx])
-					print('max_port_deg=', det['max_port_deg'][-1])
-					print('max_stbd_deg=', det['max_stbd_deg'][-1])
-					print('max_port_m=', det['max_port_m'][-1])
-					print('max_stbd_m=', det['max_stbd_m'][-1])
-					print('swath_mode=', det['swath_mode'][-1])
-
-			elif ftype == 'txt':  #ASCII text
-				print('\n\n**** NEED TO SORT ASCII TEXT SOUNDINGS ****\n\n')
-
-			else:
-				print('UNSUPPORTED FTYPE --> NOT SORTING DETECTION!')
-
-	if print_updates:
-		print('\nDone sorting detections...')
-
-	# print('leaving sortDetectionsCoverage with det[frequency] =', det['frequency'])
-
-	return det
-
 
 def calc_z_final(self):
 	# adjust sounding depths to desired reference and flip sign as necessary for comparison to ref surf (positive up)
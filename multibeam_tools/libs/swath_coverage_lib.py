@@ -13,6 +13,7 @@ except ImportError as e:
 import multibeam_tools.libs.parseEM
 from multibeam_tools.libs.file_fun import *
 from multibeam_tools.libs.swath_fun import *
+from multibeam_tools.libs.swath_parse import parse_coverage_file, sortDetectionsCoverage
 
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
@@ -929,7 +930,6 @@ def calc_coverage(self, params_only=False):
 				   ' from ' + str(num_new_files) + ' new file(s)')
 
 		QtWidgets.QApplication.processEvents()  # try processing and redrawing the GUI to make progress bar update
-		data_new = {}
 		param_new = {}
 		self.skm_time = {}
 
@@ -937,97 +937,62 @@ def calc_coverage(self, params_only=False):
 		self.calc_pb.setValue(0)  # reset progress bar to 0 and max to number of files
 		self.calc_pb.setMaximum(max([1, len(fnames_new)]))  # set max value to at least 1 to avoid hanging when 0/0
 
-		i = 0  # counter for successfully parsed files (data_new index)
+		i = 0  # counter for successfully parsed files (skm_time index)
 		f = 0  # placeholder if no fnames_new
 
 		tic1 = process_time()
 
-		for f in range(len(fnames_new)):
-			print('in calc_coverage, f =', f)
+		# parse and sort each file in a worker process; results are stored by file index so detections are merged in
+		# the order of fnames_new regardless of the order in which files are finished
+		results = [None]*num_new_files
+		for num_done, (f, result) in enumerate(parse_files_parallel(fnames_new, parse_coverage_file, params_only,
+																	 self.print_updates), start=1):
+			results[f] = result
 			fname_str = fnames_new[f].rsplit('/')[-1]
-			self.current_file_lbl.setText('Parsing new file [' + str(f+1) + '/' + str(num_new_files) + ']:' + fname_str)
-			QtWidgets.QApplication.processEvents()
-			ftype = fname_str.rsplit('.', 1)[-1]
+			self.current_file_lbl.setText('Parsed new file [' + str(num_done) + '/' + str(num_new_files) + ']:' +
+										  fname_str)
+			update_prog(self, num_done)
 
-			tic = process_time()
+		det_new = sortDetectionsCoverage(self, {}, params_only=params_only)  # empty detection dict to extend below
 
-			try:  # try to parse file
-				if ftype == 'all':  # read .all file for coverage (incl. params) or just params
-					data_new[i] = readALLswath(self, fnames_new[f], print_updates=self.print_updates,
-											   parse_outermost_only=True, parse_params_only=params_only)
-
-				elif ftype == 'kmall':  # read .all file for coverage (incl. params) or just params
-					include_skm = not params_only
-					print('calling readKMALLswath from calc_coverage')
-					data_new[i] = readKMALLswath(self, fnames_new[f], print_updates=self.print_updates,
-												 include_skm=not params_only, parse_params_only=params_only)
-					print('***back from readKMALLswath in calc_coverage')
-
-					ping_bytes = [0] + np.diff(data_new[i]['start_byte']).tolist()
-
-					for p in range(len(data_new[i]['XYZ'])):  # store ping start byte
-						print('storing ping start bite')
-						data_new[i]['XYZ'][p]['bytes_from_last_ping'] = ping_bytes[p]
-
-					try:  # simplify SKM header and sample times for plotting
-						num_SKM = len(data_new[i]['SKM']['header'])
-						# print('********* trying to print items in sample datagram j')
-						# sample_keys = [k for k in data_new[i]['SKM']['sample'].keys()]
-						# for k in sample_keys:
-						# 	SKM_roll_rate.append(data_new[i]['SKM']['sample'][k]['KMdefault']
-
-						SKM_header_datetime = [data_new[i]['SKM']['header'][j]['dgdatetime'] for j in range(num_SKM)]
-						SKM_sample_datetime = [data_new[i]['SKM']['sample'][j]['KMdefault']['datetime'][0] for j in range(num_SKM)]
-
-					except:  # store placeholders if SKM was not parsed
-						SKM_header_datetime = [datetime.datetime(1, 1, 1, 0, 0)]  # min datetime year is 1
-						SKM_sample_datetime = [datetime.datetime(1, 1, 1, 0, 0)]
-
-					self.skm_time[i] = {'fname': fnames_new[f],
-										'SKM_header_datetime': SKM_header_datetime,
-										'SKM_sample_datetime': SKM_sample_datetime}
+		for f, result in enumerate(results):
+			fname_str = fnames_new[f].rsplit('/')[-1]
 
-				else:
-					update_log(self, 'Warning: Skipping unrecognized file type for ' + fname_str)
+			if result is None:
+				update_log(self, 'Warning: Skipping unrecognized file type for ' + fname_str)
+				update_log(self, 'No swath data parsed for ' + fname_str)
+				continue
 
-				data_new[i]['fsize'] = os.path.getsize(fnames_new[f])
-				print('stored file size ', data_new[i]['fsize'])
-				fname_wcd = fnames_new[f].replace('.kmall', '.kmwcd').replace('.all', '.wcd')
+			if isinstance(result, Exception):  # failed outside of the parser (e.g., worker process ended)
+				update_log(self, 'No swath data parsed for ' + fname_str + ': ' + parse_exception_str(result))
+				continue
 
-				print('looking for watercolumn file: ', fname_wcd)
-				try:  # try to get water column file size (.kmwcd for .kmall. or .wcd for .all)
-					data_new[i]['fsize_wc'] = os.path.getsize(fname_wcd)
-					print('stored water column file size', data_new[i]['fsize_wc'], ' for file', fnames_new[f])
+			for entry in result['log']:
+				update_log(self, entry)
 
-				except:
-					data_new[i]['fsize_wc'] = np.nan
-					print('failed to get water column file size for file ', fname_wcd)
+			if 'error' in result:  # failed to parse this file; log the traceback from the parser
+				update_log(self, 'No swath data parsed for ' + fname_str + ':\n' + result['error'])
+				continue
 
-				update_log(self, 'Parsed file ' + fname_str)
-				i += 1  # increment successful file counter
+			for key, value in result['det'].items():
+				det_new[key].extend(value)
 
-				# log whether scanned or plotted so only new files are processed on next call of that type
-				self.fnames_scanned_params.append(fname_str)  # all files get scanned for parameters
+			if result['skm_time'] is not None:
+				self.skm_time[i] = result['skm_time']
 
-				if not params_only:  # note if coverage was also calculate for this file
-					self.fnames_plotted_cov.append(fname_str)
+			update_log(self, 'Parsed file ' + fname_str)
+			i += 1  # increment successful file counter
 
-			except:  # failed to parse this file
-				update_log(self, 'No swath data parsed for ' + fname_str)
+			# log whether scanned or plotted so only new files are processed on next call of that type
+			self.fnames_scanned_params.append(fname_str)  # all files get scanned for parameters
 
-			update_prog(self, f + 1)
-
-			toc = process_time()
-			parse_time = toc-tic
-			# print('parsing COVERAGE took', parse_time)
+			if not params_only:  # note if coverage was also calculate for this file
+				self.fnames_plotted_cov.append(fname_str)
 
 		toc1 = process_time()
 		refresh_time = toc1 - tic1
 		# print('parsing WHOLE DATASET for COVERAGE took', refresh_time)
 
-		self.data_new = interpretMode(self, data_new, print_updates=self.print_updates)  # True)
-		det_new = sortDetectionsCoverage(self, data_new, print_updates=self.print_updates, params_only=params_only)  # True)
-
 		if len(self.det) == 0:  # if detection dict is empty with no keys, store new detection dict
 			self.det = det_new
 
@@ -1366,294 +1331,6 @@ def calc_coverage(self, params_only=False):
 # 	return data
 
 
-# def sortDetections(self, data, print_updates=False):
-def sortDetectionsCoverage(self, data, print_updates=False, params_only=False):
-	# sort through .all and .kmall data dict and pull out outermost valid soundings, BS, and modes for each ping
-	det_key_list = ['fname', 'model', 'datetime', 'date', 'time', 'sn',
-					'y_port', 'y_stbd', 'z_port', 'z_stbd', 'bs_port', 'bs_stbd', 'rx_angle_port', 'rx_angle_stbd',
-					'ping_mode', 'pulse_form', 'swath_mode', 'frequency',
-					'max_port_deg', 'max_stbd_deg', 'max_port_m', 'max_stbd_m',
-					'tx_x_m', 'tx_y_m', 'tx_z_m',  'tx_r_deg', 'tx_p_deg', 'tx_h_deg',
-					'rx_x_m', 'rx_y_m', 'rx_z_m',  'rx_r_deg', 'rx_p_deg', 'rx_h_deg',
-					'aps_num', 'aps_x_m', 'aps_y_m', 'aps_z_m', 'wl_z_m',
-					'bytes', 'fsize', 'fsize_wc']  #, 'skm_hdr_datetime', 'skm_raw_datetime']
-					# yaw stabilization mode, syn
-
-	det = {k: [] for k in det_key_list}
-
-	# examine detection info across swath, find outermost valid soundings for each ping
-	# here, each det entry corresponds to two outermost detections (port and stbd) from one ping, with parameters that
-	# are applied for both soundings; detection sorting in the accuracy plotter extends the detection dict for all valid
-	# detections in each ping, with parameters extended for each (admittedly inefficient, but easy for later sorting)
-	for f in range(len(data)):  # loop through all data
-		if print_updates:
-			print('Finding outermost valid soundings in file', data[f]['fname'])
-
-		# set up keys for dict fields of interest from parsers for each file type (.all or .kmall)
-		ftype = data[f]['fname'].rsplit('.', 1)[1]
-		key_idx = int(ftype == 'kmall')  # keys in data dicts depend on parser used, get index to select keys below
-		det_int_threshold = [127, 0][key_idx]  # threshold for valid sounding (.all  <128 and .kmall == 0)
-		det_int_key = ['RX_DET_INFO', 'detectionType'][key_idx]  # key for detect info depends on ftype
-		depth_key = ['RX_DEPTH', 'z_reRefPoint_m'][key_idx]  # key for depth
-		across_key = ['RX_ACROSS', 'y_reRefPoint_m'][key_idx]  # key for acrosstrack distance
-		bs_key = ['RX_BS', 'reflectivity1_dB'][key_idx]  # key for backscatter in dB
-		bs_scale = [0.1, 1][key_idx]  # backscatter scale in X dB; multiply parsed value by this factor for dB
-		# bs_key = ['RS_BS', 'reflectivity2_dB'][key_idx]  # key for backscatter in dB TESTING KMALL REFLECTIVITY 2
-		angle_key = ['RX_ANGLE', 'beamAngleReRx_deg'][key_idx]  # key for RX angle re RX array
-
-		print('starting ping loop in sortDetectionsCoverage')
-
-		for p in range(len(data[f]['XYZ'])):  # loop through each ping
-			# print('in sortDetectionsCoverage, working on ping', p)
-
-			# det['fname'].append(data[f]['fname'].rsplit('/')[-1])  # store fname for each swath
-
-			if params_only:  # store zeros as placeholders to no break rest of sorting steps
-				det['fname'].append(data[f]['fname'].rsplit('/')[-1])  # store fname
-				zeros = ['y_port', 'y_stbd', 'z_port', 'z_stbd', 'bs_port', 'bs_stbd', 'rx_angle_port', 'rx_angle_stbd']
-				for k in zeros:
-					det[k].append(0)
-					# det[k].append(np.nan)  # NaN breaks plotting/colorscale steps later...
-
-			else:  # sort port and stbd data
-				det_int = data[f]['XYZ'][p][det_int_key]  # get detection integers for this ping
-				# print('********* ping', p, '************')
-				# print('det_int=', det_int)
-				# find indices of port and stbd outermost valid detections (detectionType = 0 for KMALL)
-				idx_port = 0  # start at port outer sounding
-				idx_stbd = len(det_int) - 1  # start at stbd outer sounding
-
-				while det_int[idx_port] > det_int_threshold and idx_port < len(det_int) - 1:
-					idx_port = idx_port + 1  # move port idx to stbd if not valid
-
-				while det_int[idx_stbd] > det_int_threshold and idx_stbd > 0:
-					idx_stbd = idx_stbd - 1  # move stdb idx to port if not valid
-
-				if idx_port >= idx_stbd:
-					print('XYZ datagram for ping', p, 'has no valid soundings... continuing to next ping')
-					continue
-
-				if print_updates:
-					print('Found valid dets in ping', p, 'PORT i/Y/Z=', idx_port,
-						  np.round(data[f]['XYZ'][p][across_key][idx_port]),
-						  np.round(data[f]['XYZ'][p][depth_key][idx_port]),
-						  '\tSTBD i/Y/Z=', idx_stbd,
-						  np.round(data[f]['XYZ'][p][across_key][idx_stbd]),
-						  np.round(data[f]['XYZ'][p][depth_key][idx_stbd]))
-
-				# append swath data from appropriate keys/values in data dicts
-				det['fname'].append(data[f]['fname'].rsplit('/')[-1])  # store fname for each swath
-				det['y_port'].append(data[f]['XYZ'][p][across_key][idx_port])
-				det['y_stbd'].append(data[f]['XYZ'][p][across_key][idx_stbd])
-				det['z_port'].append(data[f]['XYZ'][p][depth_key][idx_port])
-				det['z_stbd'].append(data[f]['XYZ'][p][depth_key][idx_stbd])
-				det['bs_port'].append(data[f]['XYZ'][p][bs_key][idx_port]*bs_scale)
-				det['bs_stbd'].append(data[f]['XYZ'][p][bs_key][idx_stbd]*bs_scale)
-				det['rx_angle_port'].append(data[f]['XYZ'][p][angle_key][idx_port])
-				det['rx_angle_stbd'].append(data[f]['XYZ'][p][angle_key][idx_stbd])
-
-			# store remaining system, mode, and install/runtime parameter info
-			det['ping_mode'].append(data[f]['XYZ'][p]['PING_MODE'])
-			det['pulse_form'].append(data[f]['XYZ'][p]['PULSE_FORM'])
-			det['fsize'].append(data[f]['fsize'])
-			det['fsize_wc'].append(data[f]['fsize_wc'])
-			# det['swath_mode'].append(data[f]['XYZ'][p]['SWATH_MODE'])
-
-			if ftype == 'all':  # .all store date and time from ms from midnight
-				det['model'].append(data[f]['XYZ'][p]['MODEL'])
-				det['sn'].append(data[f]['XYZ'][p]['SYS_SN'])
-				dt = datetime.datetime.strptime(str(data[f]['XYZ'][p]['DATE']), '%Y%m%d') + \
-					 datetime.timedelta(milliseconds=data[f]['XYZ'][p]['TIME'])
-				det['datetime'].append(dt)
-				det['date'].append(dt.strftime('%Y-%m-%d'))
-				det['time'].append(dt.strftime('%H:%M:%S.%f'))
-				det['swath_mode'].append(data[f]['XYZ'][p]['SWATH_MODE'])
-				det['frequency'].append(data[f]['XYZ'][p]['FREQUENCY'])
-				det['max_port_deg'].append(data[f]['XYZ'][p]['MAX_PORT_DEG'])
-				det['max_stbd_deg'].append(data[f]['XYZ'][p]['MAX_STBD_DEG'])
-				det['max_port_m'].append(data[f]['XYZ'][p]['MAX_PORT_M'])
-				det['max_stbd_m'].append(data[f]['XYZ'][p]['MAX_STBD_M'])
-				det['tx_x_m'].append(data[f]['XYZ'][p]['TX_X_M'])
-				det['tx_y_m'].append(data[f]['XYZ'][p]['TX_Y_M'])
-				det['tx_z_m'].append(data[f]['XYZ'][p]['TX_Z_M'])
-				det['tx_r_deg'].append(data[f]['XYZ'][p]['TX_R_DEG'])
-				det['tx_p_deg'].append(data[f]['XYZ'][p]['TX_P_DEG'])
-				det['tx_h_deg'].append(data[f]['XYZ'][p]['TX_H_DEG'])
-				det['rx_x_m'].append(data[f]['XYZ'][p]['RX_X_M'])
-				det['rx_y_m'].append(data[f]['XYZ'][p]['RX_Y_M'])
-				det['rx_z_m'].append(data[f]['XYZ'][p]['RX_Z_M'])
-				det['rx_r_deg'].append(data[f]['XYZ'][p]['RX_R_DEG'])
-				det['rx_p_deg'].append(data[f]['XYZ'][p]['RX_P_DEG'])
-				det['rx_h_deg'].append(data[f]['XYZ'][p]['RX_H_DEG'])
-				det['wl_z_m'].append(data[f]['XYZ'][p]['WL_Z_M'])
-				det['aps_num'].append(data[f]['XYZ'][p]['APS_NUM'])
-				det['aps_x_m'].append(data[f]['XYZ'][p]['APS_X_M'])
-				det['aps_y_m'].append(data[f]['XYZ'][p]['APS_Y_M'])
-				det['aps_z_m'].append(data[f]['XYZ'][p]['APS_Z_M'])
-				det['bytes'].append(data[f]['XYZ'][p]['BYTES_FROM_LAST_PING'])
-
-			elif ftype == 'kmall':  # .kmall store date and time from datetime object
-				det['model'].append(data[f]['HDR'][p]['echoSounderID'])
-				det['datetime'].append(data[f]['HDR'][p]['dgdatetime'])
-				det['date'].append(data[f]['HDR'][p]['dgdatetime'].strftime('%Y-%m-%d'))
-				det['time'].append(data[f]['HDR'][p]['dgdatetime'].strftime('%H:%M:%S.%f'))
-				det['aps_num'].append(-1)  # need to clarify APS number in KMALL; append -1 as placeholder
-				det['aps_x_m'].append(0)  # not needed for KMALL; append 0 as placeholder
-				det['aps_y_m'].append(0)  # not needed for KMALL; append 0 as placeholder
-				det['aps_z_m'].append(0)  # not needed for KMALL; append 0 as placeholder
-
-				# get first install param dg, assume no changes in file (have to stop logging to change install params)
-				ip_text = data[f]['IP']['install_txt'][0]
-
-				# get TX array offset text: EM304 = 'TRAI_TX1' and 'TRAI_RX1', EM2040P = 'TRAI_HD1', not '_TX1' / '_RX1'
-				# ip_tx1 = ip_text.split('TRAI_')[1].split(',')[0].strip()  # all heads/arrays split by comma
-				ip_tx1 = ip_text.split('TRAI_TX1')[1].split(',')[0].strip()  # all heads/arrays split by comma
-				det['tx_x_m'].append(float(ip_tx1.split('X=')[1].split(';')[0].strip()))  # get TX array X offset
-				det['tx_y_m'].append(float(ip_tx1.split('Y=')[1].split(';')[0].strip()))  # get TX array Y offset
-				det['tx_z_m'].append(float(ip_tx1.split('Z=')[1].split(';')[0].strip()))  # get TX array Z offset
-				det['tx_r_deg'].append(float(ip_tx1.split('R=')[1].split(';')[0].strip()))  # get TX array roll
-				det['tx_p_deg'].append(float(ip_tx1.split('P=')[1].split(';')[0].strip()))  # get TX array pitch
-				det['tx_h_deg'].append(float(ip_tx1.split('H=')[1].split(';')[0].strip()))  # get TX array heading
-
-				ip_rx1 = ip_text.split('TRAI_RX1')[1].split(',')[0].strip()  # all heads/arrays split by comma
-				det['rx_x_m'].append(float(ip_rx1.split('X=')[1].split(';')[0].strip()))  # get RX array X offset
-				det['rx_y_m'].append(float(ip_rx1.split('Y=')[1].split(';')[0].strip()))  # get RX array Y offset
-				det['rx_z_m'].append(float(ip_rx1.split('Z=')[1].split(';')[0].strip()))  # get RX array Z offset
-				det['rx_r_deg'].append(float(ip_rx1.split('R=')[1].split(';')[0].strip()))  # get RX array roll
-				det['rx_p_deg'].append(float(ip_rx1.split('P=')[1].split(';')[0].strip()))  # get RX array pitch
-				det['rx_h_deg'].append(float(ip_rx1.split('H=')[1].split(';')[0].strip()))  # get RX array heading
-
-				det['wl_z_m'].append(float(ip_text.split('SWLZ=')[-1].split(',')[0].strip()))  # get waterline Z offset
-
-				# get serial number from installation parameter: 'SN=12345'
-				sn = ip_text.split('SN=')[1].split(',')[0].strip()
-				det['sn'].append(sn)
-
-				# det['bytes'].append(0)  # bytes since last ping not handled yet for KMALL
-				# det['bytes'].append(data[f]['XYZ'][p]['BYTES_FROM_LAST_PING'])
-				det['bytes'].append(data[f]['XYZ'][p]['bytes_from_last_ping'])
-				# print('at byte logging step, data[f][XYZ][p] =', data[f]['XYZ'][p])
-
-				# det['bytes'].append(data[f]['XYZ'][p]['start_byte'])
-
-				# print('just appended KMALL bytes: ', det['bytes'][-1])
-
-				# get index of latest runtime parameter timestamp prior to ping of interest; default to 0 for cases
-				# where earliest pings in file might be timestamped earlier than first runtime parameter datagram
-				# print('working on data f IOP dgdatetime:', data[f]['IOP']['dgdatetime'])
-				# print('IOP is', data[f]['IOP'])
-				# print('IOP keys are:', data[f]['IOP'].keys())
-				# IOP_idx = max([i for i, t in enumerate(data[f]['IOP']['dgdatetime']) if
-				# 			   t <= data[f]['HDR'][p]['dgdatetime']], default=0)
-				# print('IOP dgdatetime =', data[f]['IOP']['header'][0]['dgdatetime'])
-				# print('HDR dgdatetime =', data[f]['HDR'][p]['dgdatetime'])
-
-
-				### ORIGINAL METHOD
-				# IOP_times = [data[f]['IOP']['header'][j]['dgdatetime'] for j in range(len(data[f]['IOP']['header']))]
-				# IOP_idx = max([i for i, t in enumerate(IOP_times) if
-				# 			   t <= data[f]['HDR'][p]['dgdatetime']], default=0)
-				#
-				# # if data[f]['IOP']['dgdatetime'][IOP_idx] > data[f]['HDR'][p]['dgdatetime']:
-				# # 	print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
-				#
-				# if data[f]['IOP']['header'][IOP_idx]['dgdatetime'] > data[f]['HDR'][p]['dgdatetime']:
-				# 	print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
-				########
-
-				#### TEST FROM SWATH ACC SORTING
-				IOP_headers = data[f]['IOP']['header']  # get list of IOP header dicts in new kmall module output
-				IOP_datetimes = [IOP_headers[d]['dgdatetime'] for d in range(len(IOP_headers))]
-				# print('got IOP datetimes =', IOP_datetimes)
-
-				# print('working on ping header times')
-				# print('data[f][HDR] =', data[f]['HDR'])
-				# print('HDR ping dgdatetime is', data[f]['HDR'][p]['dgdatetime'])
-
-				# MRZ_headers = data[f]['HDR']['header']
-				MRZ_headers = data[f]['HDR']
-				MRZ_datetimes = [MRZ_headers[d]['dgdatetime'] for d in range(len(MRZ_headers))]
-
-				# find index of last IOP datagram before current ping, default to first if
-				IOP_idx = max([i for i, t in enumerate(IOP_datetimes) if
-							   t <= MRZ_datetimes[p]], default=0)
-
-				if IOP_datetimes[IOP_idx] > MRZ_datetimes[p]:
-					print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
-				##### END TEST FROM SWATH ACC SORTING
-
-
-				# get runtime text from applicable IOP datagram, split and strip at keywords and append values
-				# rt = data[f]['IOP']['RT'][IOP_idx]  # get runtime text for splitting
-				rt = data[f]['IOP']['runtime_txt'][IOP_idx]
-
-				# print('rt = ', rt)
-
-				# dict of keys for detection dict and substring to split runtime text at entry of interest
-				rt_dict = {'max_port_deg': 'Max angle Port:', 'max_stbd_deg': 'Max angle Starboard:',
-						   'max_port_m': 'Max coverage Port:', 'max_stbd_m': 'Max coverage Starboard:'}
-
-				# iterate through rt_dict and append value from split/stripped runtime text
-				# print('starting runtime parsing for kmall file')
-				for k, v in rt_dict.items():  # parse only parameters that can be converted to floats
-					try:
-						det[k].append(float(rt.split(v)[-1].split('\n')[0].strip()))
-
-					except:
-						det[k].append('NA')
-
-				# parse swath mode text
-				try:
-					dual_swath_mode = rt.split('Dual swath:')[-1].split('\n')[0].strip()
-					# print('kmall dual_swath_mode =', dual_swath_mode)
-					if dual_swath_mode == 'Off':
-						swath_mode = 'Single Swath'
-
-					else:
-						swath_mode = 'Dual Swath (' + dual_swath_mode + ')'
-
-				except:
-					swath_mode = 'NA'
-
-				det['swath_mode'].append(swath_mode)
-
-				# parse frequency from runtime parameter text, if available
-				try:
-					# print('trying to split runtime text')
-					frequency_rt = rt.split('Frequency:')[-1].split('\n')[0].strip().replace('kHz', ' kHz')
-					# print('frequency string from runtime text =', frequency_rt)
-
-				except:  # use default frequency stored from interpretMode
-					# print('using default frequency')
-					pass
-					# frequency = 'NA'
-
-				# store parsed freq if not empty, otherwise store default
-				frequency = frequency_rt if frequency_rt else data[f]['XYZ'][p]['FREQUENCY']
-				det['frequency'].append(frequency)
-
-				if print_updates:
-					# print('found IOP_idx=', IOP_idx, 'with IOP_datetime=', data[f]['IOP']['dgdatetime'][IOP_idx])
-					print('found IOP_idx=', IOP_idx, 'with IOP_datetime=', IOP_datetimes[IOP_idx])
-					print('max_port_deg=', det['max_port_deg'][-1])
-					print('max_stbd_deg=', det['max_stbd_deg'][-1])
-					print('max_port_m=', det['max_port_m'][-1])
-					print('max_stbd_m=', det['max_stbd_m'][-1])
-					print('swath_mode=', det['swath_mode'][-1])
-
-			else:
-				print('UNSUPPORTED FTYPE --> NOT SORTING DETECTION!')
-
-		# print('using bs_key =', bs_key, ' --> bs_port, bs_stbd:', det['bs_port'], det['bs_stbd'])
-
-	if print_updates:
-		print('\nDone sorting detections...')
-
-	# print('leaving sortDetectionsCoverage with det[frequency] =', det['frequency'])
-
-	return det
-
-
 def update_axes(self):
 	# adjust x and y axes and plot title
 	update_system_info(self, self.det, force_update=False, fname_str_replace='_trimmed')
@@ -1,30 +1,274 @@
 """General swath data handling functions for NOAA / MAC echosounder assessment tools"""
 
 import multibeam_tools.libs.parseEM
+import multibeam_tools.libs.em_io
+import multibeam_tools.libs.parse_cache
+import os
 import struct
 import numpy as np
+import multiprocessing
+import io
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from copy import deepcopy
+from functools import lru_cache
 from kmall.KMALL import kmall
 import utm
+import pyproj
 
 
-def readALLswath(self, filename, print_updates=False, parse_outermost_only=False, parse_params_only=False):
+class SwathData:
+	# columnar store of the pings and soundings parsed from one .all or .kmall file (readALLswath, readKMALLswath);
+	# ping fields (time, ping counter, modes, heading, position, number of beams, etc.) are arrays with one entry per ping
+	# and sounding fields are flat arrays of all soundings in the file, with the soundings of ping p stored in
+	# [ping_start[p]:ping_start[p+1]] (as in compressed sparse row storage); runtime and installation parameters are
+	# stored once per datagram in param tables (e.g., param['RTP'][key]) that are referenced by a ping field of indices
+	# (e.g., ping['RTP_IDX']) rather than copied to every ping
+	def __init__(self, ping=None, sounding=None, ping_start=None, param=None):
+		self.ping = {} if ping is None else ping  # dict of ping field arrays
+		self.sounding = {} if sounding is None else sounding  # dict of sounding field arrays
+		self.param = {} if param is None else param  # dict of param tables (dicts of field arrays)
+
+		if ping_start is None:  # no soundings stored for these pings
+			num_pings = len(next(iter(self.ping.values()))) if self.ping else 0
+			ping_start = np.zeros(num_pings + 1, dtype=np.int64)
+
+		self.ping_start = np.asarray(ping_start, dtype=np.int64)
+
+	def __len__(self):  # number of pings
+		return len(self.ping_start) - 1
+
+	@staticmethod
+	def column(values):
+		# make a field array from a list of values; numeric and text fields become numeric and str arrays, but mixed
+		# values (e.g., installation parameters that are not found are stored as 'N/A') are kept as Python objects
+		values = list(values)
+		num_str = sum(isinstance(v, str) for v in values)
+
+		if 0 < num_str < len(values):
+			col = np.empty(len(values), dtype=object)
+			col[:] = values
+			return col
+
+		return np.array(values)
+
+	@classmethod
+	def from_pings(cls, pings, sounding_keys=None, param=None):
+		# build from a list of per-ping dicts as returned by the datagram parsers; sounding fields (by default, all list or
+		# array fields) are concatenated and other scalar fields are stored as ping fields (e.g., datetime objects are not)
+		if len(pings) == 0:
+			return cls(param=param)
+
+		if sounding_keys is None:
+			sounding_keys = [k for k, v in pings[0].items() if isinstance(v, (list, np.ndarray))]
+
+		ping_keys = [k for k, v in pings[0].items() if np.isscalar(v) and k not in sounding_keys]
+		num_soundings = [len(p[sounding_keys[0]]) for p in pings] if sounding_keys else [0] * len(pings)
+
+		ping = {k: cls.column([p[k] for p in pings]) for k in ping_keys}
+		sounding = {k: np.concatenate([np.asarray(p[k]) for p in pings]) for k in sounding_keys}
+		ping_start = np.concatenate(([0], np.cumsum(num_soundings)))
+
+		return cls(ping, sounding, ping_start, param)
+
+	def num_soundings(self):  # number of soundings stored for each ping
+		return np.diff(self.ping_start)
+
+	def sounding_ping(self):  # ping index of each sounding
+		return np.repeat(np.arange(len(self)), self.num_soundings())
+
+	def sounding_beam(self):  # index of each sounding within its ping
+		return np.arange(self.ping_start[-1]) - np.repeat(self.ping_start[:-1], self.num_soundings())
+
+	def grid(self, values, fill=np.nan):
+		# arrange an array of values for each sounding (e.g., a sounding field or a mask) in a 2-D array of pings x beams,
+		# padded with fill after the last sounding of each ping, for operations across the beams of all pings at once;
+		# the grid has at least one beam, so reductions across beams (e.g., argmax) are defined for empty pings
+		values = np.asarray(values)
+		grid = np.full((len(self), max(self.num_soundings().max(initial=0), 1)), fill,
+					   dtype=np.result_type(values, np.asarray(fill)))
+		grid[self.sounding_ping(), self.sounding_beam()] = values
+
+		return grid
+
+	def get(self, key):
+		# return a ping field, or a param field looked up for each ping through the param table index (e.g., the most
+		# recent runtime parameter MAX_PORT_DEG for each ping is param['RTP']['MAX_PORT_DEG'][ping['RTP_IDX']])
+		if key in self.ping:
+			return self.ping[key]
+
+		for name, table in self.param.items():
+			if key in table:
+				idx = self.ping[name + '_IDX']
+				if np.any(idx < 0):  # negative indices would wrap to the last param datagram in the file
+					raise KeyError(key + ' (no ' + name + ' datagram before some pings)')
+
+				return table[key][idx]
+
+		raise KeyError(key)
+
+
+PARSE_WORKERS = os.cpu_count() or 1  # number of worker processes for parsing files in parallel
+
+
+class ParseLog:
+	# stand-in for the GUI (self) passed to parsers and sorting functions in worker processes; log entries are stored and
+	# returned with the results so they can be added to the GUI log by the main process
+	def __init__(self):
+		self.entries = []
+
+	def update_log(self, entry, font_color='black'):
+		self.entries.append(entry)
+
+
+def parse_files_parallel(fnames, parse_fun, *args, num_workers=PARSE_WORKERS):
+	# run parse_fun(fname, *args) for each file in worker processes (one file per task) and yield (index in fnames,
+	# result) as each file is finished, so the caller can update the GUI; results arrive in any order and must be stored
+	# by index to keep the order of fnames; exceptions raised by parse_fun are yielded in place of the result
+	# workers are spawned (not forked) so they do not inherit the state of the GUI process; parse_fun must be a module
+	# level function that can be pickled, and it cannot access the GUI (see swath_parse, which is imported by workers
+	# without Qt or matplotlib); a single file (or num_workers=1) is parsed in this process to avoid starting a worker;
+	# no more workers are started than there are files
+	num_workers = max(1, min(num_workers, len(fnames)))
+
+	if num_workers == 1:
+		for f, fname in enumerate(fnames):
+			try:
+				result = parse_fun(fname, *args)
+
+			except Exception as e:
+				result = e
+
+			yield f, result
+
+		return
+
+	with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+		futures = {executor.submit(parse_fun, fname, *args): f for f, fname in enumerate(fnames)}
+
+		for future in as_completed(futures):
+			try:
+				result = future.result()
+
+			except Exception as e:
+				result = e
+
+			yield futures[future], result
+
+
+def parse_exception_str(e):
+	# exception yielded by parse_files_parallel as text for the log, with the traceback (including the traceback from
+	# the worker process, which is attached as the cause of exceptions raised in workers)
+	return repr(e) + '\n' + ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+
+
+def match_pings(sn, counter, dt, sn_ref, counter_ref, dt_ref):
+	# return the index of the reference datagram (e.g., RRA 78) matching each ping (e.g., XYZ 88) by system serial number
+	# and ping counter, or -1 if there is no match; keys are joined by searching the sorted reference keys, and if a key
+	# is repeated (e.g., the 16-bit ping counter wraps in a long file) the reference datagram nearest in time is used
+	key = (np.asarray(sn, dtype=np.int64) << 16) | np.asarray(counter, dtype=np.int64)
+	key_ref = (np.asarray(sn_ref, dtype=np.int64) << 16) | np.asarray(counter_ref, dtype=np.int64)
+	dt, dt_ref = np.asarray(dt), np.asarray(dt_ref)
+	idx = np.full(len(key), -1, dtype=np.int64)
+
+	if len(key_ref) == 0:
+		return idx
+
+	# combine key and time in one sortable integer from the ranks of the keys and times of the pings and references
+	key_rank = np.unique(np.concatenate((key_ref, key)), return_inverse=True)[1].ravel()
+	time_rank = np.unique(np.concatenate((dt_ref, dt)), return_inverse=True)[1].ravel()
+	key_time = key_rank*(time_rank.max() + 1) + time_rank
+	key_time_ref, key_time = key_time[:len(key_ref)], key_time[len(key_ref):]
+
+	order = np.argsort(key_time_ref, kind='stable')  # sort by key, then time
+	key_sorted, key_time_sorted = key_ref[order], key_time_ref[order]
+	lo = np.searchsorted(key_sorted, key, side='left')
+	hi = np.searchsorted(key_sorted, key, side='right')
+	found = hi > lo
+
+	# nearest in time of the first reference at or after the ping time and the first reference of the last time before
+	# the ping time, within the references with the same key (only one candidate at the start or end of the key)
+	after = np.searchsorted(key_time_sorted, key_time, side='left')
+	before = np.maximum(after - 1, lo)
+	before = np.searchsorted(key_time_sorted, key_time_sorted[np.minimum(before, len(order) - 1)], side='left')
+	after = np.minimum(after, hi - 1)
+
+	dt_before = np.abs(dt_ref[order[before[found]]] - dt[found])
+	dt_after = np.abs(dt_ref[order[after[found]]] - dt[found])
+	idx[found] = order[np.where(dt_before <= dt_after, before[found], after[found])]
+
+	return idx
+
+
+UTM_ZONE_LETTERS = np.array(list('CDEFGHJKLMNPQRSTUVWXX'))  # latitude bands of 8 deg from 80 S (X extends to 84 N)
+
+
+def utm_zones(lat, lon):
+	# return UTM zone numbers and letters for arrays of lat/lon, using the same zone selection as utm.from_latlon for
+	# each point (including the exceptions for southwest Norway and Svalbard)
+	lat = np.asarray(lat, dtype=np.float64)
+	lon = (np.asarray(lon, dtype=np.float64) % 360 + 540) % 360 - 180  # normalize to [-180, 180)
+	zone = ((lon + 180)/6).astype(np.int64) + 1
+	zone[(lat >= 56) & (lat < 64) & (lon >= 3) & (lon < 12)] = 32
+
+	svalbard = (lat >= 72) & (lat <= 84) & (lon >= 0) & (lon < 42)
+	zone[svalbard] = np.array([31, 33, 35, 37])[np.searchsorted([9, 21, 33], lon[svalbard], side='right')]
+	letter = UTM_ZONE_LETTERS[np.clip(((lat + 80)//8).astype(np.int64), 0, UTM_ZONE_LETTERS.size - 1)]
+
+	return zone, letter
+
+
+@lru_cache(maxsize=None)
+def utm_transformer(zone, south):
+	# transformer from WGS84 lon/lat to easting/northing in a UTM zone (with 10,000 km false northing in the southern
+	# hemisphere, as in utm.from_latlon); transformers are created once per zone and reused
+	return pyproj.Transformer.from_crs('EPSG:4326', 'EPSG:' + str((32700 if south else 32600) + zone), always_xy=True)
+
+
+def latlon_to_utm(lat, lon):
+	# convert arrays of lat/lon to UTM easting, northing, and zone (e.g., '19T') for each point, as utm.from_latlon;
+	# points are grouped by zone (np.unique) and each group is projected at once, so lines crossing a zone boundary
+	# keep the zone of each point (as when converting one point at a time)
+	lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+	zone, letter = utm_zones(lat, lon)
+	south = letter < 'N'
+	zones, zone_idx = np.unique(zone*2 + south, return_inverse=True)
+	zone_idx = zone_idx.ravel()
+	e, n = np.empty(lat.size), np.empty(lat.size)
+
+	for z, zone_south in enumerate(zones.tolist()):
+		idx = np.flatnonzero(zone_idx == z)
+		e[idx], n[idx] = utm_transformer(zone_south // 2, bool(zone_south % 2)).transform(lon[idx], lat[idx])
+
+	return e, n, np.char.add(zone.astype(str), letter)
+
+
+def readALLswath(self, filename, print_updates=False, parse_outermost_only=False, parse_params_only=False,
+				 use_cache=True, verify_checksum=True):
 	# parse .all swath data and relevant parameters for:
 	# 1. coverage (outermost soundings only)
 	# 2. accuracy assessment (full swath)
 	# 3. runtime and installation parameters only (parameter tracking, no swath data)
-	# note that position is returned for all cases
-	# note that acquisition parameters and raw range and angle data are copied to the ping data/time, and are not stored
-	# separately for these purposes (this is slower/larger, but simpler for sorting in coverage or accuracy testing)
-	# likewise, if params only are parsed, the most recent RTP or IP data are copied to the next valid ping time (and
-	# ensuing XYZ datagrams are skipped until another param datagram is found; no swath data are parsed or stored)
+	# note that position is returned for all cases except params only
+	# note that swath data are returned as SwathData in data['XYZ'], with RX angles from the raw range and angle data
+	# stored with the soundings and the most recent runtime and installation params referenced by index from each ping
+	# likewise, if params only are parsed, the most recent RTP or IP data are referenced by the next valid ping (and
+	# ensuing XYZ datagrams are skipped until another param datagram is found; no swath data are parsed or stored);
+	# in this case, only the param datagrams and the ping info of the next XYZ 88 are read, using the datagram index
+	# if verify_checksum, datagrams with checksums that do not match their contents are skipped as corrupt
+	# if use_cache, the parsed data are stored in (and reloaded from) the parse cache for this file and parse mode
+	cache_mode = '.all ' + ('params' if parse_params_only else 'outermost' if parse_outermost_only else 'full') + \
+				 (' checksum' if verify_checksum else '')
+	if use_cache:
+		data = multibeam_tools.libs.parse_cache.load(filename, cache_mode, log=self)
+		if data is not None:
+			return data
+
 	print("\nParsing file:", filename)
-	f = open(filename, 'rb')
-	raw = f.read()
-	len_raw = len(raw)
+	len_raw = os.path.getsize(filename)
 
 	# initialize data dict with remaining datagram fields
-	data = {'fname': filename, 'XYZ': {}, 'RTP': {}, 'RRA': {}, 'IP': {}, 'POS': {}}
+	data = {'fname': filename, 'XYZ': {}, 'RTP': {}, 'RRA': {}, 'IP': {}, 'POS': {}, 'DIAG': {}}
 
 	# dicts of 'new' and 'as parsed' names for runtime and installation params (for downstream sorting/plotting steps)
 	rtp_fields = {'MODE': 'MODE',
@@ -37,162 +281,173 @@ def readALLswath(self, filename, print_updates=False, parse_outermost_only=False
 				 'RX_R_DEG': 'S2R', 'RX_P_DEG': 'S2P', 'RX_H_DEG': 'S2H',
 				 'WL_Z_M': 'WLZ'}
 
-	# Declare counters for dg starting byte counter and dg processing counter
-	dg_start = 0  # datagram (starting with STX = 2) starts at byte 4
+	# Declare counters for dg processing
 	parse_prog_old = -1
-	loop_num = 0
 	last_dg_start = 0  # store number of bytes since last XYZ88 datagram
 	skip_xyz = parse_params_only
+	pings = []  # XYZ dicts of stored pings, converted to SwathData columns after parsing
+	ping_rtp_idx, ping_ip_idx, ping_bytes = [], [], []  # most recent params and bytes since last ping for each ping
+	num_xyz_no_params = 0  # XYZ 88 pings skipped before the first RTP 82 and IP 73 (e.g., file split mid-line)
 
-	# Assign and parse datagram
-	# while dg_start <= len_raw:  # and dg_count < 10:
-	while True:
-		loop_num = loop_num + 1
+	skipped = []  # byte ranges of corrupt or truncated data skipped while indexing the file
+	if parse_params_only:  # jump to IP start/stop and RTP datagrams and the next XYZ 88 datagram after each
+		datagrams = multibeam_tools.libs.em_io.iter_param_datagrams(filename, param_ids=[73, 82, 105], ping_id=88,
+																	verify_checksum=verify_checksum, skipped=skipped)
 
+	else:
+		datagrams = multibeam_tools.libs.em_io.iter_datagrams(filename, ids=[73, 78, 80, 82, 88, 105],
+															  verify_checksum=verify_checksum, skipped=skipped)
+
+	# Assign and parse datagram (datagrams are parsed from slices of the mapped file; others are skipped by the iterator)
+	for dg_start, dg_ID, dg in datagrams:
 		# print progress update
 		parse_prog = round(10 * dg_start / len_raw)
 		if parse_prog > parse_prog_old:
-			print("%s%%" % (parse_prog * 10) + ('\n' if parse_prog == 10 else ''), end=" ", flush=True)
+			print("%s%%" % (parse_prog * 10), end=" ", flush=True)
 			parse_prog_old = parse_prog
 
-		if dg_start + 4 >= len_raw:  # break if EOF
-			break
-
-		dg_len = struct.unpack('I', raw[dg_start:dg_start + 4])[0]  # get dg length (before start of dg at STX)
-
-		# skip to next iteration if dg length is insufficient to check for STX, ID, and ETX, or dg end is beyond EOF
-		if dg_len < 3:
-			dg_start = dg_start + 4
-			continue
-
-		dg_end = dg_start + 4 + dg_len
-
-		if dg_end > len_raw:
-			dg_start = dg_start + 4
-			continue
-
-		# if dg_end <= len_raw:  # try to read dg if len seems reasonable and not EOF
-		dg = raw[dg_start + 4:dg_end]  # get STX, ID, and ETX
-		dg_STX = dg[0]
-		dg_ID = dg[1]
-		dg_ETX = dg[-3]
-
-		# continue unpacking only if STX and ETX are valid and dg_ID is Runtime Param or XYZ datagram
-		if dg_STX == 2 and dg_ETX == 3:
-
-			# print('found valid STX and ETX in loop number', loop_num)
-
-			if dg_ID in [73, 82, 105]:
-				if print_updates:
-					print('-> found dg_ID = 73, 82, or 105 --> changing skip_xyz to FALSE')
-				skip_xyz = False
+		if dg_ID in [73, 82, 105]:
+			if print_updates:
+				print('-> found dg_ID = 73, 82, or 105 --> changing skip_xyz to FALSE')
+			skip_xyz = False
 
-			if dg_ID in [73, 105]:
-				# print(len(data['IP_start'].keys()))
-				data['IP'][len(data['IP'])] = multibeam_tools.libs.parseEM.IP_dg(dg)
+		if dg_ID in [73, 105]:
+			# print(len(data['IP_start'].keys()))
+			data['IP'][len(data['IP'])] = multibeam_tools.libs.parseEM.IP_dg(dg)
 
-				# if dg_ID == 73:
-				# 	update_log(self, 'Found TX Z offset = ' + str(data['IP'][len(data['IP']) - 1]['S1Z']) +
-				# 			   ' m and Waterline offset = ' + str(data['IP'][len(data['IP']) - 1]['WLZ']) + ' m')
+			# if dg_ID == 73:
+			# 	update_log(self, 'Found TX Z offset = ' + str(data['IP'][len(data['IP']) - 1]['S1Z']) +
+			# 			   ' m and Waterline offset = ' + str(data['IP'][len(data['IP']) - 1]['WLZ']) + ' m')
 
-			# parse RRA 78 datagram to get RX beam angles
-			if dg_ID == 78 and not parse_params_only:
-				# FUTURE: MODIFY RRA PARSER WITH PARSE_OUTERMOST_ONLY OPTION TO SPEED UP
-				if print_updates:
-					print('parsing RRA datagram')
-				data['RRA'][len(data['RRA'])] = multibeam_tools.libs.parseEM.RRA_78_dg(dg)
+		# parse RRA 78 datagram to get RX beam angles
+		if dg_ID == 78 and not parse_params_only:
+			# FUTURE: MODIFY RRA PARSER WITH PARSE_OUTERMOST_ONLY OPTION TO SPEED UP
+			if print_updates:
+				print('parsing RRA datagram')
+			data['RRA'][len(data['RRA'])] = multibeam_tools.libs.parseEM.RRA_78_dg(dg)
 
-			# parse POS 80 datagram
-			if dg_ID == 80:
-				data['POS'][len(data['POS'])] = multibeam_tools.libs.parseEM.POS_dg(dg)
+		# parse POS 80 datagram
+		if dg_ID == 80:
+			data['POS'][len(data['POS'])] = multibeam_tools.libs.parseEM.POS_dg(dg)
 
-			# Parse RUNTIME PARAM datagram PYTHON 3
-			if dg_ID == 82:
-				data['RTP'][len(data['RTP'])] = multibeam_tools.libs.parseEM.RTP_dg(dg)
+		# Parse RUNTIME PARAM datagram PYTHON 3
+		if dg_ID == 82:
+			data['RTP'][len(data['RTP'])] = multibeam_tools.libs.parseEM.RTP_dg(dg)
 
-			# Parse XYZ 88 datagram PYTHON 3
-			if dg_ID == 88 and not skip_xyz:  # skip if not needed to store last param update
+		# skip XYZ 88 datagrams with no preceding runtime and installation params to reference (params unknown)
+		if dg_ID == 88 and not skip_xyz and (len(data['RTP']) == 0 or len(data['IP']) == 0):
+			num_xyz_no_params += 1
 
-				XYZ_temp = multibeam_tools.libs.parseEM.XYZ_dg(dg, parse_outermost_only=parse_outermost_only,
-															   parse_ping_info_only=parse_params_only)
+		# Parse XYZ 88 datagram PYTHON 3
+		elif dg_ID == 88 and not skip_xyz:  # skip if not needed to store last param update
 
-				if XYZ_temp != []:  # store only if valid soundings are found (parser returns empty otherwise)
-					data['XYZ'][len(data['XYZ'])] = XYZ_temp
+			XYZ_temp = multibeam_tools.libs.parseEM.XYZ_dg(dg, parse_outermost_only=parse_outermost_only,
+														   parse_ping_info_only=parse_params_only)
 
-					# store most recent runtime and installation parameters for each ping
-					n_data = len(data['XYZ'])
-					n_rtp = len(data['RTP'])
-					n_ip = len(data['IP'])
-					for new, old in rtp_fields.items():  # store runtime params with new names for downstream use
-						data['XYZ'][n_data-1][new] = data['RTP'][n_rtp-1][old]
+			if XYZ_temp != []:  # store only if valid soundings are found (parser returns empty otherwise)
+				pings.append(XYZ_temp)
 
-					for new, old in ip_fields.items():  # store installation params with new names for downstream use
-						data['XYZ'][n_data-1][new] = data['IP'][n_ip-1][old]
+				# store index of most recent runtime and installation parameters for each ping
+				ping_rtp_idx.append(len(data['RTP']) - 1)
+				ping_ip_idx.append(len(data['IP']) - 1)
 
-					# soundings referenced to Z of TX array, X and Y of active positioning system;
-					# store active positioning system offsets
-					# print('APS number =', data['IP'][len(data['IP']) - 1]['APS'])
-					APS_num = int(data['IP'][len(data['IP'])-1]['APS']+1)  # act pos num (0-2): dg field P#Y (1-3)
-					data['XYZ'][len(data['XYZ'])-1]['APS_NUM'] = APS_num
-					data['XYZ'][len(data['XYZ'])-1]['APS_X_M'] = data['IP'][len(data['IP'])-1]['P' + str(APS_num) + 'X']
-					data['XYZ'][len(data['XYZ'])-1]['APS_Y_M'] = data['IP'][len(data['IP'])-1]['P' + str(APS_num) + 'Y']
-					data['XYZ'][len(data['XYZ'])-1]['APS_Z_M'] = data['IP'][len(data['IP'])-1]['P' + str(APS_num) + 'Z']
+				# store bytes since last ping
+				ping_bytes.append(dg_start - last_dg_start)
+				last_dg_start = dg_start  # update ping byte gap tracker
 
-					# store bytes since last ping
-					data['XYZ'][len(data['XYZ']) - 1]['BYTES_FROM_LAST_PING'] = dg_start - last_dg_start
-					last_dg_start = dg_start  # update ping byte gap tracker
+			if print_updates:
+				print('XYZ update ', len(pings), 'swath limits (port/stbd):',
+					  data['RTP'][len(data['RTP']) - 1]['MAX_PORT_COV'], '/',
+					  data['RTP'][len(data['RTP']) - 1]['MAX_STBD_COV'], 'deg and',
+					  data['RTP'][len(data['RTP']) - 1]['MAX_PORT_SWATH'], '/',
+					  data['RTP'][len(data['RTP']) - 1]['MAX_STBD_SWATH'], 'meters')
 
+			if parse_params_only:  # reset to skip upcoming XYZ datagrams until after another params datagram
 				if print_updates:
-					print('XYZ update ', len(data['XYZ']), 'swath limits (port/stbd):',
-						  data['XYZ'][len(data['XYZ']) - 1]['MAX_PORT_DEG'], '/',
-						  data['XYZ'][len(data['XYZ']) - 1]['MAX_STBD_DEG'], 'deg and',
-						  data['XYZ'][len(data['XYZ']) - 1]['MAX_PORT_M'], '/',
-						  data['XYZ'][len(data['XYZ']) - 1]['MAX_STBD_M'], 'meters')
-
-				if parse_params_only:  # reset to skip upcoming XYZ datagrams until after another params datagram
-					if print_updates:
-						print('---> resetting skip_xyz to TRUE after parsing XYZ')
-					skip_xyz = True
-
-			# if there was a valid STX and ETX, jump to end of dg and continue on next iteration
-			dg_start = dg_start + dg_len + 4
-			continue
-
-		# if no condition was met to read and jump ahead not valid, move ahead by 1 and continue search
-		# (will start read dg_len at -4 on next loop)
-		dg_start = dg_start + 1
-	# print('STX or ETX not valid, moving ahead by 1 to new dg_start', dg_start)
-
-	# loop through the XYZ and RRA data, store angles re RX array associated with each outermost sounding;
+					print('---> resetting skip_xyz to TRUE after parsing XYZ')
+				skip_xyz = True
+
+	print('' if parse_prog_old == 10 else '100%')  # finish progress updates at EOF
+
+	# record byte ranges that were not part of any valid datagram (e.g., corrupt data or a truncated final datagram)
+	data['DIAG']['SKIPPED_BYTES'] = np.array(skipped, dtype=np.int64).reshape(-1, 2)
+	if skipped:
+		print('WARNING: skipped', len(skipped), 'corrupt or truncated byte range(s) in', filename, '(start, stop):',
+			  skipped[:10])
+
+	data['DIAG']['XYZ_NO_PARAMS'] = num_xyz_no_params
+	if num_xyz_no_params > 0:
+		print('WARNING: skipped', num_xyz_no_params, 'XYZ 88 ping(s) before the first runtime (82) and installation (73)'
+			  ' parameter datagrams in', filename)
+
+	# store runtime and installation params once per datagram with new names for downstream use
+	RTP_list = [data['RTP'][i] for i in range(len(data['RTP']))]
+	IP_list = [data['IP'][i] for i in range(len(data['IP']))]
+	param = {'RTP': {new: SwathData.column([RTP[old] for RTP in RTP_list]) for new, old in rtp_fields.items()},
+			 'IP': {new: SwathData.column([IP[old] for IP in IP_list]) for new, old in ip_fields.items()}}
+
+	# soundings referenced to Z of TX array, X and Y of active positioning system;
+	# store active positioning system offsets
+	APS_num = [int(IP['APS']+1) for IP in IP_list]  # act pos num (0-2): dg field P#Y (1-3)
+	param['IP']['APS_NUM'] = SwathData.column(APS_num)
+	for axis in ['X', 'Y', 'Z']:
+		param['IP']['APS_' + axis + '_M'] = SwathData.column([IP['P' + str(n) + axis] for IP, n in zip(IP_list, APS_num)])
+
+	data['XYZ'] = SwathData.from_pings(pings, param=param)
+	data['XYZ'].ping['RTP_IDX'] = np.array(ping_rtp_idx, dtype=np.int64)
+	data['XYZ'].ping['IP_IDX'] = np.array(ping_ip_idx, dtype=np.int64)
+	data['XYZ'].ping['BYTES_FROM_LAST_PING'] = np.array(ping_bytes, dtype=np.int64)
+	data['XYZ'].ping['DATETIME'] = multibeam_tools.libs.em_io.all_datetime(data['XYZ'].ping.get('DATE', []),
+																			data['XYZ'].ping.get('TIME', []))
+	del pings
+
+	# match RRA 78 datagrams to XYZ 88 pings by system serial number and ping counter (so dual head pings with the same
+	# counter are matched to the RRA from the same head) and store the angles re RX array of each sounding stored;
 	# if parsing outermost soundings only, the number of RRA datagrams may exceed num of XYZ datagrams if some XYZ dg
-	# did not have valid soundings (return []); check RRA PING_COUNTER against XYZ PING_COUNTER to make new RRA ping
-	# index reference for copying RX angles in following loop
-
+	# did not have valid soundings (return []); pings and RRA datagrams without a match are recorded in data['DIAG']
+	# and RX angles are NaN for soundings in pings without a matching RRA datagram
 	if not parse_params_only:
-		pXYZ = [data['XYZ'][p]['PING_COUNTER'] for p in range(len(data['XYZ']))]
-		pRRA = [p for p in range(len(data['RRA'])) if data['RRA'][p]['PING_COUNTER'] in pXYZ]
-		# print('pXYZ has len and =', len(pXYZ), pXYZ)
-		# print('pRRA has len and =', len(pRRA), pRRA)
-
-		for p in range(len(data['XYZ'])):
-			# data['XYZ'][p]['RX_ANGLE_PORT'] = data['RRA'][p]['RX_ANGLE'][data['XYZ'][p]['RX_BEAM_IDX_PORT']]/100
-			# data['XYZ'][p]['RX_ANGLE_STBD'] = data['RRA'][p]['RX_ANGLE'][data['XYZ'][p]['RX_BEAM_IDX_STBD']]/100
-
-			# use reduced RRA ping reference indices to ensure same PING_COUNTER for XYZ and RRA dg
-			if parse_outermost_only:
-				data['XYZ'][p]['RX_ANGLE_PORT'] = data['RRA'][pRRA[p]]['RX_ANGLE'][data['XYZ'][p]['RX_BEAM_IDX_PORT']] / 100
-				data['XYZ'][p]['RX_ANGLE_STBD'] = data['RRA'][pRRA[p]]['RX_ANGLE'][data['XYZ'][p]['RX_BEAM_IDX_STBD']] / 100
-
-				data['XYZ'][p]['RX_ANGLE'] = [data['XYZ'][p]['RX_ANGLE_PORT'], data['XYZ'][p]['RX_ANGLE_STBD']]  # store both
-
-				if print_updates:
-					print('ping', p, 'has RX angles port/stbd IDX',
-						  data['XYZ'][p]['RX_BEAM_IDX_PORT'], '/', data['XYZ'][p]['RX_BEAM_IDX_STBD'], ' and ANGLES ',
-						  data['XYZ'][p]['RX_ANGLE_PORT'], '/',
-						  data['XYZ'][p]['RX_ANGLE_STBD'])
-
-			else:
-				data['XYZ'][p]['RX_ANGLE'] = (np.asarray(data['RRA'][pRRA[p]]['RX_ANGLE'])/100).tolist()  # store all angles
+		swath = data['XYZ']
+		RRA_list = [data['RRA'][i] for i in range(len(data['RRA']))]
+		RRA_num_beams = np.array([len(RRA['RX_ANGLE']) for RRA in RRA_list], dtype=np.int64)
+		RRA_start = np.concatenate(([0], np.cumsum(RRA_num_beams)))
+		RRA_angle = np.concatenate([RRA['RX_ANGLE'] for RRA in RRA_list]) if RRA_list else np.zeros(0)
+		RRA_datetime = multibeam_tools.libs.em_io.all_datetime([RRA['DATE'] for RRA in RRA_list],
+															   [RRA['TIME'] for RRA in RRA_list])
+
+		RRA_idx = match_pings(swath.ping.get('SYS_SN', np.zeros(0)), swath.ping.get('PING_COUNTER', np.zeros(0)),
+							  swath.ping['DATETIME'],
+							  [RRA['SYS_SN'] for RRA in RRA_list], [RRA['PING_COUNTER'] for RRA in RRA_list],
+							  RRA_datetime)
+		swath.ping['RRA_IDX'] = RRA_idx
+
+		data['DIAG']['XYZ_NO_RRA'] = np.flatnonzero(RRA_idx < 0)  # ping indices without matching RRA
+		data['DIAG']['RRA_NO_XYZ'] = np.setdiff1d(np.arange(len(RRA_list)), RRA_idx)  # RRA indices without ping
+
+		if data['DIAG']['XYZ_NO_RRA'].size > 0:
+			print('WARNING: no RRA 78 datagram found for', data['DIAG']['XYZ_NO_RRA'].size, 'of', len(swath),
+				  'XYZ 88 pings (ping counters', swath.ping['PING_COUNTER'][data['DIAG']['XYZ_NO_RRA']][:10].tolist(),
+				  '...); RX angles are NaN for these pings')
+
+		# beam index of each stored sounding in the XYZ and RRA datagrams of its ping
+		if parse_outermost_only:  # angles of the outermost valid soundings only (port, stbd)
+			beam_idx = np.column_stack((swath.ping.get('RX_BEAM_IDX_PORT', np.zeros(0, dtype=np.int64)),
+										swath.ping.get('RX_BEAM_IDX_STBD', np.zeros(0, dtype=np.int64)))).ravel()
+
+		else:  # all angles
+			beam_idx = swath.sounding_beam()
+
+		sounding_RRA_idx = RRA_idx[swath.sounding_ping()]
+		ok = sounding_RRA_idx >= 0
+		ok[ok] = beam_idx[ok] < RRA_num_beams[sounding_RRA_idx[ok]]
+		rx_angle = np.full(len(beam_idx), np.nan)
+		rx_angle[ok] = RRA_angle[RRA_start[sounding_RRA_idx[ok]] + beam_idx[ok]] / 100
+		swath.sounding['RX_ANGLE'] = rx_angle
+
+		if print_updates and parse_outermost_only:
+			for p in range(len(swath)):
+				print('ping', p, 'has RX angles port/stbd IDX', beam_idx[2*p], '/', beam_idx[2*p + 1],
+					  ' and ANGLES ', rx_angle[2*p], '/', rx_angle[2*p + 1])
 
 		del data['RRA']  # outermost valid RX angles have been stored in XYZ, RRA is no longer needed
 	# del data['RTP']
@@ -208,11 +463,14 @@ def readALLswath(self, filename, print_updates=False, parse_outermost_only=False
 
 	# print('data[POS] =', data['POS'])
 
+	if use_cache:
+		multibeam_tools.libs.parse_cache.save(filename, cache_mode, data, log=self)
+
 	return data
 
 
 def interpretMode(self, data, print_updates):
-	# interpret runtime parameters for each ping and store in XYZ dict prior to sorting
+	# interpret runtime parameters for each ping and store in XYZ ping fields prior to sorting
 	# nominal frequencies for most models; EM712 .all (SIS 4) assumed 40-100 kHz (40-70/70-100 options in SIS 5)
 	# EM2040 frequencies for SIS 4 stored in ping mode; EM2040 frequencies for SIS 5 are stored in runtime parameter
 	# text and are updated in sortDetectionsAccuracy if available; NA is used as a placeholder here
@@ -227,6 +485,9 @@ def interpretMode(self, data, print_updates):
 		missing_mode = False
 		ftype = data[f]['fname'].rsplit('.', 1)[1]
 
+		if ftype in ['all', 'kmall'] and len(data[f]['XYZ']) == 0:  # no pings to interpret
+			continue
+
 		if ftype == 'all':  # interpret .all modes from binary string
 			# KM ping modes for 1: EM3000, 2: EM3002, 3: EM2000,710,300,302,120,122, 4: EM2040
 			# See KM runtime parameter datagram format for models listed
@@ -246,48 +507,61 @@ def interpretMode(self, data, print_updates):
 			pulse_dict_2040C = {'0': 'CW', '1': 'FM'}
 			swath_dict = {'00': 'Single Swath', '01': 'Dual Swath (Fixed)', '10': 'Dual Swath (Dynamic)'}
 
-			# loop through all pings
-			for p in range(len(data[f]['XYZ'])):
-				# print('binary mode as parsed = ', data[f]['XYZ'][p]['MODE'])
-				bin_temp = "{0:b}".format(data[f]['XYZ'][p]['MODE']).zfill(8)  # binary str
-				ping_temp = bin_temp[-4:]  # last 4 bytes specify ping mode based on model
-				model_temp = str(data[f]['XYZ'][p]['MODEL']).strip()
+			# interpret each combination of runtime MODE and MODEL once (usually few per file) and store for all pings
+			swath = data[f]['XYZ']
+			modes = {}
+			ping_modes = {'PING_MODE': [], 'PULSE_FORM': [], 'SWATH_MODE': [], 'FREQUENCY': []}
 
-				# check model to reference correct key in ping mode dict
-				if np.isin(data[f]['XYZ'][p]['MODEL'], all_model_list + [2000, 1002]):
-					model_temp = '9999'  # set model_temp to reference mode_list dict for all applicable models
+			for p, (mode, model) in enumerate(zip(swath.get('MODE').tolist(), swath.get('MODEL').tolist())):
+				if (mode, model) not in modes:
+					# print('binary mode as parsed = ', mode)
+					bin_temp = "{0:b}".format(mode).zfill(8)  # binary str
+					ping_temp = bin_temp[-4:]  # last 4 bytes specify ping mode based on model
+					model_temp = str(model).strip()
 
-				data[f]['XYZ'][p]['PING_MODE'] = mode_dict[model_temp][ping_temp]
+					# check model to reference correct key in ping mode dict
+					if np.isin(model, all_model_list + [2000, 1002]):
+						model_temp = '9999'  # set model_temp to reference mode_list dict for all applicable models
 
-				# interpret pulse form and swath mode based on model
-				# print('working on modes for model: ', data[f]['XYZ'][p]['MODEL'])
+					ping = {'PING_MODE': mode_dict[model_temp][ping_temp]}
 
-				if np.isin(data[f]['XYZ'][p]['MODEL'], all_model_list + [2040]):  # reduced models for swath and pulse
-					data[f]['XYZ'][p]['SWATH_MODE'] = swath_dict[bin_temp[-8:-6]]  # swath mode from binary str
-					data[f]['XYZ'][p]['PULSE_FORM'] = pulse_dict[bin_temp[-6:-4]]  # pulse form from binary str
+					# interpret pulse form and swath mode based on model
+					# print('working on modes for model: ', model)
 
-					if data[f]['XYZ'][p]['MODEL'] == 2040:  # EM2040 .all format stores freq mode in ping mode
-						# print('assigning EM2040 frequency from ping mode for .all format')
-						data[f]['XYZ'][p]['FREQUENCY'] = data[f]['XYZ'][p]['PING_MODE']
+					if np.isin(model, all_model_list + [2040]):  # reduced models for swath and pulse
+						ping['SWATH_MODE'] = swath_dict[bin_temp[-8:-6]]  # swath mode from binary str
+						ping['PULSE_FORM'] = pulse_dict[bin_temp[-6:-4]]  # pulse form from binary str
 
-					else:
-						# print('assigning non-EM2040 frequency from model for .all format')
-						data[f]['XYZ'][p]['FREQUENCY'] = freq_dict[str(data[f]['XYZ'][p]['MODEL'])]
+						if model == 2040:  # EM2040 .all format stores freq mode in ping mode
+							# print('assigning EM2040 frequency from ping mode for .all format')
+							ping['FREQUENCY'] = ping['PING_MODE']
 
-				elif data[f]['XYZ'][p]['MODEL'] == '2040C':  # special cases for EM2040C
-					data[f]['XYZ'][p]['SWATH_MODE'] = pulse_dict_2040C[bin_temp[-7:-6]]  # swath mode from binary str
-					data[f]['XYZ'][p]['FREQUENCY'] = 'NA'  # future: parse from binary (format: 180 kHz + bin*10kHz)
+						else:
+							# print('assigning non-EM2040 frequency from model for .all format')
+							ping['FREQUENCY'] = freq_dict[str(model)]
 
-				else:  # specify NA if not in model list for this interpretation
-					data[f]['XYZ'][p]['PULSE_FORM'] = 'NA'
-					data[f]['XYZ'][p]['SWATH_MODE'] = 'NA'
-					data[f]['XYZ'][p]['FREQUENCY'] = 'NA'
-					missing_mode = True
+					elif model == '2040C':  # special cases for EM2040C
+						ping['PULSE_FORM'] = 'NA'
+						ping['SWATH_MODE'] = pulse_dict_2040C[bin_temp[-7:-6]]  # swath mode from binary str
+						ping['FREQUENCY'] = 'NA'  # future: parse from binary (format: 180 kHz + bin*10kHz)
+
+					else:  # specify NA if not in model list for this interpretation
+						ping['PULSE_FORM'] = 'NA'
+						ping['SWATH_MODE'] = 'NA'
+						ping['FREQUENCY'] = 'NA'
+						missing_mode = True
+
+					modes[(mode, model)] = ping
+
+				ping = modes[(mode, model)]
+				for k, v in ping_modes.items():
+					v.append(ping[k])
 
 				if print_updates:
-					ping = data[f]['XYZ'][p]
 					print('file', f, 'ping', p, 'is', ping['PING_MODE'], ping['PULSE_FORM'], ping['SWATH_MODE'])
 
+			swath.ping.update({k: np.array(v, dtype=str) for k, v in ping_modes.items()})
+
 		elif ftype == 'kmall':  # interpret .kmall modes from parsed fields
 			# depth mode list for AUTOMATIC selection; add 100 for MANUAL selection (e.g., '101': 'Shallow (Manual))
 			mode_dict = {'0': 'Very Shallow', '1': 'Shallow', '2': 'Medium', '3': 'Deep',
@@ -299,22 +573,27 @@ def interpretMode(self, data, print_updates):
 			# depth, pulse in pingInfo from MRZ dg; swath mode, freq in IOP dg runtime text (sortDetectionsCoverage or sortDetectionsAccuracy)
 			# swath_dict = {'0': 'Single Swath', '1': 'Dual Swath'}
 
-			for p in range(len(data[f]['XYZ'])):
+			swath = data[f]['XYZ']
+			ping_modes = {'PING_MODE': [], 'PULSE_FORM': [], 'FREQUENCY': []}
+
+			for p, (depth_mode, pulse_form, model) in enumerate(zip(swath.ping['depthMode'].tolist(),
+																	swath.ping['pulseForm'].tolist(),
+																	swath.ping['echoSounderID'].tolist())):
 				# get depth mode from list and add qualifier if manually selected
-				# print('for ping p=', p, 'depthMode is', data[f]['RTP'][p]['depthMode'])
-				manual_mode = data[f]['RTP'][p]['depthMode'] >= 100  # check if manual selection
-				mode_idx = str(data[f]['RTP'][p]['depthMode'])[-1]  # get last character for depth mode
-				data[f]['XYZ'][p]['PING_MODE'] = mode_dict[mode_idx] + (' (Manual)' if manual_mode else '')
-				data[f]['XYZ'][p]['PULSE_FORM'] = pulse_dict[str(data[f]['RTP'][p]['pulseForm'])]
+				# print('for ping p=', p, 'depthMode is', depth_mode)
+				manual_mode = depth_mode >= 100  # check if manual selection
+				mode_idx = str(depth_mode)[-1]  # get last character for depth mode
+				ping_modes['PING_MODE'].append(mode_dict[mode_idx] + (' (Manual)' if manual_mode else ''))
+				ping_modes['PULSE_FORM'].append(pulse_dict[str(pulse_form)])
 
 				# store default frequency based on model, update from runtime param text in sortCoverageDetections
-				# data[f]['XYZ'][p]['FREQUENCY'] = freq_dict[str(data[f]['XYZ'][p]['MODEL'])]
-				# print('looking at SIS 5 model: ', data[f]['HDR'][p]['echoSounderID'])
-				data[f]['XYZ'][p]['FREQUENCY'] = freq_dict[str(data[f]['HDR'][p]['echoSounderID'])]
+				# print('looking at SIS 5 model: ', model)
+				ping_modes['FREQUENCY'].append(freq_dict[str(model)])
 
 				if print_updates:
-					ping = data[f]['XYZ'][p]
-					print('file', f, 'ping', p, 'is', ping['PING_MODE'], ping['PULSE_FORM'])
+					print('file', f, 'ping', p, 'is', ping_modes['PING_MODE'][-1], ping_modes['PULSE_FORM'][-1])
+
+			swath.ping.update({k: np.array(v, dtype=str) for k, v in ping_modes.items()})
 
 		else:
 			print('UNSUPPORTED FTYPE --> NOT INTERPRETING MODES!')
@@ -329,67 +608,70 @@ def interpretMode(self, data, print_updates):
 	return data
 
 
-def readKMALLswath(self, filename, print_updates=False, include_skm=False, parse_params_only=False):
+def readKMALLswath(self, filename, print_updates=False, include_skm=False, parse_params_only=False, use_cache=True):
 	# parse .kmall swath data and relevant parameters for:
 	# 1. coverage (outermost soundings only)
 	# 2. accuracy assessment (full swath)
 	# 3. runtime and installation parameters only (parameter tracking, no swath data)
 	# note that position is returned for all cases
-	# note that acquisition parameters and raw range and angle data are copied to the ping data/time, and are not stored
-	# separately for these purposes (this is slower/larger, but simpler for sorting in coverage or accuracy testing)
-	# likewise, if params only are parsed, the most recent RTP or IP data are copied to the next valid ping time (and
-	# ensuing XYZ datagrams are skipped until another param datagram is found; no swath data are parsed or stored)
+	# note that swath data are returned as SwathData in data['XYZ'] (as for readALLswath), with header and ping info
+	# fields stored for each ping and the latest runtime parameter text referenced by index from each ping
+	# if use_cache, the parsed data are stored in (and reloaded from) the parse cache for this file and parse mode
+	cache_mode = '.kmall ' + ('params' if parse_params_only else 'full') + (' skm' if include_skm else '')
+	if use_cache:
+		data = multibeam_tools.libs.parse_cache.load(filename, cache_mode, log=self)
+		if data is not None:
+			return data
 
 	# FUTURE: return full swath or outermost soundings only, for integration with swath coverage plotter
 	km = kmall_data(filename)  # kmall_data class inheriting kmall class and adding extract_dg method
 	km.index_file()
 	km.report_packet_types()
 
-	# get required datagrams
-	print('calling extract_dg')
-	km.extract_dg('IOP')  # runtime params
-	km.extract_dg('IIP')  # installation params
-
-	if parse_params_only:  # save runtime and installation parameters
-		km.extract_dg('MRZinfo')
-		data_xyz = {'XYZ': km.mrz['pingInfo']}
+	# get required datagrams (runtime params, installation params, ping info or sounding data, and attitude if needed)
+	if parse_params_only:
 		include_skm = False
 
-	else:  # get sounding data, add delta lat/lon to lat/lon of ref point at ping time and store final sounding lat/lon
-		km.extract_dg('MRZ')  # extract sounding data
+	km.extract_many(['IOP', 'IIP', 'MRZinfo' if parse_params_only else 'MRZ'] + (['SKM'] if include_skm else []))
+
+	if not parse_params_only:  # sounding data
 		print('parsed KM file, first ping in km.mrz[pingInfo] =', km.mrz['pingInfo'][0])
-		print('in readKMALLswath, kmall file has km.mrz[sounding][0].keys = ', km.mrz['sounding'][0].keys())
+		print('in readKMALLswath, kmall file has km.mrz[sounding].keys = ', km.mrz['sounding'].keys())
 
-		for p in range(len(km.mrz['pingInfo'])):
+	pings = [{**hdr, **info} for hdr, info in zip(km.mrz['header'], km.mrz['pingInfo'])]
 
-			num_soundings = len(km.mrz['sounding'][p]['z_reRefPoint_m'])
-			if print_updates:
-				print('ping ', p, 'has n_soundings =', num_soundings, ' and lat, lon =',
-					  km.mrz['pingInfo'][p]['latitude_deg'], km.mrz['pingInfo'][p]['longitude_deg'])
+	# store header and ping info fields for each ping and sounding fields for all soundings
+	swath = SwathData.from_pings(pings, sounding_keys=[])
+	del pings
 
-			km.mrz['sounding'][p]['lat'] = (np.asarray(km.mrz['sounding'][p]['deltaLatitude_deg']) +
-											km.mrz['pingInfo'][p]['latitude_deg']).tolist()
-			km.mrz['sounding'][p]['lon'] = (np.asarray(km.mrz['sounding'][p]['deltaLongitude_deg']) +
-											km.mrz['pingInfo'][p]['longitude_deg']).tolist()
+	if not parse_params_only and len(swath) > 0:
+		swath.sounding = km.mrz['sounding']
+		swath.ping_start = km.mrz['ping_start']
 
-			# convert sounding position to UTM
-			temp_lat = km.mrz['sounding'][p]['lat']
-			temp_lon = km.mrz['sounding'][p]['lon']
+	swath.ping['DATETIME'] = np.array([hdr['dgdatetime'] for hdr in km.mrz['header']], dtype='datetime64[us]')
+	swath.ping['BYTES_FROM_LAST_PING'] = np.diff(np.asarray(km.mrz['start_byte'], dtype=np.int64),
+												 prepend=km.mrz['start_byte'][:1])
 
-			e, n, zone = [], [], []
-			for s in range(num_soundings):  # loop through all soundings and append lat/lon list
-				e_temp, n_temp, zone_temp, letter_temp = utm.from_latlon(temp_lat[s], temp_lon[s])  # sounding easting, northing
-				e.append(e_temp)
-				n.append(n_temp)
-				zone.append(str(zone_temp) + letter_temp)
+	# store runtime parameter text once per IOP datagram and the index of the latest IOP datagram before each ping;
+	# default to 0 for cases where earliest pings in file might be timestamped earlier than first IOP datagram
+	IOP_datetime = np.array([hdr['dgdatetime'] for hdr in km.iop['header']], dtype='datetime64[us]')
+	swath.param['IOP'] = {'runtime_txt': SwathData.column(km.iop['runtime_txt']), 'DATETIME': IOP_datetime}
+	swath.ping['IOP_IDX'] = np.maximum(np.searchsorted(IOP_datetime, swath.ping['DATETIME'], side='right') - 1, 0)
 
-			# print('in parseKMALLswath, first few e, n, zone=', e[0:5], '\n', n[0:5], '\n', zone[0:5])
+	if not parse_params_only and len(swath) > 0:
+		# add delta lat/lon to lat/lon of ref point at ping time and store final sounding lat/lon
+		sounding_ping = swath.sounding_ping()
+		swath.sounding['lat'] = swath.sounding['deltaLatitude_deg'] + swath.ping['latitude_deg'][sounding_ping]
+		swath.sounding['lon'] = swath.sounding['deltaLongitude_deg'] + swath.ping['longitude_deg'][sounding_ping]
 
-			km.mrz['sounding'][p]['e'] = e
-			km.mrz['sounding'][p]['n'] = n
-			km.mrz['sounding'][p]['utm_zone'] = zone
+		if print_updates:
+			for p in range(len(swath)):
+				print('ping ', p, 'has n_soundings =', swath.num_soundings()[p], ' and lat, lon =',
+					  swath.ping['latitude_deg'][p], swath.ping['longitude_deg'][p])
 
-		data_xyz = {'XYZ': km.mrz['sounding']}
+		# convert sounding position to UTM (zone of each sounding as in utm.from_latlon)
+		swath.sounding['e'], swath.sounding['n'], swath.sounding['utm_zone'] = \
+			latlon_to_utm(swath.sounding['lat'], swath.sounding['lon'])
 
 	data = {'fname': filename.rsplit('/')[-1],
 			'HDR': km.mrz['header'],
@@ -398,14 +680,16 @@ def readKMALLswath(self, filename, print_updates=False, include_skm=False, parse
 			'IP': km.iip,
 			'start_byte': km.mrz['start_byte']}
 
-	data.update(data_xyz)  # add the XYZ data from either course (full swath data or pinginfo only)
+	data['XYZ'] = swath  # add the XYZ data from either source (full swath data or pinginfo only)
 
-	if include_skm:
-		km.extract_dg('SKM')  # TESTING motion sensor timing (Seapath / Revelle SAT)
+	if include_skm:  # TESTING motion sensor timing (Seapath / Revelle SAT)
 		data['SKM'] = km.skm
 
 	km.closeFile()
 
+	if use_cache:
+		multibeam_tools.libs.parse_cache.save(filename, cache_mode, data, log=self)
+
 	return data
 
 
@@ -588,105 +872,250 @@ def verifyModelAndModes(det, verify_modes=True):
 	return sys_info
 
 
+# MRZ datagram blocks as numpy dtypes (field names as in the kmall module, fields in order of the .kmall format doc)
+MRZ_HEADER_DTYPE = np.dtype([('numBytesDgm', '<u4'), ('dgmType', 'S4'), ('dgmVersion', 'u1'), ('systemID', 'u1'),
+							 ('echoSounderID', '<u2'), ('time_sec', '<u4'), ('time_nanosec', '<u4')])
+
+MRZ_PINGINFO_FIELDS = [('numBytesInfoData', '<u2'), ('padding0', '<u2'), ('pingRate_Hz', '<f4'),
+					   ('beamSpacing', 'u1'), ('depthMode', 'u1'), ('subDepthMode', 'u1'), ('distanceBtwSwath', 'u1'),
+					   ('detectionMode', 'u1'), ('pulseForm', 'u1'), ('padding1', '<u2'),
+					   ('frequencyMode_Hz', '<f4'), ('freqRangeLowLim_Hz', '<f4'), ('freqRangeHighLim_Hz', '<f4'),
+					   ('maxTotalTxPulseLength_sec', '<f4'), ('maxEffTxPulseLength_sec', '<f4'),
+					   ('maxEffTxBandWidth_Hz', '<f4'), ('absCoeff_dBPerkm', '<f4'),
+					   ('portSectorEdge_deg', '<f4'), ('starbSectorEdge_deg', '<f4'),
+					   ('portMeanCov_deg', '<f4'), ('starbMeanCov_deg', '<f4'),
+					   ('portMeanCov_m', '<i2'), ('starbMeanCov_m', '<i2'),
+					   ('modeAndStabilisation', 'u1'), ('runtimeFilter1', 'u1'), ('runtimeFilter2', '<u2'),
+					   ('pipeTrackingStatus', '<u4'), ('transmitArraySizeUsed_deg', '<f4'),
+					   ('receiveArraySizeUsed_deg', '<f4'), ('transmitPower_dB', '<f4'),
+					   ('SLrampUpTimeRemaining', '<u2'), ('padding2', '<u2'), ('yawAngle_deg', '<f4'),
+					   ('numTxSectors', '<u2'), ('numBytesPerTxSector', '<u2'), ('headingVessel_deg', '<f4'),
+					   ('soundSpeedAtTxDepth_mPerSec', '<f4'), ('txTransducerDepth_m', '<f4'),
+					   ('z_waterLevelReRefPoint_m', '<f4'), ('x_kmallToall_m', '<f4'), ('y_kmallToall_m', '<f4'),
+					   ('latLongInfo', 'u1'), ('posSensorStatus', 'u1'), ('attitudeSensorStatus', 'u1'),
+					   ('padding3', 'u1'), ('latitude_deg', '<f8'), ('longitude_deg', '<f8'),
+					   ('ellipsoidHeightReRefPoint_m', '<f4'),
+					   ('bsCorrectionOffset_dB', '<f4'), ('lambertsLawApplied', 'u1'), ('iceWindow', 'u1'),
+					   ('activeModes', '<u2')]  # last four fields added in MRZ dgmVersion 1
+
+MRZ_PINGINFO_DTYPE = np.dtype(MRZ_PINGINFO_FIELDS)
+MRZ_PINGINFO_DTYPE_V0 = np.dtype(MRZ_PINGINFO_FIELDS[:-4])
+
+MRZ_SOUNDING_DTYPE = np.dtype([('soundingIndex', '<u2'), ('txSectorNumb', 'u1'), ('detectionType', 'u1'),
+							   ('detectionMethod', 'u1'), ('rejectionInfo1', 'u1'), ('rejectionInfo2', 'u1'),
+							   ('postProcessingInfo', 'u1'), ('detectionClass', 'u1'),
+							   ('detectionConfidenceLevel', 'u1'), ('padding', '<u2'), ('rangeFactor', '<f4'),
+							   ('qualityFactor', '<f4'), ('detectionUncertaintyVer_m', '<f4'),
+							   ('detectionUncertaintyHor_m', '<f4'), ('detectionWindowLength_sec', '<f4'),
+							   ('echoLength_sec', '<f4'), ('WCBeamNumb', '<u2'), ('WCrange_samples', '<u2'),
+							   ('WCNomBeamAngleAcross_deg', '<f4'), ('meanAbsCoeff_dBPerkm', '<f4'),
+							   ('reflectivity1_dB', '<f4'), ('reflectivity2_dB', '<f4'),
+							   ('receiverSensitivityApplied_dB', '<f4'), ('sourceLevelApplied_dB', '<f4'),
+							   ('BScalibration_dB', '<f4'), ('TVG_dB', '<f4'), ('beamAngleReRx_deg', '<f4'),
+							   ('beamAngleCorrection_deg', '<f4'), ('twoWayTravelTime_sec', '<f4'),
+							   ('twoWayTravelTimeCorrection_sec', '<f4'), ('deltaLatitude_deg', '<f4'),
+							   ('deltaLongitude_deg', '<f4'), ('z_reRefPoint_m', '<f4'), ('y_reRefPoint_m', '<f4'),
+							   ('x_reRefPoint_m', '<f4'), ('beamIncAngleAdj_deg', '<f4'), ('realTimeCleanInfo', '<u2'),
+							   ('SIstartRange_samples', '<u2'), ('SIcentreSample', '<u2'), ('SInumSamples', '<u2')])
+
+# SKM datagram KM binary attitude sample (field names as in the kmall module); each sample of numBytesPerSample bytes
+# starts with a KM binary record, followed by delayed heave
+SKM_KMBINARY_DTYPE = np.dtype([('dgmType', 'S4'), ('numBytesDgm', '<u2'), ('dgmVersion', '<u2'),
+							   ('time_sec', '<u4'), ('time_nanosec', '<u4'), ('status', '<u4'),
+							   ('latitude_deg', '<f8'), ('longitude_deg', '<f8'), ('ellipsoidHeight_m', '<f4'),
+							   ('roll_deg', '<f4'), ('pitch_deg', '<f4'), ('heading_deg', '<f4'), ('heave_m', '<f4'),
+							   ('rollRate', '<f4'), ('pitchRate', '<f4'), ('yawRate', '<f4'),
+							   ('velNorth', '<f4'), ('velEast', '<f4'), ('velDown', '<f4'),
+							   ('latitudeError_m', '<f4'), ('longitudeError_m', '<f4'), ('ellipsoidHeightError_m', '<f4'),
+							   ('rollError_deg', '<f4'), ('pitchError_deg', '<f4'), ('headingError_deg', '<f4'),
+							   ('heaveError_m', '<f4'), ('northAcceleration', '<f4'), ('eastAcceleration', '<f4'),
+							   ('downAcceleration', '<f4')])
+
+SKM_INFO_POS = 20  # SKM info part, after header
+SKM_INFO_FIELDS = {'numBytesInfoPart': 0, 'numSamplesArray': 6, 'numBytesPerSample': 8}  # u2 positions in info part
+
+KMALL_READ_GAP = 2**16  # max bytes between .kmall datagrams read through with one readinto in kmall_data.extract_many
+KMALL_READ_SIZE = 2**22  # max bytes read with one readinto in kmall_data.extract_many
+
+MRZ_CMN_PART_POS = 24  # numBytesCmnPart, after header (20 bytes) and partition (4 bytes)
+MRZ_RX_INFO_FIELDS = {'numBytesRxInfo': 0, 'numSoundingsMaxMain': 2, 'numBytesPerSounding': 6,
+					  'numExtraDetections': 26, 'numExtraDetectionClasses': 28, 'numBytesPerClass': 30}  # u2 positions
+
+
+def kmall_skm_positions(filename):
+	# return the mapped .kmall file (uint8 array) and the byte positions of the KM binary records of all attitude samples
+	# in its SKM datagrams, from the datagram index (shared through the parse cache) and the SKM info part of each
+	# datagram (numBytesInfoPart, numSamplesArray, numBytesPerSample), for decoding with SKM_KMBINARY_DTYPE
+	toc = multibeam_tools.libs.parse_cache.kmall_index(filename)
+	offsets = toc.OFFSET[np.isin(toc.TYPE, multibeam_tools.libs.em_io.kmall_type_names(['SKM']))]
+	buf = np.frombuffer(multibeam_tools.libs.em_io.map_file(filename), dtype=np.uint8)
+	info = {k: multibeam_tools.libs.em_io.read_uint(buf, offsets + SKM_INFO_POS + pos, 2)
+			for k, pos in SKM_INFO_FIELDS.items()}
+
+	num_samples = info['numSamplesArray']
+	sample_start = np.concatenate(([0], np.cumsum(num_samples)))
+	sample_idx = np.arange(sample_start[-1]) - np.repeat(sample_start[:-1], num_samples)
+	pos = np.repeat(offsets + SKM_INFO_POS + info['numBytesInfoPart'], num_samples) + \
+		  sample_idx*np.repeat(info['numBytesPerSample'], num_samples)
+
+	return buf, pos
+
+
 class kmall_data(kmall):
 	# test class inheriting kmall class with method to extract any datagram (based on extract attitude method)
 	def __init__(self, filename, dg_name=None):
 		super(kmall_data, self).__init__(filename)  # pass the filename to kmall module (only argument required)
+		self.toc = None  # datagram index (em_io.KMALL_TOC_DTYPE), in place of the pandas index from the kmall module
+
+	def index_file(self):
+		# get the datagram index from the parse cache (shared with other tools), or index the datagram headers
+		self.toc = multibeam_tools.libs.parse_cache.kmall_index(self.filename)
+
+	def report_packet_types(self):
+		# print the number of datagrams of each type in the index
+		types, counts = np.unique(self.toc.TYPE, return_counts=True)
+		for t, n in zip(types.tolist(), counts.tolist()):
+			print(t.decode('ascii', errors='replace'), n)
+
+	def dg_offsets(self, dg_name):
+		# return the offsets of all datagrams of type dg_name (e.g., 'MRZ') from the index
+		names = multibeam_tools.libs.em_io.kmall_type_names([dg_name])
+
+		return self.toc.OFFSET[np.isin(self.toc.TYPE, names)].tolist()
 
 	def extract_dg(self, dg_name):  # extract dicts of datagram types, store in kmall_data class
 		print('\n\nin extract_dg with dg_name = ', dg_name)
+		self.extract_many([dg_name])
+		print('leaving extract_dg')
+
+		return
+
+	def extract_many(self, types):  # extract dicts of several datagram types in one pass, store in kmall_data class
+		# extract all datagrams of the types in types (dg_names as for extract_dg) in file order; offsets of all types
+		# are sorted once and datagrams separated by less than KMALL_READ_GAP are read with one readinto (up to
+		# KMALL_READ_SIZE), then each datagram is decoded from the buffer by the reader for its type, so the file is
+		# read in one forward sweep instead of a seek and read per datagram in a separate pass for each type
 		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
 		dg_types = {'IOP': self.read_EMdgmIOP,
 					'IIP': self.read_EMdgmIIP,
-					'MRZ': self.read_EMdgmMRZ,
 					'SKM': self.read_EMdgmSKM}
 
-		if self.Index is None:
+		if self.toc is None:
 			print('*** indexing file! ***')
 			self.index_file()
 
 		if self.FID is None:
 			self.OpenFiletoRead()
 
-		# for each datagram type, get offsets, read datagrams, and store in key (e.g., MRZ stored in kjall.mrz)
-		if dg_name == 'MRZinfo':  # extract ping info ONLY, and keep same format for output (kmall.mrz)
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-			mrzinfo = list()
-			for offset in dg_offsets:  # read just header and ping info (adapted from read_EMdgmMRZ in kmall module)
-				self.FID.seek(offset, 0)
-				start = self.FID.tell()
-				dg = {}
-				dg['header'] = self.read_EMdgmHeader()
-				self.FID.seek(16, 1)  # skip readEMdgmMpartition (2H = 4) and readEMdgmMbody (2H8B = 12)
-				dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
-
-				# Seek to end of the packet
-				self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-				dg['start_byte'] = offset
-
-				# print('parsed = ', parsed)
-				mrzinfo.append(dg)
-
-			# convert list of dicts to dict of lists
-			mrzinfo_final = self.listofdicts2dictoflists(mrzinfo)
-			setattr(self, 'mrz', mrzinfo_final)  # kmall.mrz will include ping info only, not full soundings
-
-		elif dg_name in list(dg_types):  # extract whole datagrams
-			print('dg_name =', dg_name, ' is in dg_types')
-			print('searching for ', "b'#" + dg_name + "'")
-			dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#" + dg_name + "'"]  # + "]
-			print('got dg_offsets = ', dg_offsets)
-
-			dg = list()
-			for offset in dg_offsets:  # store all datagrams of this type
-				self.FID.seek(offset, 0)
-				parsed = dg_types[dg_name]()
-				parsed['start_byte'] = offset
-				# print('parsed = ', parsed)
-				dg.append(parsed)
-
-			# convert list of dicts to dict of lists
-			print('setting attribute with dg_name.lower()=', dg_name.lower())
-			dg_final = self.listofdicts2dictoflists(dg)
-			setattr(self, dg_name.lower(), dg_final)
+		# MRZ datagrams are decoded from the mapped file (ping info ONLY for MRZinfo) in kmall.mrz
+		for dg_name in [t for t in types if t in ['MRZ', 'MRZinfo']]:
+			self.extract_mrz(info_only=dg_name == 'MRZinfo')
 
-		self.FID.seek(0, 0)
+		# for each datagram type, get offsets, read datagrams, and store in key (e.g., SKM stored in kmall.skm)
+		types = [t for t in types if t in dg_types]
+		names = dict(zip(multibeam_tools.libs.em_io.kmall_type_names(types), types))
+		toc = self.toc[np.isin(self.toc.TYPE, list(names))]  # index is in file order
+		dg = {t: list() for t in types}
 
-		print('leaving extract_dg')
-		return
+		# split datagrams into runs to be read at once, where the gap to the previous datagram is small
+		run_start = [0]
+		for i in range(1, len(toc)):
+			if toc.OFFSET[i] - (toc.OFFSET[i - 1] + toc.LENGTH[i - 1]) > KMALL_READ_GAP or \
+					toc.OFFSET[i] + toc.LENGTH[i] - toc.OFFSET[run_start[-1]] > KMALL_READ_SIZE:
+				run_start.append(i)
 
+		fid = self.FID
+		buf = bytearray()
 
-	def extract_pinginfo(self):  # extract dicts of datagram types, store in kmall_data class
-		# dict of allowable dg_names and associated dg IDs; based on extract_attitude method in kmall module
-		if self.Index is None:
-			self.index_file()
-
-		if self.FID is None:
-			self.OpenFiletoRead()
+		try:
+			for i, j in zip(run_start, run_start[1:] + [len(toc)]):
+				if i == j:  # no datagrams
+					continue
 
-		# get offsets for MRZ datagrams (contain pingInfo to be used for sorting/searching runtime params)
-		dg_offsets = [x for x, y in zip(self.msgoffset, self.msgtype) if y == "b'#MRZ'"]
-		print('got dg_offsets = ', dg_offsets)
+				start, stop = int(toc.OFFSET[i]), int(toc.OFFSET[j - 1] + toc.LENGTH[j - 1])
+				if len(buf) < stop - start:
+					buf = bytearray(stop - start)
 
-		pinginfo = list()
-		for offset in dg_offsets:  # read just header and ping info (copied from read_EMdgmMRZ method in kmall module
-			self.FID.seek(offset, 0)
-			start = self.FID.tell()
-			dg = {}
-			dg['header'] = self.read_EMdgmHeader()
-			dg['pingInfo'] = self.read_EMdgmMRZ_pingInfo()
+				fid.seek(start, 0)
+				fid.readinto(memoryview(buf)[:stop - start])
+				self.FID = io.BytesIO(memoryview(buf)[:stop - start])  # readers in the kmall module read from self.FID
 
-			# Seek to end of the packet.
-			self.FID.seek(start + dg['header']['numBytesDgm'], 0)
-			dg['start_byte'] = offset
+				for offset, name in zip(toc.OFFSET[i:j].tolist(), toc.TYPE[i:j].tolist()):  # store all datagrams
+					self.FID.seek(offset - start, 0)
+					parsed = dg_types[names[name]]()
+					parsed['start_byte'] = offset
+					dg[names[name]].append(parsed)
 
-			# print('parsed = ', parsed)
-			pinginfo.append(dg)
+		finally:
+			self.FID = fid
 
 		# convert list of dicts to dict of lists
-		pinginfo_final = self.listofdicts2dictoflists(dg)
-		setattr(self, 'mrz', pinginfo_final)  # kmall.mrz will include ping info only, not full soundings
+		for dg_name in types:
+			print('setting attribute with dg_name.lower()=', dg_name.lower())
+			setattr(self, dg_name.lower(), self.listofdicts2dictoflists(dg[dg_name]))
 
 		self.FID.seek(0, 0)
 
-		return
\ No newline at end of file
+		return
+
+	def extract_pinginfo(self):  # extract dicts of datagram types, store in kmall_data class
+		# get header and ping info of MRZ datagrams (to be used for sorting/searching runtime params) in kmall.mrz
+		if self.toc is None:
+			self.index_file()
+
+		self.extract_mrz(info_only=True)
+
+		return
+
+	def extract_mrz(self, info_only=False):
+		# decode the header, ping info, and (unless info_only) soundings of all MRZ datagrams with numpy dtypes over the
+		# mapped file, reading each block at the positions given by the size fields of the datagrams (numBytesCmnPart,
+		# numBytesInfoData, numBytesRxInfo, numBytesPerSounding, etc.); header and ping info are stored as lists of dicts
+		# (one per ping, as from the kmall module) in kmall.mrz, and soundings of all pings are stored as arrays in
+		# kmall.mrz['sounding'] with the soundings of ping p in [ping_start[p]:ping_start[p+1]] (as in SwathData)
+		if self.toc is None:
+			self.index_file()
+
+		buf = np.frombuffer(multibeam_tools.libs.em_io.map_file(self.filename), dtype=np.uint8)
+		offsets = np.asarray(self.dg_offsets('MRZ'), dtype=np.int64)
+		read_u2 = lambda pos: multibeam_tools.libs.em_io.read_uint(buf, pos, 2)
+
+		hdr = multibeam_tools.libs.em_io.read_records(buf, offsets, MRZ_HEADER_DTYPE)
+		info_pos = offsets + MRZ_CMN_PART_POS + read_u2(offsets + MRZ_CMN_PART_POS)
+		info_dtype = MRZ_PINGINFO_DTYPE if read_u2(info_pos).min(initial=MRZ_PINGINFO_DTYPE.itemsize) >= \
+										   MRZ_PINGINFO_DTYPE.itemsize else MRZ_PINGINFO_DTYPE_V0
+		info = multibeam_tools.libs.em_io.read_records(buf, info_pos, info_dtype)
+
+		dgtime = hdr['time_sec'] + hdr['time_nanosec']/1.0E9
+		dgdatetime = (hdr['time_sec'].astype(np.int64)*1000000 + hdr['time_nanosec']//1000).astype('datetime64[us]')
+		hdr_keys = ['numBytesDgm', 'dgmType', 'dgmVersion', 'systemID', 'echoSounderID']
+		info_keys = [k for k in info_dtype.names if not k.startswith('padding')]
+
+		mrz = {'header': [dict(zip(hdr_keys + ['dgtime', 'dgdatetime'], row + (t, dt))) for row, t, dt in
+						  zip(hdr[hdr_keys].tolist(), dgtime.tolist(), dgdatetime.tolist())],
+			   'pingInfo': [dict(zip(info_keys, row)) for row in info[info_keys].tolist()],
+			   'start_byte': offsets.tolist()}
+
+		if not info_only:  # find the sounding block after the tx sectors, rx info, and extra detection classes
+			rx_pos = info_pos + info['numBytesInfoData'] + \
+					 info['numTxSectors'].astype(np.int64)*info['numBytesPerTxSector']
+			rx = {k: read_u2(rx_pos + pos) for k, pos in MRZ_RX_INFO_FIELDS.items()}
+			sounding_pos = rx_pos + rx['numBytesRxInfo'] + rx['numExtraDetectionClasses']*rx['numBytesPerClass']
+			num_soundings = rx['numSoundingsMaxMain'] + rx['numExtraDetections']
+
+			if np.any(rx['numBytesPerSounding'][num_soundings > 0] < MRZ_SOUNDING_DTYPE.itemsize):
+				raise ValueError('MRZ soundings are smaller than expected (' + str(MRZ_SOUNDING_DTYPE.itemsize) +
+								 ' bytes); format version not supported')
+
+			ping_start = np.concatenate(([0], np.cumsum(num_soundings)))
+			sounding_beam = np.arange(ping_start[-1]) - np.repeat(ping_start[:-1], num_soundings)
+			pos = np.repeat(sounding_pos, num_soundings) + sounding_beam*np.repeat(rx['numBytesPerSounding'],
+																				   num_soundings)
+			sounding = multibeam_tools.libs.em_io.read_records(buf, pos, MRZ_SOUNDING_DTYPE)
+
+			# store fields as float64 and int64 arrays (as from lists of values parsed by the kmall module)
+			mrz['sounding'] = {k: sounding[k].astype(np.float64 if sounding.dtype[k].kind == 'f' else np.int64)
+							   for k in MRZ_SOUNDING_DTYPE.names if not k.startswith('padding')}
+			mrz['ping_start'] = ping_start
+
+		self.mrz = mrz  # kmall.mrz will include ping info only, not full soundings, if info_only
@@ -0,0 +1,528 @@
+"""Swath file parsing and detection sorting for NOAA / MAC echosounder assessment tools"""
+
+# this module does not import Qt or matplotlib, so files can be parsed in worker processes (see
+# swath_fun.parse_files_parallel) without loading the GUI packages in each process
+
+import datetime
+import os
+import traceback
+import numpy as np
+from multibeam_tools.libs.swath_fun import ParseLog, SwathData, readALLswath, readKMALLswath, readASCIIswath, \
+	interpretMode
+from multibeam_tools.libs.readEM import convertXYZ
+
+
+def parse_coverage_file(fname, params_only=False, print_updates=False):
+	# parse one .all or .kmall file and sort detections for coverage (or parameters only); this runs in a worker process
+	# (see calc_coverage and parse_files_parallel), so the detection dict, SKM times (.kmall only), and log entries for
+	# this file are returned instead of the full parsed data; returns None for unrecognized file types, and the traceback
+	# (with the log entries so far) if parsing fails
+	log = ParseLog()
+
+	try:
+		ftype = fname.rsplit('.', 1)[-1]
+		skm_time = None
+
+		if ftype == 'all':  # read .all file for coverage (incl. params) or just params
+			data = readALLswath(log, fname, print_updates=print_updates,
+								parse_outermost_only=True, parse_params_only=params_only)
+
+		elif ftype == 'kmall':  # read .kmall file for coverage (incl. params) or just params
+			data = readKMALLswath(log, fname, print_updates=print_updates,
+								  include_skm=not params_only, parse_params_only=params_only)
+
+			try:  # simplify SKM header and sample times for plotting
+				num_SKM = len(data['SKM']['header'])
+				SKM_header_datetime = [data['SKM']['header'][j]['dgdatetime'] for j in range(num_SKM)]
+				SKM_sample_datetime = [data['SKM']['sample'][j]['KMdefault']['datetime'][0] for j in range(num_SKM)]
+
+			except:  # store placeholders if SKM was not parsed
+				SKM_header_datetime = [datetime.datetime(1, 1, 1, 0, 0)]  # min datetime year is 1
+				SKM_sample_datetime = [datetime.datetime(1, 1, 1, 0, 0)]
+
+			skm_time = {'fname': fname,
+						'SKM_header_datetime': SKM_header_datetime,
+						'SKM_sample_datetime': SKM_sample_datetime}
+
+		else:
+			return None
+
+		data['fsize'] = os.path.getsize(fname)
+		fname_wcd = fname.replace('.kmall', '.kmwcd').replace('.all', '.wcd')
+
+		try:  # try to get water column file size (.kmwcd for .kmall. or .wcd for .all)
+			data['fsize_wc'] = os.path.getsize(fname_wcd)
+
+		except:
+			data['fsize_wc'] = np.nan
+
+		data = interpretMode(log, {0: data}, print_updates=print_updates)
+		det = sortDetectionsCoverage(log, data, print_updates=print_updates, params_only=params_only)
+
+		return {'det': det, 'skm_time': skm_time, 'log': log.entries}
+
+	except Exception:
+		return {'error': traceback.format_exc(), 'log': log.entries}
+
+
+def sortDetectionsCoverage(self, data, print_updates=False, params_only=False):
+	# sort through .all and .kmall data dict and pull out outermost valid soundings, BS, and modes for each ping
+	det_key_list = ['fname', 'model', 'datetime', 'date', 'time', 'sn',
+					'y_port', 'y_stbd', 'z_port', 'z_stbd', 'bs_port', 'bs_stbd', 'rx_angle_port', 'rx_angle_stbd',
+					'ping_mode', 'pulse_form', 'swath_mode', 'frequency',
+					'max_port_deg', 'max_stbd_deg', 'max_port_m', 'max_stbd_m',
+					'tx_x_m', 'tx_y_m', 'tx_z_m',  'tx_r_deg', 'tx_p_deg', 'tx_h_deg',
+					'rx_x_m', 'rx_y_m', 'rx_z_m',  'rx_r_deg', 'rx_p_deg', 'rx_h_deg',
+					'aps_num', 'aps_x_m', 'aps_y_m', 'aps_z_m', 'wl_z_m',
+					'bytes', 'fsize', 'fsize_wc']  #, 'skm_hdr_datetime', 'skm_raw_datetime']
+					# yaw stabilization mode, syn
+
+	det = {k: [] for k in det_key_list}
+
+	# examine detection info across swath, find outermost valid soundings for each ping
+	# here, each det entry corresponds to two outermost detections (port and stbd) from one ping, with parameters that
+	# are applied for both soundings; detection sorting in the accuracy plotter extends the detection dict for all valid
+	# detections in each ping, with parameters extended for each (admittedly inefficient, but easy for later sorting)
+	for f in range(len(data)):  # loop through all data
+		if print_updates:
+			print('Finding outermost valid soundings in file', data[f]['fname'])
+
+		# set up keys for dict fields of interest from parsers for each file type (.all or .kmall)
+		ftype = data[f]['fname'].rsplit('.', 1)[1]
+		key_idx = int(ftype == 'kmall')  # keys in data dicts depend on parser used, get index to select keys below
+		det_int_threshold = [127, 0][key_idx]  # threshold for valid sounding (.all  <128 and .kmall == 0)
+		det_int_key = ['RX_DET_INFO', 'detectionType'][key_idx]  # key for detect info depends on ftype
+		depth_key = ['RX_DEPTH', 'z_reRefPoint_m'][key_idx]  # key for depth
+		across_key = ['RX_ACROSS', 'y_reRefPoint_m'][key_idx]  # key for acrosstrack distance
+		bs_key = ['RX_BS', 'reflectivity1_dB'][key_idx]  # key for backscatter in dB
+		bs_scale = [0.1, 1][key_idx]  # backscatter scale in X dB; multiply parsed value by this factor for dB
+		# bs_key = ['RS_BS', 'reflectivity2_dB'][key_idx]  # key for backscatter in dB TESTING KMALL REFLECTIVITY 2
+		angle_key = ['RX_ANGLE', 'beamAngleReRx_deg'][key_idx]  # key for RX angle re RX array
+
+		swath = data[f]['XYZ']  # SwathData with ping fields and soundings stored in flat arrays for all pings
+		if len(swath) == 0:
+			continue
+
+		print('sorting pings in sortDetectionsCoverage')
+
+		if params_only:  # store zeros as placeholders to no break rest of sorting steps
+			ping_idx = np.arange(len(swath))
+			zeros = ['y_port', 'y_stbd', 'z_port', 'z_stbd', 'bs_port', 'bs_stbd', 'rx_angle_port', 'rx_angle_stbd']
+			for k in zeros:
+				det[k].extend([0] * len(ping_idx))
+				# det[k].extend([np.nan] * len(ping_idx))  # NaN breaks plotting/colorscale steps later...
+
+		else:  # sort port and stbd data
+			# find indices of port and stbd outermost valid detections (detectionType = 0 for KMALL) in all pings;
+			# valid detections are flagged in a 2-D array of pings x beams (padded with False for pings with fewer
+			# beams), so the first and last valid beams of every ping are found with argmax from each side
+			valid = swath.grid(swath.sounding[det_int_key] <= det_int_threshold, fill=False)
+			num_valid = valid.sum(axis=1)  # number of valid detections in each ping
+			beam_port = valid.argmax(axis=1)
+			beam_stbd = valid.shape[1] - 1 - valid[:, ::-1].argmax(axis=1)
+
+			for p in np.flatnonzero(num_valid < 2):
+				print('XYZ datagram for ping', p, 'has no valid soundings... continuing to next ping')
+
+			ping_idx = np.flatnonzero(num_valid >= 2)  # pings with port and stbd valid soundings
+			idx_port = swath.ping_start[ping_idx] + beam_port[ping_idx]
+			idx_stbd = swath.ping_start[ping_idx] + beam_stbd[ping_idx]
+
+			if print_updates:
+				for p, i_port, i_stbd in zip(ping_idx, idx_port, idx_stbd):
+					print('Found valid dets in ping', p, 'PORT i/Y/Z=', i_port - swath.ping_start[p],
+						  np.round(swath.sounding[across_key][i_port]),
+						  np.round(swath.sounding[depth_key][i_port]),
+						  '\tSTBD i/Y/Z=', i_stbd - swath.ping_start[p],
+						  np.round(swath.sounding[across_key][i_stbd]),
+						  np.round(swath.sounding[depth_key][i_stbd]))
+
+			# extend swath data from appropriate keys/values in data dicts
+			det['y_port'].extend(swath.sounding[across_key][idx_port].tolist())
+			det['y_stbd'].extend(swath.sounding[across_key][idx_stbd].tolist())
+			det['z_port'].extend(swath.sounding[depth_key][idx_port].tolist())
+			det['z_stbd'].extend(swath.sounding[depth_key][idx_stbd].tolist())
+			det['bs_port'].extend((swath.sounding[bs_key][idx_port]*bs_scale).tolist())
+			det['bs_stbd'].extend((swath.sounding[bs_key][idx_stbd]*bs_scale).tolist())
+			det['rx_angle_port'].extend(swath.sounding[angle_key][idx_port].tolist())
+			det['rx_angle_stbd'].extend(swath.sounding[angle_key][idx_stbd].tolist())
+
+		# store remaining system, mode, and install/runtime parameter info
+		num_pings = len(ping_idx)
+		det['fname'].extend([data[f]['fname'].rsplit('/')[-1]] * num_pings)  # store fname for each swath
+		det['ping_mode'].extend(swath.ping['PING_MODE'][ping_idx].tolist())
+		det['pulse_form'].extend(swath.ping['PULSE_FORM'][ping_idx].tolist())
+		det['fsize'].extend([data[f]['fsize']] * num_pings)
+		det['fsize_wc'].extend([data[f]['fsize_wc']] * num_pings)
+		det['bytes'].extend(swath.ping['BYTES_FROM_LAST_PING'][ping_idx].tolist())
+
+		# .all date and time from ms from midnight and .kmall date and time from datetime object are both stored in
+		# the DATETIME ping field
+		dt = swath.ping['DATETIME'][ping_idx]
+		dt_str = np.datetime_as_string(dt, unit='us').tolist()  # YYYY-MM-DDTHH:MM:SS.ffffff
+		det['datetime'].extend(dt.tolist())
+		det['date'].extend([s[:10] for s in dt_str])
+		det['time'].extend([s[11:] for s in dt_str])
+
+		if ftype == 'all':  # .all ping fields and runtime and install params referenced by each ping
+			all_keys = {'model': 'MODEL', 'sn': 'SYS_SN', 'swath_mode': 'SWATH_MODE', 'frequency': 'FREQUENCY',
+						'max_port_deg': 'MAX_PORT_DEG', 'max_stbd_deg': 'MAX_STBD_DEG',
+						'max_port_m': 'MAX_PORT_M', 'max_stbd_m': 'MAX_STBD_M',
+						'tx_x_m': 'TX_X_M', 'tx_y_m': 'TX_Y_M', 'tx_z_m': 'TX_Z_M',
+						'tx_r_deg': 'TX_R_DEG', 'tx_p_deg': 'TX_P_DEG', 'tx_h_deg': 'TX_H_DEG',
+						'rx_x_m': 'RX_X_M', 'rx_y_m': 'RX_Y_M', 'rx_z_m': 'RX_Z_M',
+						'rx_r_deg': 'RX_R_DEG', 'rx_p_deg': 'RX_P_DEG', 'rx_h_deg': 'RX_H_DEG',
+						'wl_z_m': 'WL_Z_M', 'aps_num': 'APS_NUM', 'aps_x_m': 'APS_X_M', 'aps_y_m': 'APS_Y_M',
+						'aps_z_m': 'APS_Z_M'}
+
+			for k, v in all_keys.items():
+				det[k].extend(swath.get(v)[ping_idx].tolist())
+
+		elif ftype == 'kmall':  # .kmall ping fields and params parsed from install and runtime text
+			det['model'].extend(swath.ping['echoSounderID'][ping_idx].tolist())
+			det['aps_num'].extend([-1] * num_pings)  # need to clarify APS number in KMALL; append -1 as placeholder
+			det['aps_x_m'].extend([0] * num_pings)  # not needed for KMALL; append 0 as placeholder
+			det['aps_y_m'].extend([0] * num_pings)  # not needed for KMALL; append 0 as placeholder
+			det['aps_z_m'].extend([0] * num_pings)  # not needed for KMALL; append 0 as placeholder
+
+			# get first install param dg, assume no changes in file (have to stop logging to change install params)
+			ip_text = data[f]['IP']['install_txt'][0]
+
+			# get TX array offset text: EM304 = 'TRAI_TX1' and 'TRAI_RX1', EM2040P = 'TRAI_HD1', not '_TX1' / '_RX1'
+			# ip_tx1 = ip_text.split('TRAI_')[1].split(',')[0].strip()  # all heads/arrays split by comma
+			ip_tx1 = ip_text.split('TRAI_TX1')[1].split(',')[0].strip()  # all heads/arrays split by comma
+			det['tx_x_m'].extend([float(ip_tx1.split('X=')[1].split(';')[0].strip())] * num_pings)  # TX array X offset
+			det['tx_y_m'].extend([float(ip_tx1.split('Y=')[1].split(';')[0].strip())] * num_pings)  # TX array Y offset
+			det['tx_z_m'].extend([float(ip_tx1.split('Z=')[1].split(';')[0].strip())] * num_pings)  # TX array Z offset
+			det['tx_r_deg'].extend([float(ip_tx1.split('R=')[1].split(';')[0].strip())] * num_pings)  # TX array roll
+			det['tx_p_deg'].extend([float(ip_tx1.split('P=')[1].split(';')[0].strip())] * num_pings)  # TX array pitch
+			det['tx_h_deg'].extend([float(ip_tx1.split('H=')[1].split(';')[0].strip())] * num_pings)  # TX array heading
+
+			ip_rx1 = ip_text.split('TRAI_RX1')[1].split(',')[0].strip()  # all heads/arrays split by comma
+			det['rx_x_m'].extend([float(ip_rx1.split('X=')[1].split(';')[0].strip())] * num_pings)  # RX array X offset
+			det['rx_y_m'].extend([float(ip_rx1.split('Y=')[1].split(';')[0].strip())] * num_pings)  # RX array Y offset
+			det['rx_z_m'].extend([float(ip_rx1.split('Z=')[1].split(';')[0].strip())] * num_pings)  # RX array Z offset
+			det['rx_r_deg'].extend([float(ip_rx1.split('R=')[1].split(';')[0].strip())] * num_pings)  # RX array roll
+			det['rx_p_deg'].extend([float(ip_rx1.split('P=')[1].split(';')[0].strip())] * num_pings)  # RX array pitch
+			det['rx_h_deg'].extend([float(ip_rx1.split('H=')[1].split(';')[0].strip())] * num_pings)  # RX array heading
+
+			det['wl_z_m'].extend([float(ip_text.split('SWLZ=')[-1].split(',')[0].strip())] * num_pings)  # waterline Z
+
+			# get serial number from installation parameter: 'SN=12345'
+			sn = ip_text.split('SN=')[1].split(',')[0].strip()
+			det['sn'].extend([sn] * num_pings)
+
+			# get index of latest runtime parameter datagram prior to each ping (stored by readKMALLswath; default to 0
+			# for cases where earliest pings in file might be timestamped earlier than first runtime parameter datagram)
+			IOP = swath.param['IOP']
+			IOP_idx = swath.ping['IOP_IDX'][ping_idx]
+
+			for p in ping_idx[dt < IOP['DATETIME'][IOP_idx]]:
+				print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
+
+			# dict of keys for detection dict and substring to split runtime text at entry of interest
+			rt_dict = {'max_port_deg': 'Max angle Port:', 'max_stbd_deg': 'Max angle Starboard:',
+					   'max_port_m': 'Max coverage Port:', 'max_stbd_m': 'Max coverage Starboard:'}
+
+			# parse each runtime text once and store the values for each ping from its runtime datagram index
+			rt_params = {k: [] for k in list(rt_dict.keys()) + ['swath_mode', 'frequency']}
+
+			for rt in IOP['runtime_txt'].tolist():
+				# iterate through rt_dict and append value from split/stripped runtime text
+				for k, v in rt_dict.items():  # parse only parameters that can be converted to floats
+					try:
+						rt_params[k].append(float(rt.split(v)[-1].split('\n')[0].strip()))
+
+					except:
+						rt_params[k].append('NA')
+
+				# parse swath mode text
+				try:
+					dual_swath_mode = rt.split('Dual swath:')[-1].split('\n')[0].strip()
+					# print('kmall dual_swath_mode =', dual_swath_mode)
+					if dual_swath_mode == 'Off':
+						swath_mode = 'Single Swath'
+
+					else:
+						swath_mode = 'Dual Swath (' + dual_swath_mode + ')'
+
+				except:
+					swath_mode = 'NA'
+
+				rt_params['swath_mode'].append(swath_mode)
+
+				# parse frequency from runtime parameter text, if available
+				try:
+					frequency_rt = rt.split('Frequency:')[-1].split('\n')[0].strip().replace('kHz', ' kHz')
+					# print('frequency string from runtime text =', frequency_rt)
+
+				except:  # use default frequency stored from interpretMode
+					frequency_rt = ''
+
+				rt_params['frequency'].append(frequency_rt)
+
+				if print_updates:
+					print('parsed runtime text for IOP_idx=', len(rt_params['frequency']) - 1, ':',
+						  {k: v[-1] for k, v in rt_params.items()})
+
+			for k in rt_dict.keys():
+				det[k].extend(SwathData.column(rt_params[k])[IOP_idx].tolist())
+
+			det['swath_mode'].extend(SwathData.column(rt_params['swath_mode'])[IOP_idx].tolist())
+
+			# store parsed freq if not empty, otherwise store default
+			frequency_rt = SwathData.column(rt_params['frequency'])[IOP_idx].tolist()
+			det['frequency'].extend([f_rt if f_rt else f_default for f_rt, f_default in
+									 zip(frequency_rt, swath.ping['FREQUENCY'][ping_idx].tolist())])
+
+		else:
+			print('UNSUPPORTED FTYPE --> NOT SORTING DETECTION!')
+
+		# print('using bs_key =', bs_key, ' --> bs_port, bs_stbd:', det['bs_port'], det['bs_stbd'])
+
+	if print_updates:
+		print('\nDone sorting detections...')
+
+	# print('leaving sortDetectionsCoverage with det[frequency] =', det['frequency'])
+
+	return det
+
+
+def parse_crossline_file(fname, utm_zone='', print_updates=False, line_neighbors=None):
+	# parse one .all, .kmall, or ASCII crossline file, convert .all soundings to lat/lon, and sort detections for
+	# accuracy; this runs in a worker process (see parse_crosslines and parse_files_parallel), so the detection dict,
+	# ship track, and log entries for this file are returned instead of the full parsed data; returns None for
+	# unrecognized file types, and the traceback (with the log entries so far) if parsing fails; .all positions are read
+	# from the adjacent files of the same line given for this file in line_neighbors (see em_io.line_neighbors), if any
+	log = ParseLog()
+
+	try:
+		fname_str = fname.rsplit('/')[-1]
+		ftype = fname_str.rsplit('.', 1)[-1]
+
+		if ftype == 'all':  # parse IPSTART73, RRA78, POS80, RTP82, XYZ88
+			data = readALLswath(log, fname, print_updates=False, parse_outermost_only=False)
+			line_fnames = line_neighbors.get(fname) if line_neighbors else None  # adjacent files for positions
+			data = convertXYZ({0: data}, print_updates=False, line_fnames=line_fnames)[0]  # convertXYZ for .all data
+			track = {k: data[k] for k in ['POS', 'IP']}  # store POS and IP for track
+
+		elif ftype == 'kmall':  # store RTP with pingInfo lat/lon as ship track
+			data = readKMALLswath(log, fname)
+			track = {k: data[k] for k in ['HDR', 'RTP', 'IP']}
+
+		elif ftype == 'txt':  # read soundings and track from ASCII (vessel X, vessel Y)
+			data = readASCIIswath(log, fname, utm_zone=utm_zone)
+			track = {k: data[k] for k in ['HDR', 'RTP', 'IP']}
+			track['e'] = data['ping_e']
+			track['n'] = data['ping_n']
+			track['datetime'] = data['datetime']
+
+		else:
+			return None
+
+		track['fname'] = fname_str
+
+		# maintain depth as reported in file; interpret/verify modes
+		data = interpretMode(log, {0: data}, print_updates=print_updates)
+		det = sortDetectionsAccuracy(log, data, print_updates=True)  # sort new accuracy soundings
+
+		return {'det': det, 'track': track, 'log': log.entries}
+
+	except Exception:
+		return {'error': traceback.format_exc(), 'log': log.entries}
+
+
+def sortDetectionsAccuracy(self, data, print_updates=False):
+	# sort through .all and .kmall data dict and store valid soundings, BS, and modes
+	# note: .all data must be converted from along/across/depth data to lat/lon with convertXYZ before sorting
+	det_key_list = ['fname',  'model', 'datetime', 'date', 'time', 'sn',
+					'lat', 'lon', 'x', 'y', 'z', 'z_re_wl', 'n', 'e', 'utm_zone', 'bs', 'rx_angle',
+					'ping_mode', 'pulse_form', 'swath_mode', 'frequency',
+					'max_port_deg', 'max_stbd_deg', 'max_port_m', 'max_stbd_m',
+					'tx_x_m', 'tx_y_m', 'tx_z_m', 'aps_x_m', 'aps_y_m', 'aps_z_m', 'wl_z_m',
+					'ping_e', 'ping_n', 'ping_utm_zone']  # mode_bin
+
+	det = {k: [] for k in det_key_list}
+
+	# examine detection info across swath, find outermost valid soundings for each ping
+	for f in range(len(data)):  # loop through all data
+		if print_updates:
+			print('Sorting detections for accuracy, f =', f, ' and data[f] keys =', data[f].keys())
+		# set up keys for dict fields of interest from parsers for each file type (.all or .kmall)
+		ftype = data[f]['fname'].rsplit('.', 1)[1]
+
+		if ftype == 'txt':  #ASCII text
+			print('\n\n**** NEED TO SORT ASCII TEXT SOUNDINGS ****\n\n')
+			continue
+
+		elif ftype not in ['all', 'kmall']:
+			print('UNSUPPORTED FTYPE --> NOT SORTING DETECTION!')
+			continue
+
+		key_idx = int(ftype == 'kmall')  # keys in data dicts depend on parser used, get index to select keys below
+		det_int_threshold = [127, 0][key_idx]  # threshold for valid sounding (.all  <128 and .kmall == 0)
+		det_int_key = ['RX_DET_INFO', 'detectionType'][key_idx]  # key for detect info depends on ftype
+		depth_key = ['RX_DEPTH', 'z_reRefPoint_m'][key_idx]  # key for depth
+		across_key = ['RX_ACROSS', 'y_reRefPoint_m'][key_idx]  # key for acrosstrack distance
+		along_key = ['RX_ALONG', 'z_reRefPoint_m'][key_idx]  # key for alongtrack distance
+		bs_key = ['RX_BS', 'reflectivity1_dB'][key_idx]  # key for backscatter in dB
+		bs_scale = [0.1, 1][key_idx]  # backscatter scale in X dB; multiply parsed value by this factor for dB
+		angle_key = ['RX_ANGLE', 'beamAngleReRx_deg'][key_idx]  # key for RX angle re RX array
+		lat_key = ['SOUNDING_LAT', 'lat'][key_idx]
+		lon_key = ['SOUNDING_LON', 'lon'][key_idx]
+		e_key = ['SOUNDING_E', 'e'][key_idx]
+		n_key = ['SOUNDING_N', 'n'][key_idx]
+		utm_key = ['SOUNDING_UTM_ZONE', 'utm_zone'][key_idx]
+
+		swath = data[f]['XYZ']  # SwathData with ping fields and soundings stored in flat arrays for all pings
+		if len(swath) == 0:
+			continue
+
+		# indices of all valid detections in all pings and the ping index of each, for ping fields and params
+		det_idx = np.flatnonzero(swath.sounding[det_int_key] <= det_int_threshold)
+		ping_idx = swath.sounding_ping()[det_idx]
+		num_det = len(det_idx)
+
+		# extend swath data from appropriate keys/values in data dicts
+		# future general sorter: accuracy, keep all valid det_int; coverage, reduce for outermost valid det_int
+		det['fname'].extend([data[f]['fname'].rsplit('/')[-1]] * num_det)  # store fname for each det
+		det['x'].extend(swath.sounding[along_key][det_idx].tolist())  # as parsed
+		det['y'].extend(swath.sounding[across_key][det_idx].tolist())  # as parsed
+		det['z'].extend(swath.sounding[depth_key][det_idx].tolist())  # as parsed
+
+		det['lat'].extend(swath.sounding[lat_key][det_idx].tolist())
+		det['lon'].extend(swath.sounding[lon_key][det_idx].tolist())
+
+		det['n'].extend(swath.sounding[n_key][det_idx].tolist())
+		det['e'].extend(swath.sounding[e_key][det_idx].tolist())
+		det['bs'].extend((swath.sounding[bs_key][det_idx] * bs_scale).tolist())
+		det['ping_mode'].extend(swath.ping['PING_MODE'][ping_idx].tolist())
+		det['pulse_form'].extend(swath.ping['PULSE_FORM'][ping_idx].tolist())
+
+		# .all date and time from ms from midnight and .kmall date and time from datetime object are both stored in
+		# the DATETIME ping field
+		dt = swath.ping['DATETIME'][ping_idx]
+		dt_str = np.datetime_as_string(dt, unit='us').tolist()  # YYYY-MM-DDTHH:MM:SS.ffffff
+		det['datetime'].extend(dt.tolist())
+		det['date'].extend([s[:10] for s in dt_str])
+		det['time'].extend([s[11:] for s in dt_str])
+
+		if ftype == 'all':  # .all ping fields and runtime and install params referenced by each ping
+			all_keys = {'model': 'MODEL', 'sn': 'SYS_SN',
+						'utm_zone': 'SOUNDING_UTM_ZONE',  # convertXYZ --> one utmzone / ping
+						'swath_mode': 'SWATH_MODE',
+						'max_port_deg': 'MAX_PORT_DEG', 'max_stbd_deg': 'MAX_STBD_DEG',
+						'max_port_m': 'MAX_PORT_M', 'max_stbd_m': 'MAX_STBD_M',
+						'tx_x_m': 'TX_X_M', 'tx_y_m': 'TX_Y_M', 'tx_z_m': 'TX_Z_M',
+						'aps_x_m': 'APS_X_M', 'aps_y_m': 'APS_Y_M', 'aps_z_m': 'APS_Z_M'}
+
+			for k, v in all_keys.items():
+				det[k].extend(swath.get(v)[ping_idx].tolist())
+
+			# det['rx_angle'].extend(swath.sounding[angle_key][det_idx].tolist())
+			det['wl_z_m'].extend(swath.get('WL_Z_M')[:1].tolist() * num_det)  # first ping
+
+		elif ftype == 'kmall':  # .kmall ping fields and params parsed from install and runtime text
+			det['model'].extend(swath.ping['echoSounderID'][ping_idx].tolist())
+			det['utm_zone'].extend(swath.sounding[utm_key][det_idx].tolist())  # readKMALLswath 1 utm/sounding
+			det['aps_x_m'].extend([0] * num_det)  # not needed for KMALL; append 0 as placeholder
+			det['aps_y_m'].extend([0] * num_det)  # not needed for KMALL; append 0 as placeholder
+			det['aps_z_m'].extend([0] * num_det)  # not needed for KMALL; append 0 as placeholder
+
+			# get first installation parameter datagram in file for s/n and offsets, assume no changes within file
+			ip_text = data[f]['IP']['install_txt'][0]
+			# get TX array offset text: EM304 = 'TRAI_TX1' and 'TRAI_RX1', EM2040P = 'TRAI_HD1', not '_TX1' / '_RX1'
+			ip_tx1 = ip_text.split('TRAI_')[1].split(',')[0].strip()  # all heads/arrays split by comma; use 1st hd
+			det['tx_x_m'].extend([float(ip_tx1.split('X=')[1].split(';')[0].strip())] * num_det)  # TX array X
+			det['tx_y_m'].extend([float(ip_tx1.split('Y=')[1].split(';')[0].strip())] * num_det)  # TX array Y
+			det['tx_z_m'].extend([float(ip_tx1.split('Z=')[1].split(';')[0].strip())] * num_det)  # TX array Z
+			det['wl_z_m'].extend([float(ip_text.split('SWLZ=')[-1].split(',')[0].strip())] * num_det)  # WL Z
+
+			# get serial number from installation parameter: 'SN=12345'
+			sn = ip_text.split('SN=')[1].split(',')[0].strip()
+			det['sn'].extend([sn] * num_det)
+
+			# get index of latest runtime parameter datagram prior to each ping (stored by readKMALLswath; default to 0
+			# for cases where earliest pings in file might be timestamped earlier than first runtime parameter datagram)
+			IOP = swath.param['IOP']
+			IOP_idx = swath.ping['IOP_IDX']
+
+			for p in np.flatnonzero(swath.ping['DATETIME'] < IOP['DATETIME'][IOP_idx]):
+				print('*****ping', p, 'occurred before first runtime datagram; using first RTP dg in file')
+
+			# dict of keys for detection dict and substring to split runtime text at entry of interest
+			rt_dict = {'max_port_deg': 'Max angle Port:', 'max_stbd_deg': 'Max angle Starboard:',
+					   'max_port_m': 'Max coverage Port:', 'max_stbd_m': 'Max coverage Starboard:'}
+
+			# parse each runtime text once and store the values for each det from the runtime datagram index of its ping
+			rt_params = {k: [] for k in list(rt_dict.keys()) + ['swath_mode', 'frequency']}
+
+			for rt in IOP['runtime_txt'].tolist():
+				print('rt = ', rt)
+
+				# iterate through rt_dict and append coverage limits from split/stripped runtime text
+				for k, v in rt_dict.items():
+					try:
+						rt_params[k].append(float(rt.split(v)[-1].split('\n')[0].strip()))
+
+					except:
+						rt_params[k].append('NA')
+
+				# parse swath mode text
+				try:
+					dual_swath_mode = rt.split('Dual swath:')[-1].split('\n')[0].strip()
+
+					# print('kmall dual_swath_mode =', dual_swath_mode)
+
+					depth_mode = rt.split('Depth setting:')[-1].split('\n')[0].strip().lower()
+					print('found depth_mode =', depth_mode)
+					print('depth_mode in [very deep, extra deep, extreme deep] = ',
+						  depth_mode in ['very deep', 'extra deep', 'extreme deep'])
+
+					# if dual_swath_mode == 'Off':
+					if dual_swath_mode == 'Off' or depth_mode in ['very deep', 'extra deep', 'extreme deep']:
+						swath_mode = 'Single Swath'
+
+					else:
+						swath_mode = 'Dual Swath (' + dual_swath_mode + ')'
+
+				except:
+					swath_mode = 'NA'
+
+				rt_params['swath_mode'].append(swath_mode)
+
+				# parse frequency from runtime parameter text, if available
+				try:
+					# print('trying to split runtime text')
+					frequency_rt = rt.split('Frequency:')[-1].split('\n')[0].strip().replace('kHz', ' kHz')
+					# print('frequency string from runtime text =', frequency_rt)
+
+				except:  # use default frequency stored from interpretMode
+					frequency_rt = ''
+
+				rt_params['frequency'].append(frequency_rt)
+
+			for k in list(rt_dict.keys()) + ['swath_mode']:
+				det[k].extend(SwathData.column(rt_params[k])[IOP_idx[ping_idx]].tolist())
+
+			# store parsed freq if not empty, otherwise store default
+			frequency = [f_rt if f_rt else f_default for f_rt, f_default in
+						 zip(SwathData.column(rt_params['frequency'])[IOP_idx].tolist(),
+							 swath.ping['FREQUENCY'].tolist())]  # frequency for each ping
+			det['frequency'].extend(SwathData.column(frequency)[ping_idx].tolist())
+
+			if print_updates:
+				for i in np.unique(IOP_idx).tolist():
+					print('found IOP_idx=', i, 'with IOP_datetime=', IOP['DATETIME'][i])
+					print('max_port_deg=', rt_params['max_port_deg'][i])
+					print('max_stbd_deg=', rt_params['max_stbd_deg'][i])
+					print('max_port_m=', rt_params['max_port_m'][i])
+					print('max_stbd_m=', rt_params['max_stbd_m'][i])
+					print('swath_mode=', rt_params['swath_mode'][i])
+
+	if print_updates:
+		print('\nDone sorting detections...')
+
+	# print('leaving sortDetectionsCoverage with det[frequency] =', det['frequency'])
+
+	return det
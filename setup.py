@@ -21,7 +21,8 @@ setup(
         "utm",
         "scipy",
         "numpy",
-        "matplotlib"
+        "matplotlib",
+        "pyproj"
     ],
     python_requires='>=3.5',
     description="Multibeam tools for Sea Acceptance Trials or Quality Assessment Testing.",
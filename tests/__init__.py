@@ -0,0 +1 @@
+"""Tests for multibeam_tools libraries using synthetic .all and .kmall files (see tests/fixtures.py)"""
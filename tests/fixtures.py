@@ -0,0 +1,80 @@
+"""Synthetic .all and .kmall datagrams and survey lines for tests"""
+
+import struct
+import numpy as np
+from multibeam_tools.libs import parseEM
+
+IP_TEXT = b'WLZ=-1.5,SMH=1,S1Z=2.1,S1X=0.5,S1Y=0.1,S1R=0.0,S1P=0.1,S1H=0.2,S2Z=2.2,S2X=0.6,S2Y=0.2,S2R=0.0,S2P=0.0,' \
+		  b'S2H=0.1,APS=0,P1X=1.0,P1Y=2.0,P1Z=3.0,P2X=4.0,P2Y=5.0,P2Z=6.0,'
+
+
+def all_dg(dg_ID, header=None, cycles=(), trailer=None, extra=b'', checksum=None):
+	# return one .all datagram (length field, STX to CHECKSUM) packed with the parseEM schema for dg_ID; header and
+	# trailer fields not given are 0, cycles are structured arrays of the schema cycle dtypes, and extra bytes (e.g.,
+	# IP text) follow the cycles; the checksum is the sum of bytes between STX and ETX unless given
+	schema = parseEM.DG_SCHEMA[dg_ID]
+	hdr = dict.fromkeys(schema['header_keys'], 0)
+	hdr.update({'STX': 2, 'ID': dg_ID, 'MODEL': 2040, 'DATE': 20200101, 'SYS_SN': 555})
+	hdr.update(header or {})
+	body = schema['header_struct'].pack(*[hdr[k] for k in schema['header_keys']])
+	body += b''.join(c.tobytes() for c in cycles) + extra
+
+	if schema['trailer_keys']:
+		trl = dict.fromkeys(schema['trailer_keys'], 0)
+		trl.update(trailer or {})
+		body += schema['trailer_struct'].pack(*[trl[k] for k in schema['trailer_keys']])
+
+	body += b'\x03'
+	body += struct.pack('<H', sum(body[1:-1]) & 0xFFFF if checksum is None else checksum)
+
+	return struct.pack('<I', len(body)) + body
+
+
+def cycle(dg_ID, count_key, num):
+	# return a zero structured array of num entries of the schema cycle dtype for count_key in dg_ID
+	return np.zeros(num, dtype=dict(parseEM.DG_SCHEMA[dg_ID]['cycle_dtypes'])[count_key])
+
+
+def all_line(num_pings=20, num_beams=8, time=3600000, ping_interval=500, first_ping=0):
+	# return the datagrams (list of bytes) of a .all survey line: IP 73 and RTP 82 at the start, then POS 80, RRA 78, and
+	# XYZ 88 for each ping, with position, heading, and soundings varying with the ping number
+	dgs = [all_dg(73, {'TIME': time, 'LINE_NUM': 1}, extra=IP_TEXT),
+		   all_dg(82, {'TIME': time, 'MODE': 1, 'MAX_PORT_COV': 70, 'MAX_STBD_COV': 65})]
+
+	for p in range(first_ping, first_ping + num_pings):
+		t = time + (p + 1)*ping_interval
+		dgs.append(all_dg(80, {'TIME': t - 100, 'COUNT': p, 'LAT': int((40 + p*1e-5)*2e7),
+							   'LON': int((-70 + p*1e-5)*1e7), 'SYS_DESC': 0b10000001, 'INPUT_LEN': 4}, extra=b'$GGA'))
+
+		rx = cycle(78, 'NUM_RX_BEAMS', num_beams)
+		rx['RX_ANGLE'] = np.linspace(-6500, 6500, num_beams).astype(int) + p
+		dgs.append(all_dg(78, {'TIME': t, 'PING_COUNTER': p, 'NUM_TX_SECTORS': 1, 'NUM_RX_BEAMS': num_beams},
+						  cycles=[cycle(78, 'NUM_TX_SECTORS', 1), rx]))
+
+		rx = cycle(88, 'NUM_RX_BEAMS', num_beams)
+		rx['RX_DEPTH'] = 100 + p
+		rx['RX_ACROSS'] = np.linspace(-200, 200, num_beams)
+		rx['RX_ALONG'] = p*0.1
+		dgs.append(all_dg(88, {'TIME': t, 'PING_COUNTER': p, 'HEADING': 9000 + p, 'NUM_RX_BEAMS': num_beams,
+							   'NUM_DET': num_beams}, cycles=[rx]))
+
+	return dgs
+
+
+def kmall_dg(dg_type, time_sec, ping_counter=None, rx_fan_index=0, body=b''):
+	# return one .kmall datagram (header, body, repeated numBytesDgm); multibeam (#M) datagrams start with a partition
+	# and common part with the ping counter and RX fan index, followed by body
+	if ping_counter is not None:
+		body = struct.pack('<HHHHBB', 1, 1, 12, ping_counter, 1, rx_fan_index) + b'\x00'*6 + body
+
+	num_bytes = 20 + len(body) + 4
+
+	return struct.pack('<I4sBBHII', num_bytes, dg_type, 0, 1, 2040, time_sec, 0) + body + struct.pack('<I', num_bytes)
+
+
+def write(path, dgs):
+	# write datagrams (list of bytes) to a file and return its path as str
+	with open(path, 'wb') as fid:
+		fid.write(b''.join(dgs))
+
+	return str(path)
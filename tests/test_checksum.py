@@ -0,0 +1,48 @@
+"""Tests for .all datagram checksum verification (em_io.verify_checksums and index_all)"""
+
+import numpy as np
+import pytest
+from multibeam_tools.libs import em_io
+from tests import fixtures
+
+
+@pytest.mark.parametrize('chunk_size', [em_io.CHECKSUM_CHUNK_SIZE, 1, 300])
+def test_verify_checksums(monkeypatch, chunk_size):
+	# datagrams are summed in chunks of the file; the result must not depend on the chunk size
+	monkeypatch.setattr(em_io, 'CHECKSUM_CHUNK_SIZE', chunk_size)
+	dgs = fixtures.all_line(num_pings=5)
+	dgs[3] = fixtures.all_dg(78, {'TIME': 1}, checksum=1234)
+	dgs[-1] = fixtures.all_dg(88, {'TIME': 2}, checksum=0)
+	raw = b''.join(dgs)
+	offsets = np.cumsum([0] + [len(dg) for dg in dgs[:-1]])
+	lengths = [len(dg) - 4 for dg in dgs]
+	ok = em_io.verify_checksums(np.frombuffer(raw, dtype=np.uint8), offsets, lengths)
+
+	assert ok.tolist() == [i not in (3, len(dgs) - 1) for i in range(len(dgs))]
+
+
+def test_index_all_checksum_valid_flag():
+	dgs = fixtures.all_line(num_pings=3)
+	dgs[4] = fixtures.all_dg(80, {'TIME': 3600000, 'COUNT': 1}, checksum=7)
+	raw = b''.join(dgs)
+
+	assert em_io.index_all(raw).VALID.all()
+	assert em_io.index_all(raw, verify_checksum=True).VALID.tolist() == [i != 4 for i in range(len(dgs))]
+
+
+def test_checksum_wraps_at_16_bits():
+	# 300 bytes of 0xFF sum to more than 0xFFFF; only the low 16 bits are stored
+	dg = fixtures.all_dg(73, {'TIME': 1}, extra=b'\xff'*300)
+
+	assert em_io.index_all(dg, verify_checksum=True).VALID.tolist() == [True]
+
+
+def test_iter_datagrams_skips_invalid_checksums(tmp_path):
+	dgs = fixtures.all_line(num_pings=3)
+	dgs[5] = fixtures.all_dg(88, {'TIME': 3601000, 'PING_COUNTER': 1}, checksum=0)
+	fname = fixtures.write(tmp_path / 'a.all', dgs)
+	skipped = []
+	offsets = [offset for offset, _, _ in em_io.iter_datagrams(fname, verify_checksum=True, skipped=skipped)]
+
+	assert len(offsets) == len(dgs) - 1
+	assert skipped == [(sum(len(dg) for dg in dgs[:5]), sum(len(dg) for dg in dgs[:6]))]
@@ -0,0 +1,104 @@
+"""Tests for the .all datagram indexer (em_io.index_all)"""
+
+import struct
+import numpy as np
+import pytest
+from multibeam_tools.libs import em_io
+from tests import fixtures
+
+
+def walk_all(raw):
+	# reference index: follow the length fields from the start of the file, as in the original parsing loops
+	offsets, lengths = [], []
+	pos = 0
+
+	while pos + 4 <= len(raw):
+		dg_len = struct.unpack('<I', raw[pos:pos + 4])[0]
+		offsets.append(pos)
+		lengths.append(dg_len)
+		pos += 4 + dg_len
+
+	return offsets, lengths
+
+
+def test_index_all_fields():
+	dgs = fixtures.all_line(num_pings=4)
+	raw = b''.join(dgs)
+	toc = em_io.index_all(raw)
+	offsets, lengths = walk_all(raw)
+
+	assert toc.OFFSET.tolist() == offsets
+	assert toc.LENGTH.tolist() == lengths
+	assert toc.ID.tolist() == [73, 82] + [80, 78, 88]*4
+	assert set(toc.DATE.tolist()) == {20200101} and set(toc.SYS_SN.tolist()) == {555}
+	assert toc.TIME[toc.ID == 88].tolist() == [3600500, 3601000, 3601500, 3602000]
+	assert toc.PING_COUNTER[toc.ID == 88].tolist() == [0, 1, 2, 3]
+	assert toc.VALID.all()
+
+
+def test_index_all_ignores_datagrams_embedded_in_data():
+	# a complete datagram inside the IP text (e.g., a binary field that happens to look like one) is not indexed
+	inner = fixtures.all_dg(80, {'TIME': 1000, 'COUNT': 9})
+	dgs = [fixtures.all_dg(73, {'TIME': 3600000}, extra=fixtures.IP_TEXT + inner + b',')] + fixtures.all_line()[1:]
+	toc = em_io.index_all(b''.join(dgs))
+
+	assert toc.OFFSET.tolist() == walk_all(b''.join(dgs))[0]
+	assert 1000 not in toc.TIME.tolist()
+
+
+@pytest.mark.parametrize('chunk_size', [7, 100, em_io.SCAN_CHUNK_SIZE])
+def test_index_all_chunked_scan(monkeypatch, chunk_size):
+	# the file is searched for STX in chunks; the index must not depend on the chunk size
+	monkeypatch.setattr(em_io, 'SCAN_CHUNK_SIZE', chunk_size)
+	raw = b''.join(fixtures.all_line(num_pings=3))
+
+	assert em_io.index_all(raw).OFFSET.tolist() == walk_all(raw)[0]
+
+
+def test_index_all_empty():
+	assert len(em_io.index_all(b'')) == 0
+	assert len(em_io.index_all(b'\x00'*3)) == 0
+
+
+def offsets_of(dgs, start=0):
+	# offsets of datagrams written one after another from start
+	return (start + np.cumsum([0] + [len(dg) for dg in dgs[:-1]])).tolist()
+
+
+def test_resync_after_garbage():
+	# random bytes (including false STX and ETX) between datagrams are skipped, and all datagrams are recovered
+	dgs = fixtures.all_line(num_pings=5)
+	garbage = np.random.RandomState(0).randint(0, 256, 500).astype(np.uint8).tobytes() + b'\x02\x03'*20
+	raw = b''.join(dgs[:6]) + garbage + b''.join(dgs[6:])
+	toc = em_io.index_all(raw)
+	garbage_start = sum(len(dg) for dg in dgs[:6])
+
+	assert toc.OFFSET.tolist() == offsets_of(dgs[:6]) + offsets_of(dgs[6:], garbage_start + len(garbage))
+	assert em_io.skipped_ranges(toc, len(raw)).tolist() == [[garbage_start, garbage_start + len(garbage)]]
+
+
+def test_resync_after_corrupt_length():
+	# a datagram with a corrupt length field is skipped; the chain continues at the next datagram
+	dgs = fixtures.all_line(num_pings=5)
+	dgs[4] = struct.pack('<I', 7) + dgs[4][4:]
+	raw = b''.join(dgs)
+	toc = em_io.index_all(raw)
+	offsets = offsets_of(dgs)
+
+	assert toc.OFFSET.tolist() == offsets[:4] + offsets[5:]
+	assert em_io.skipped_ranges(toc, len(raw)).tolist() == [[offsets[4], offsets[5]]]
+
+
+def test_truncated_file():
+	# a file cut off at either end (e.g., copied while logging) keeps all complete datagrams
+	dgs = fixtures.all_line(num_pings=5)
+	raw = b''.join(dgs)
+	offsets = offsets_of(dgs)
+
+	toc = em_io.index_all(raw[:-10])
+	assert toc.OFFSET.tolist() == offsets[:-1]
+	assert em_io.skipped_ranges(toc, len(raw) - 10).tolist() == [[offsets[-1], len(raw) - 10]]
+
+	toc = em_io.index_all(raw[10:])
+	assert toc.OFFSET.tolist() == [o - 10 for o in offsets[1:]]
+	assert em_io.skipped_ranges(toc, len(raw) - 10).tolist() == [[0, offsets[1] - 10]]
@@ -0,0 +1,59 @@
+"""Tests for swath_fun.match_pings (joining XYZ 88 and RRA 78 pings)"""
+
+import numpy as np
+import pytest
+
+swath_fun = pytest.importorskip('multibeam_tools.libs.swath_fun')
+
+
+def match_pings_loop(sn, counter, dt, sn_ref, counter_ref, dt_ref):
+	# reference: for each ping, the reference datagram with the same serial number and counter nearest in time (the
+	# earlier one for equal time differences, and the first in the file for equal times)
+	idx = np.full(len(sn), -1, dtype=np.int64)
+
+	for p in range(len(sn)):
+		cand = [i for i in range(len(sn_ref)) if sn_ref[i] == sn[p] and counter_ref[i] == counter[p]]
+		if cand:
+			idx[p] = min(cand, key=lambda i: (abs(dt_ref[i] - dt[p]), dt_ref[i], i))
+
+	return idx
+
+
+def times(sec):
+	return np.datetime64('2020-01-01', 'us') + np.asarray(sec).astype('timedelta64[s]')
+
+
+def test_match_pings_in_order():
+	counter = np.arange(10)
+	idx = swath_fun.match_pings(np.full(10, 100), counter, times(counter), np.full(10, 100), counter, times(counter))
+
+	assert idx.tolist() == list(range(10))
+
+
+def test_match_pings_missing_and_other_systems():
+	# pings without a reference datagram, or with the counter of another system (dual head), are not matched
+	idx = swath_fun.match_pings([100, 100, 200, 100], [1, 2, 1, 3], times([1, 2, 1, 3]),
+								[200, 100, 100], [1, 1, 3], times([1, 1, 3]))
+
+	assert idx.tolist() == [1, -1, 0, 2]
+	assert swath_fun.match_pings([100], [1], times([1]), [], [], times([])).tolist() == [-1]
+
+
+def test_match_pings_wrapped_counter():
+	# the 16-bit ping counter wraps in a long file; each ping is matched to the reference nearest in time
+	counter = np.arange(70000) % 65536
+	t = times(np.arange(70000))
+	idx = swath_fun.match_pings(np.full(70000, 100), counter, t, np.full(70000, 100), counter, t + 1)
+
+	assert idx.tolist() == list(range(70000))
+
+
+def test_match_pings_random():
+	rng = np.random.RandomState(0)
+
+	for _ in range(200):
+		n, m = rng.randint(0, 40, 2)
+		args = (rng.choice([100, 200], n), rng.randint(0, 5, n), times(rng.randint(0, 15, n)),
+				rng.choice([100, 200, 300], m), rng.randint(0, 5, m), times(rng.randint(0, 15, m)))
+
+		assert swath_fun.match_pings(*args).tolist() == match_pings_loop(*args).tolist()
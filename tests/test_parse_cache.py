@@ -0,0 +1,138 @@
+"""Tests for parse_cache (cache round trip without unpickling, invalidation)"""
+
+import datetime
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from multibeam_tools.libs import parse_cache
+from tests import fixtures
+
+
+@pytest.fixture
+def cache_home(tmp_path, monkeypatch):
+	# use an empty cache directory for each test
+	monkeypatch.delenv('LOCALAPPDATA', raising=False)
+	monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+	return tmp_path
+
+
+class Log:
+	# collects log entries like the GUI log
+	def __init__(self):
+		self.entries = []
+
+	def update_log(self, entry, font_color='black'):
+		self.entries.append(entry)
+
+
+def assert_same(a, b):
+	# compare parsed data (dicts, lists, tuples, arrays, scalars) including types
+	assert type(a) == type(b)
+
+	if isinstance(a, dict):
+		assert list(a) == list(b)
+		for k in a:
+			assert_same(a[k], b[k])
+
+	elif isinstance(a, (list, tuple)):
+		assert len(a) == len(b)
+		for x, y in zip(a, b):
+			assert_same(x, y)
+
+	elif isinstance(a, np.ndarray):
+		assert a.dtype == b.dtype and a.shape == b.shape
+		if a.dtype.hasobject:
+			assert_same(a.tolist(), b.tolist())
+
+		else:
+			assert np.array_equal(a, b)
+
+	else:
+		assert a == b
+
+
+def test_datagram_dicts_round_trip(cache_home):
+	# datagram dicts have int keys, numpy scalars and arrays (including structured arrays), datetimes, and text
+	pytest.importorskip('kmall')
+	fname = fixtures.write(cache_home / 'a.all', fixtures.all_line(num_pings=2))
+	rx = fixtures.cycle(88, 'NUM_RX_BEAMS', 4)
+	data = {'fname': fname,
+			'RRA': {0: {'PING_COUNTER': 1, 'RX_ANGLE': np.arange(4, dtype=np.int16), 'RX': rx, 'TIME': np.uint32(5)}},
+			'IP': {0: {'dgdatetime': datetime.datetime(2021, 5, 1, 12, 0, 0, 123456), 'install_txt': ['S1Z=2.1']}},
+			'MISC': {'bytes': b'\x02\xff', 'tuple': (1, 'a'), 'none': None, 'nan': float('nan'), 'empty': np.zeros(0),
+					 'mixed': np.array([1, 'N/A', 2.5], dtype=object)}}
+
+	parse_cache.save(fname, 'test', data)
+	loaded = parse_cache.load(fname, 'test')
+	nan = loaded['MISC'].pop('nan')
+	data['MISC'].pop('nan')
+
+	assert np.isnan(nan)
+	assert_same(data, loaded)
+
+
+def test_swath_data_round_trip(cache_home):
+	swath_fun = pytest.importorskip('multibeam_tools.libs.swath_fun')
+	fname = fixtures.write(cache_home / 'a.all', fixtures.all_line(num_pings=5))
+	data = swath_fun.readALLswath(swath_fun.ParseLog(), fname, use_cache=False)
+	data['XYZ'].ping['SOUNDING_UTM_ZONE'] = np.array(['19N', 'N/A', '19N', '19N', '19N'], dtype=object)
+
+	parse_cache.save(fname, 'test', data)
+	loaded = parse_cache.load(fname, 'test')
+
+	for table in ['ping', 'sounding']:
+		assert_same(dict(sorted(getattr(data['XYZ'], table).items())),
+					dict(sorted(getattr(loaded['XYZ'], table).items())))
+
+	assert_same(data['XYZ'].ping_start, loaded['XYZ'].ping_start)
+	assert_same(data['XYZ'].param, loaded['XYZ'].param)
+	assert_same({k: v for k, v in data.items() if k != 'XYZ'}, {k: v for k, v in loaded.items() if k != 'XYZ'})
+
+
+def test_cache_files_load_without_pickle(cache_home):
+	pytest.importorskip('kmall')
+	fname = fixtures.write(cache_home / 'a.all', fixtures.all_line(num_pings=1))
+	parse_cache.save(fname, 'test', {'POS': {0: {'LAT': 40.0, 'DATA': np.array([1, 'a'], dtype=object)}}})
+
+	with np.load(parse_cache.cache_path(fname, 'test'), allow_pickle=False) as arrays:
+		assert all(arrays[k].dtype != object for k in arrays.files)
+
+
+def test_unsupported_values_not_cached(cache_home):
+	pytest.importorskip('kmall')
+	fname = fixtures.write(cache_home / 'a.all', fixtures.all_line(num_pings=1))
+	log = Log()
+	parse_cache.save(fname, 'test', {'POS': {0: {1, 2}}}, log=log)
+
+	assert parse_cache.load(fname, 'test', log=log) is None
+	assert parse_cache.cache_files() == []
+	assert log.entries == ['Failed to cache parse of ' + fname + ': cannot cache value of type set']
+
+
+def test_modified_file_not_loaded_and_invalidate(cache_home):
+	pytest.importorskip('kmall')
+	fa = fixtures.write(cache_home / 'a.all', fixtures.all_line(num_pings=1))
+	fb = fixtures.write(cache_home / 'b.all', fixtures.all_line(num_pings=1))
+	parse_cache.save(fa, 'test', {'fname': fa})
+	parse_cache.save(fb, 'test', {'fname': fb})
+	parse_cache.save(fb, 'other mode', {'fname': fb})
+
+	assert parse_cache.load(fa, 'test') == {'fname': fa}
+	assert parse_cache.load(fa, 'other mode') is None
+
+	fixtures.write(fa, fixtures.all_line(num_pings=2))
+	assert parse_cache.load(fa, 'test') is None
+
+	assert parse_cache.invalidate([fb]) == 2
+	assert len(parse_cache.cache_files()) == 1
+
+
+def test_invalidate_from_command_line(cache_home):
+	env = dict(os.environ, XDG_CACHE_HOME=str(cache_home / 'cache'))
+	out = subprocess.run([sys.executable, '-m', 'multibeam_tools.libs.parse_cache'], env=env, capture_output=True,
+						 text=True, check=True).stdout
+
+	assert out.startswith('Removed 0 cached parse file(s)')
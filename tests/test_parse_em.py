@@ -0,0 +1,28 @@
+"""Tests for parseEM datagram decoding"""
+
+import numpy as np
+from multibeam_tools.libs import em_io, parseEM
+from tests import fixtures
+
+
+def test_decode_dg_headers_matches_decode_dg():
+	dgs = fixtures.all_line(num_pings=5)
+	raw = b''.join(dgs)
+	toc = em_io.index_all(raw)
+	toc = toc[toc.ID == 88]
+	headers = parseEM.decode_dg_headers(raw, toc.OFFSET + 4, 88)
+
+	assert len(headers) == 5
+	for hdr, offset, length in zip(headers, toc.OFFSET.tolist(), toc.LENGTH.tolist()):
+		dg = parseEM.decode_dg(raw[offset + 4:offset + 4 + length], 88)
+		assert {k: hdr[k].item() for k in headers.dtype.names} == {k: dg[k] for k in headers.dtype.names}
+
+
+def test_decode_dg_headers_at_end_of_buffer():
+	# a header at the last possible position (e.g., a datagram truncated after its header) is read in full
+	dg = fixtures.all_dg(80, {'TIME': 1234, 'COUNT': 7})
+	raw = dg[:4 + parseEM.DG_SCHEMA[80]['header_dtype'].itemsize]
+	headers = parseEM.decode_dg_headers(raw, [4], 80)
+
+	assert headers['TIME'].tolist() == [1234] and headers['COUNT'].tolist() == [7]
+	assert parseEM.decode_dg_headers(raw, np.zeros(0, dtype=np.int64), 80).shape == (0,)
@@ -0,0 +1,74 @@
+"""Tests for swath_fun.SwathData (columnar ping and sounding store) and readALLswath output"""
+
+import numpy as np
+import pytest
+from tests import fixtures
+
+swath_fun = pytest.importorskip('multibeam_tools.libs.swath_fun')
+SwathData = swath_fun.SwathData
+
+
+def make_swath():
+	# three pings with 2, 0, and 3 soundings, and runtime params referenced by index
+	pings = [{'PING_COUNTER': 1, 'RX_DEPTH': [10.0, 11.0], 'RTP_IDX': 0},
+			 {'PING_COUNTER': 2, 'RX_DEPTH': [], 'RTP_IDX': 1},
+			 {'PING_COUNTER': 3, 'RX_DEPTH': [12.0, 13.0, 14.0], 'RTP_IDX': 1}]
+
+	return SwathData.from_pings(pings, param={'RTP': {'MAX_PORT_DEG': np.array([70, 60])}})
+
+
+def test_from_pings():
+	swath = make_swath()
+
+	assert len(swath) == 3
+	assert swath.ping_start.tolist() == [0, 2, 2, 5]
+	assert swath.ping['PING_COUNTER'].tolist() == [1, 2, 3]
+	assert swath.sounding['RX_DEPTH'].tolist() == [10, 11, 12, 13, 14]
+	assert swath.num_soundings().tolist() == [2, 0, 3]
+	assert swath.sounding_ping().tolist() == [0, 0, 2, 2, 2]
+	assert swath.sounding_beam().tolist() == [0, 1, 0, 1, 2]
+
+
+def test_grid():
+	swath = make_swath()
+	grid = swath.grid(swath.sounding['RX_DEPTH'])
+
+	assert grid.shape == (3, 3)
+	assert grid[0, :2].tolist() == [10, 11] and np.isnan(grid[0, 2]) and np.isnan(grid[1]).all()
+	assert grid[2].tolist() == [12, 13, 14]
+	assert SwathData().grid([], fill=False).shape == (0, 1)
+
+
+def test_get_param_by_ping():
+	swath = make_swath()
+
+	assert swath.get('PING_COUNTER').tolist() == [1, 2, 3]
+	assert swath.get('MAX_PORT_DEG').tolist() == [70, 60, 60]
+
+	swath.ping['RTP_IDX'][0] = -1  # ping before the first runtime param datagram
+	with pytest.raises(KeyError):
+		swath.get('MAX_PORT_DEG')
+
+	with pytest.raises(KeyError):
+		swath.get('NOT_A_FIELD')
+
+
+def test_column_mixed_values():
+	assert SwathData.column([1.5, 2]).dtype == np.float64
+	assert SwathData.column(['a', 'b']).dtype.kind == 'U'
+	assert SwathData.column([1.5, 'N/A']).tolist() == [1.5, 'N/A']
+
+
+def test_read_all_swath_skips_pings_before_params(tmp_path):
+	# pings logged before the first runtime params datagram are skipped and counted in DIAG
+	dgs = fixtures.all_line(num_pings=5)
+	dgs = [dgs[0]] + dgs[2:8] + [dgs[1]] + dgs[8:]  # RTP 82 after the first two pings
+	fname = fixtures.write(tmp_path / 'a.all', dgs)
+	data = swath_fun.readALLswath(swath_fun.ParseLog(), fname, use_cache=False)
+	swath = data['XYZ']
+
+	assert data['DIAG']['XYZ_NO_PARAMS'] == 2
+	assert swath.ping['PING_COUNTER'].tolist() == [2, 3, 4]
+	assert swath.num_soundings().tolist() == [8, 8, 8]
+	assert swath.get('MAX_PORT_DEG').tolist() == [70, 70, 70]
+	assert swath.sounding['RX_DEPTH'].tolist() == [102]*8 + [103]*8 + [104]*8
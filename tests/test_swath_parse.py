@@ -0,0 +1,48 @@
+"""Tests for swath_parse (file parsing for worker processes)"""
+
+import subprocess
+import sys
+import pytest
+from tests import fixtures
+
+swath_parse = pytest.importorskip('multibeam_tools.libs.swath_parse')
+from multibeam_tools.libs import swath_fun
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+	# two .all files of one line, with the parse cache in an empty directory (inherited by worker processes)
+	monkeypatch.delenv('LOCALAPPDATA', raising=False)
+	monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+
+	return [fixtures.write(tmp_path / 'a.all', fixtures.all_line(num_pings=6)),
+			fixtures.write(tmp_path / 'b.all', fixtures.all_line(num_pings=4, first_ping=6, time=3604000))]
+
+
+def test_no_gui_imports():
+	# worker processes import swath_parse to unpickle the parse function; Qt and matplotlib must not be loaded
+	code = 'import sys, multibeam_tools.libs.swath_parse; ' \
+		   'print(sorted({m.split(".")[0] for m in sys.modules} & {"matplotlib", "PySide2", "PyQt5"}))'
+	out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+
+	assert out.strip() == '[]'
+
+
+@pytest.mark.parametrize('num_workers', [1, 2, 8])
+def test_parse_coverage_files(files, num_workers):
+	results = dict(swath_fun.parse_files_parallel(files, swath_parse.parse_coverage_file, False, False,
+												  num_workers=num_workers))
+
+	assert sorted(results) == [0, 1]
+	assert [len(results[f]['det']['fname']) for f in range(2)] == [6, 4]
+	assert results[1]['det']['fname'] == ['b.all']*4
+	assert results[0]['det']['y_port'] == [-200.0]*6
+
+
+def test_parse_errors_returned(tmp_path, files):
+	# a file with no runtime parameters fails to parse; the traceback is returned without stopping the other files
+	bad = fixtures.write(tmp_path / 'c.all', fixtures.all_line(num_pings=2)[:1])
+	results = dict(swath_fun.parse_files_parallel(files + [bad], swath_parse.parse_coverage_file, num_workers=2))
+
+	assert 'det' in results[0] and 'det' in results[1]
+	assert results[2]['error'].startswith('Traceback') and 'readALLswath' in results[2]['error']
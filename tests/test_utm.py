@@ -0,0 +1,44 @@
+"""Tests for swath_fun.utm_zones and latlon_to_utm (per-sounding UTM conversion)"""
+
+import numpy as np
+import pytest
+
+swath_fun = pytest.importorskip('multibeam_tools.libs.swath_fun')
+utm = pytest.importorskip('utm')
+
+
+def from_latlon_loop(lat, lon):
+	# reference: utm.from_latlon for one point at a time
+	out = [utm.from_latlon(la, lo) for la, lo in zip(lat, lon)]
+
+	return np.array([o[0] for o in out]), np.array([o[1] for o in out]), [str(o[2]) + o[3] for o in out]
+
+
+def test_utm_zones_match_utm():
+	# random points and the special zones of southwest Norway and Svalbard, near zone and band boundaries
+	rng = np.random.RandomState(0)
+	lat = np.concatenate((rng.uniform(-80, 84, 2000), [56, 63.9, 60, 72, 80, 83.9, -0.001, 0, 7.999, 8, -80, 84]))
+	lon = np.concatenate((rng.uniform(-180, 180, 2000), [3, 11.9, 2.9, 8.9, 9, 20.9, 21, 33, 41.9, 5.999, 6, -180]))
+	zone, letter = swath_fun.utm_zones(lat, lon)
+	ref = [utm.from_latlon(la, lo)[2:] for la, lo in zip(lat, lon)]
+
+	assert zone.tolist() == [r[0] for r in ref]
+	assert letter.tolist() == [r[1] for r in ref]
+
+
+def test_latlon_to_utm_across_zone_boundary():
+	# a line crossing from zone 18 to 19 and into the southern hemisphere keeps the zone of each point
+	lat = np.concatenate((np.linspace(40, 40.01, 50), np.linspace(-0.01, 0.01, 50)))
+	lon = np.concatenate((np.linspace(-72.01, -71.99, 50), np.linspace(-71.99, -72.01, 50)))
+	e, n, zone = swath_fun.latlon_to_utm(lat, lon)
+	e_ref, n_ref, zone_ref = from_latlon_loop(lat, lon)
+
+	assert zone.tolist() == zone_ref
+	assert set(zone_ref) == {'18T', '19T', '19M', '18N'}
+	assert np.allclose(e, e_ref, atol=0.01) and np.allclose(n, n_ref, atol=0.01)
+
+
+def test_latlon_to_utm_empty():
+	e, n, zone = swath_fun.latlon_to_utm([], [])
+
+	assert e.shape == n.shape == zone.shape == (0,)
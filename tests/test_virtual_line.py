@@ -0,0 +1,86 @@
+"""Tests for em_io.VirtualLine and em_io.line_neighbors"""
+
+import pytest
+from multibeam_tools.libs import em_io
+from tests import fixtures
+
+
+def test_all_boundary_duplicates_dropped_once(tmp_path):
+	# second file repeats the last 5 datagrams of the first file (e.g., logged again after a file split)
+	dgs = fixtures.all_line(num_pings=10)
+	fa = fixtures.write(tmp_path / 'a.all', dgs[:20])
+	fb = fixtures.write(tmp_path / 'b.all', dgs[15:])
+	line = em_io.VirtualLine([fa, fb])
+
+	assert line.num_duplicates == 5
+	assert len(line) == len(dgs)
+	assert [bytes(dg) for _, _, dg in line.iter_datagrams()] == [dg[4:] for dg in dgs]
+	assert line.file_idx.tolist() == [0]*20 + [1]*(len(dgs) - 20)
+
+
+def test_all_offsets_continue_across_files(tmp_path):
+	dgs = fixtures.all_line(num_pings=4)
+	fa = fixtures.write(tmp_path / 'a.all', dgs[:6])
+	fb = fixtures.write(tmp_path / 'b.all', dgs[6:])
+	line = em_io.VirtualLine([fa, fb])
+	offsets = [offset for offset, _, _ in line.iter_datagrams()]
+
+	assert offsets == [sum(len(dg) for dg in dgs[:i]) for i in range(len(dgs))]
+	assert [dg_id for _, dg_id, _ in line.iter_datagrams(ids=[88])] == [88]*4
+	assert line.file_offset([offsets[7]])[0].tolist() == [1]
+
+
+def test_all_duplicates_within_file_kept(tmp_path):
+	# identical datagrams in one file (e.g., repeated by the logging system) are not boundary duplicates
+	dgs = fixtures.all_line(num_pings=3)
+	fa = fixtures.write(tmp_path / 'a.all', dgs + dgs[-2:])
+	fb = fixtures.write(tmp_path / 'b.all', dgs[-2:])
+	line = em_io.VirtualLine([fa, fb])
+
+	assert len(line) == len(dgs) + 2
+	assert line.num_duplicates == 2
+
+
+def test_kmall_boundary_duplicates_dropped_once(tmp_path):
+	# pings with two RX fans share the ping counter and time; both fans are kept, and the overlap is dropped once
+	dgs = [fixtures.kmall_dg(b'#IIP', 0)] + \
+		  [fixtures.kmall_dg(b'#MRZ', p, ping_counter=p, rx_fan_index=f) for p in range(1, 6) for f in range(2)]
+	fa = fixtures.write(tmp_path / 'a.kmall', dgs[:8])
+	fb = fixtures.write(tmp_path / 'b.kmall', dgs[5:])
+	line = em_io.VirtualLine([fa, fb])
+
+	assert line.num_duplicates == 3
+	assert [bytes(dg) for _, _, dg in line.iter_datagrams()] == dgs
+	assert line.toc.RX_FAN_INDEX.tolist() == [0] + [0, 1]*5
+
+
+def test_mixed_extensions_rejected(tmp_path):
+	fa = fixtures.write(tmp_path / 'a.all', fixtures.all_line(num_pings=1))
+	fb = fixtures.write(tmp_path / 'b.kmall', [fixtures.kmall_dg(b'#IIP', 0)])
+
+	with pytest.raises(ValueError):
+		em_io.VirtualLine([fa, fb])
+
+
+def test_line_neighbors(tmp_path):
+	# a and b are one line split by the logging software; c starts after a gap (e.g., turn file omitted)
+	fa = fixtures.write(tmp_path / 'a.all', fixtures.all_line(num_pings=10))
+	fb = fixtures.write(tmp_path / 'b.all', fixtures.all_line(num_pings=10, first_ping=10, time=3600000 + 5000))
+	fc = fixtures.write(tmp_path / 'c.all', fixtures.all_line(num_pings=10, time=3600000 + 60000))
+	neighbors = em_io.line_neighbors([fc, fb, fa, str(tmp_path / 'x.kmall')])
+
+	assert neighbors == {fa: [fa, fb], fb: [fa, fb], fc: [fc]}
+
+
+def test_read_line_positions(tmp_path):
+	# positions are read once from overlapping files of a line
+	pytest.importorskip('matplotlib')
+	pytest.importorskip('utm')
+	from multibeam_tools.libs import readEM
+
+	dgs = fixtures.all_line(num_pings=10)
+	fa = fixtures.write(tmp_path / 'a.all', dgs[:20])
+	fb = fixtures.write(tmp_path / 'b.all', dgs[14:])
+	pos = readEM.read_line_positions([fa, fb])
+
+	assert [pos[p]['COUNT'] for p in range(len(pos))] == list(range(10))